@@ -17,12 +17,14 @@ from fastapi import (  # noqa: F401
     Security,
     status,
 )
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models.extra_models import TokenModel  # noqa: F401
 from app.models.error import Error
 from app.models.id import ID
 from app.models.compartment import Compartment
 
+from app.db import get_session
 from app.controller.compartments_controller import CompartmentController
 
 router = APIRouter()
@@ -37,10 +39,11 @@ controller = CompartmentController()
     response_model_by_alias=True,
 )
 async def create_compartment(
-    compartment: Compartment = Body(None, description="")
+    compartment: Compartment = Body(None, description=""),
+    session: AsyncSession = Depends(get_session),
 ) -> ID:
     """Create a new compartment."""
-    return await controller.create_compartment(compartment)
+    return await controller.create_compartment(session, compartment)
 
 
 @router.delete(
@@ -53,10 +56,11 @@ async def create_compartment(
     response_model_by_alias=True,
 )
 async def delete_compartment(
-    compartmentId: StrictStr = Path(..., description="")
+    compartmentId: StrictStr = Path(..., description=""),
+    session: AsyncSession = Depends(get_session),
 ) -> None:
     """Delete specific compartment."""
-    return await controller.delete_compartment(compartmentId)
+    return await controller.delete_compartment(session, compartmentId)
 
 
 @router.get(
@@ -67,6 +71,8 @@ async def delete_compartment(
     tags=["Compartments"],
     response_model_by_alias=True,
 )
-async def list_compartments() -> List[Compartment]:
+async def list_compartments(
+    session: AsyncSession = Depends(get_session),
+) -> List[Compartment]:
     """List all existing compartments."""
-    return await controller.list_compartments()
+    return await controller.list_compartments(session)
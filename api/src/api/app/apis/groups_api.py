@@ -17,12 +17,14 @@ from fastapi import (  # noqa: F401
     Security,
     status,
 )
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models.extra_models import TokenModel  # noqa: F401
 from app.models.error import Error
 from app.models.group import Group
 from app.models.id import ID
 
+from app.db import get_session
 from app.controller.groups_controller import GroupsController
 
 router = APIRouter()
@@ -37,10 +39,11 @@ controller = GroupsController()
     response_model_by_alias=True,
 )
 async def create_group(
-    group: Group = Body(None, description="")
+    group: Group = Body(None, description=""),
+    session: AsyncSession = Depends(get_session),
 ) -> ID:
     """Create a new (stratification) group. All groups with the same category are mutually exclusive."""
-    return await controller.create(group)
+    return await controller.create(session, group)
 
 
 @router.delete(
@@ -53,10 +56,11 @@ async def create_group(
     response_model_by_alias=True,
 )
 async def delete_group(
-    groupId: StrictStr = Path(..., description="")
+    groupId: StrictStr = Path(..., description=""),
+    session: AsyncSession = Depends(get_session),
 ) -> None:
     """Delete the specified group."""
-    return await controller.delete(groupId)
+    return await controller.delete(session, groupId)
 
 
 @router.get(
@@ -67,9 +71,11 @@ async def delete_group(
     tags=["Groups"],
     response_model_by_alias=True,
 )
-async def list_groups() -> List[Group]:
+async def list_groups(
+    session: AsyncSession = Depends(get_session),
+) -> List[Group]:
     """List all (stratification) groups."""
-    return await controller.getAll()
+    return await controller.getAll(session)
 
 
 @router.get(
@@ -80,6 +86,8 @@ async def list_groups() -> List[Group]:
     tags=["Groups"],
     response_model_by_alias=True,
 )
-async def list_categories() -> List[str]:
+async def list_categories(
+    session: AsyncSession = Depends(get_session),
+) -> List[str]:
     """List all existing categories."""
-    return await controller.getCategories()
+    return await controller.getCategories(session)
@@ -16,12 +16,14 @@ from fastapi import (  # noqa: F401
     Security,
     status,
 )
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models.extra_models import TokenModel  # noqa: F401
 from app.models.error import Error
 from app.models.id import ID
 from app.models.intervention_template import InterventionTemplate
 
+from app.db import get_session
 from app.controller.interventions_controller import InterventionsController
 
 router = APIRouter()
@@ -36,10 +38,11 @@ controller = InterventionsController()
     response_model_by_alias=True,
 )
 async def create_intervention_template(
-    intervention_template: InterventionTemplate = Body(None, description="")
+    intervention_template: InterventionTemplate = Body(None, description=""),
+    session: AsyncSession = Depends(get_session),
 ) -> ID:
     """Creates a new intervention template to be used in implementations."""
-    return await controller.create_intervention_template(intervention_template)
+    return await controller.create_intervention_template(session, intervention_template)
 
 
 @router.delete(
@@ -52,10 +55,11 @@ async def create_intervention_template(
     response_model_by_alias=True,
 )
 async def delete_intervention_template(
-    interventionTemplateId: StrictStr = Path(..., description="")
+    interventionTemplateId: StrictStr = Path(..., description=""),
+    session: AsyncSession = Depends(get_session),
 ) -> None:
     """Delete an intervention template."""
-    return await controller.delete_intervention_template(interventionTemplateId)
+    return await controller.delete_intervention_template(session, interventionTemplateId)
 
 
 @router.get(
@@ -66,6 +70,8 @@ async def delete_intervention_template(
     tags=["Interventions"],
     response_model_by_alias=True,
 )
-async def list_intervention_templates() -> List[InterventionTemplate]:
+async def list_intervention_templates(
+    session: AsyncSession = Depends(get_session),
+) -> List[InterventionTemplate]:
     """List available Intervention templates that can be implemented."""
-    return await controller.list_intervention_templates()
+    return await controller.list_intervention_templates(session)
@@ -17,6 +17,7 @@ from fastapi import (  # noqa: F401
     Security,
     status,
 )
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models.extra_models import TokenModel  # noqa: F401
 from app.models.error import Error
@@ -24,6 +25,7 @@ from app.models.id import ID
 from app.models.model import Model
 from app.models.reduced_info import ReducedInfo
 
+from app.db import get_session
 from app.controller.models_controller import ModelController
 
 router = APIRouter()
@@ -38,10 +40,11 @@ controller = ModelController()
     response_model_by_alias=True,
 )
 async def create_model(
-    model: Model = Body(None, description="")
+    model: Model = Body(None, description=""),
+    session: AsyncSession = Depends(get_session),
 ) -> ID:
     """Create a new simulation model."""
-    return await controller.create_model(model)
+    return await controller.create_model(session, model)
 
 
 @router.delete(
@@ -54,10 +57,11 @@ async def create_model(
     response_model_by_alias=True,
 )
 async def delete_model(
-    modelId: StrictStr = Path(..., description="")
+    modelId: StrictStr = Path(..., description=""),
+    session: AsyncSession = Depends(get_session),
 ) -> None:
     """Delete a model if it is not referenced in any scenarios."""
-    return await controller.delete_model(modelId)
+    return await controller.delete_model(session, modelId)
 
 
 @router.get(
@@ -69,10 +73,11 @@ async def delete_model(
     response_model_by_alias=True,
 )
 async def get_model(
-    modelId: StrictStr = Path(..., description="")
+    modelId: StrictStr = Path(..., description=""),
+    session: AsyncSession = Depends(get_session),
 ) -> Model:
     """Get specific model information."""
-    return await controller.get_model(modelId)
+    return await controller.get_model(session, modelId)
 
 
 @router.get(
@@ -83,6 +88,8 @@ async def get_model(
     tags=["Models"],
     response_model_by_alias=True,
 )
-async def list_models() -> List[ReducedInfo]:
+async def list_models(
+    session: AsyncSession = Depends(get_session),
+) -> List[ReducedInfo]:
     """List all available simulation models."""
-    return await controller.list_models()
+    return await controller.list_models(session)
@@ -17,6 +17,7 @@ from fastapi import (  # noqa: F401
     Security,
     status,
 )
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models.extra_models import TokenModel  # noqa: F401
 from app.models.error import Error
@@ -25,6 +26,7 @@ from app.models.node import Node
 from app.models.node_list import NodeList, NodeListWithNodes
 from app.models.reduced_info import ReducedInfo
 
+from app.db import get_session
 from app.controller.nodes_controller import NodeController
 
 router = APIRouter()
@@ -40,10 +42,11 @@ controller = NodeController()
     response_model_by_alias=True,
 )
 async def create_node(
-    node: Node = Body(None, description="")
+    node: Node = Body(None, description=""),
+    session: AsyncSession = Depends(get_session),
 ) -> ID:
     """Create a new node."""
-    return await controller.create_node(node)
+    return await controller.create_node(session, node)
 
 
 @router.post(
@@ -55,10 +58,11 @@ async def create_node(
     response_model_by_alias=True,
 )
 async def create_node_list(
-    node_list: NodeList = Body(None, description="")
+    node_list: NodeList = Body(None, description=""),
+    session: AsyncSession = Depends(get_session),
 ) -> ID:
     """Create a new node list."""
-    return await controller.create_node_list(node_list)
+    return await controller.create_node_list(session, node_list)
 
 
 @router.delete(
@@ -71,10 +75,11 @@ async def create_node_list(
     response_model_by_alias=True,
 )
 async def delete_node(
-    nodeId: StrictStr = Path(..., description="")
+    nodeId: StrictStr = Path(..., description=""),
+    session: AsyncSession = Depends(get_session),
 ) -> None:
     """Delete a node."""
-    return await controller.delete_node(nodeId)
+    return await controller.delete_node(session, nodeId)
 
 
 @router.delete(
@@ -87,10 +92,11 @@ async def delete_node(
     response_model_by_alias=True,
 )
 async def delete_node_list(
-    nodeListId: StrictStr = Path(..., description="")
+    nodeListId: StrictStr = Path(..., description=""),
+    session: AsyncSession = Depends(get_session),
 ) -> None:
     """Delete the specified node list."""
-    return await controller.delete_node_list(nodeListId)
+    return await controller.delete_node_list(session, nodeListId)
 
 
 @router.get(
@@ -102,10 +108,11 @@ async def delete_node_list(
     response_model_by_alias=True,
 )
 async def get_node_list(
-    nodeListId: StrictStr = Path(..., description="")
+    nodeListId: StrictStr = Path(..., description=""),
+    session: AsyncSession = Depends(get_session),
 ) -> NodeListWithNodes:
     """Get specified node list."""
-    return await controller.get_node_list(nodeListId)
+    return await controller.get_node_list(session, nodeListId)
 
 
 @router.get(
@@ -116,9 +123,11 @@ async def get_node_list(
     tags=["Nodes"],
     response_model_by_alias=True,
 )
-async def list_node_lists() -> List[ReducedInfo]:
+async def list_node_lists(
+    session: AsyncSession = Depends(get_session),
+) -> List[ReducedInfo]:
     """List defined node lists."""
-    return await controller.list_node_lists()
+    return await controller.list_node_lists(session)
 
 
 @router.get(
@@ -129,6 +138,8 @@ async def list_node_lists() -> List[ReducedInfo]:
     tags=["Nodes"],
     response_model_by_alias=True,
 )
-async def list_nodes() -> List[Node]:
+async def list_nodes(
+    session: AsyncSession = Depends(get_session),
+) -> List[Node]:
     """List all available nodes."""
-    return await controller.list_nodes()
+    return await controller.list_nodes(session)
@@ -17,12 +17,14 @@ from fastapi import (  # noqa: F401
     Security,
     status,
 )
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models.extra_models import TokenModel  # noqa: F401
 from app.models.error import Error
 from app.models.id import ID
 from app.models.parameter_definition import ParameterDefinition
 
+from app.db import get_session
 from app.controller.parameterdefinitions_controller import ParameterController
 
 router = APIRouter()
@@ -38,10 +40,11 @@ controller = ParameterController()
     response_model_by_alias=True,
 )
 async def create_parameter_definition(
-    parameter_definition: ParameterDefinition = Body(None, description="")
+    parameter_definition: ParameterDefinition = Body(None, description=""),
+    session: AsyncSession = Depends(get_session),
 ) -> ID:
     """Create a new parameter definition."""
-    return await controller.create_parameter_definition(parameter_definition)
+    return await controller.create_parameter_definition(session, parameter_definition)
 
 
 @router.delete(
@@ -54,10 +57,11 @@ async def create_parameter_definition(
     response_model_by_alias=True,
 )
 async def delete_parameter_definition(
-    parameterId: StrictStr = Path(..., description="")
+    parameterId: StrictStr = Path(..., description=""),
+    session: AsyncSession = Depends(get_session),
 ) -> None:
     """Delete a parameter definition."""
-    return await controller.delete_parameter_definition(parameterId)
+    return await controller.delete_parameter_definition(session, parameterId)
 
 
 @router.get(
@@ -68,9 +72,11 @@ async def delete_parameter_definition(
     tags=["ParameterDefinitions"],
     response_model_by_alias=True,
 )
-async def list_parameter_definitions() -> List[ParameterDefinition]:
+async def list_parameter_definitions(
+    session: AsyncSession = Depends(get_session),
+) -> List[ParameterDefinition]:
     """List all existing Parameter definitions."""
-    return await controller.list_parameter_definitions()
+    return await controller.list_parameter_definitions(session)
 
 @router.get(
     "/parameterdefinitions/{parameterId}",
@@ -81,7 +87,8 @@ async def list_parameter_definitions() -> List[ParameterDefinition]:
     response_model_by_alias=True,
 )
 async def get_parameter_definition(
-    parameterId: StrictStr = Path(..., description="")
+    parameterId: StrictStr = Path(..., description=""),
+    session: AsyncSession = Depends(get_session),
 ) -> ParameterDefinition:
     """Get specific Parameter definitions."""
-    return await controller.get_parameter_definition(parameterId)
+    return await controller.get_parameter_definition(session, parameterId)
@@ -9,20 +9,33 @@ from typing_extensions import Annotated
 from fastapi import (  # noqa: F401
     APIRouter,
     Body,
+    Depends,
     File,
     Path,
     Query,
     Request,
     UploadFile,
 )
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models.error import Error
 from app.models.id import ID
 from app.models.infectiondata import Infectiondata
 from app.models.reduced_scenario import ReducedScenario
 from app.models.scenario import Scenario
+from app.models.scenario_import_job import ScenarioImportJob
 
+from app.db import get_session
 from app.controller.scenario_controller import ScenarioController
+from app.utils.constants import SpatialAggregation
+from app.utils.data_formats import (
+    ARROW_STREAM_MEDIA_TYPE,
+    CSV_MEDIA_TYPE,
+    INFECTIONDATA_MEDIA_TYPES,
+    NDJSON_MEDIA_TYPE,
+    PARQUET_MEDIA_TYPE,
+    negotiate_media_type,
+)
 
 
 router = APIRouter()
@@ -42,7 +55,8 @@ logging.basicConfig(level=logging.INFO)
 )
 async def create_scenario(
     request: Request,
-    scenario: Scenario = Body(None, description="")
+    scenario: Scenario = Body(None, description=""),
+    session: AsyncSession = Depends(get_session),
 ) -> ID:
     """Create a new scenario to be simulated."""
 
@@ -51,7 +65,7 @@ async def create_scenario(
     scenario.creator_org_id = request.state.realm if request.state.realm else None
     
     return await controller.create_scenario(
-        scenario
+        session, scenario
     )
 
 
@@ -65,33 +79,46 @@ async def create_scenario(
     response_model_by_alias=True,
 )
 async def delete_scenario(
-    scenarioId: StrictStr = Path(..., description="")
+    scenarioId: StrictStr = Path(..., description=""),
+    session: AsyncSession = Depends(get_session),
 ) -> None:
     """Delete the Scenario and its data"""
-    return await controller.delete_scenario(scenarioId)
+    return await controller.delete_scenario(session, scenarioId)
 
 
 @router.get(
     "/scenarios/{scenarioId}/infectiondata",
     responses={
-        200: {"model": List[Infectiondata], "description": "Returned data matching filters. Unnecessary fields are omitted."},
+        200: {
+            "model": List[Infectiondata],
+            "description": "Returned data matching filters. Unnecessary fields are omitted. "
+            "Streamed as newline delimited JSON, CSV, Arrow IPC stream or Parquet if requested via the Accept header.",
+            "content": {NDJSON_MEDIA_TYPE: {}, CSV_MEDIA_TYPE: {}, ARROW_STREAM_MEDIA_TYPE: {}, PARQUET_MEDIA_TYPE: {}},
+        },
+        304: {"description": "Data unchanged since the response with the ETag given in If-None-Match."},
     },
     tags=["Scenarios"],
     response_model_by_alias=True,
 )
 async def get_infection_data(
+    request: Request,
     scenarioId: StrictStr = Path(..., description=""),
-    nodes: Annotated[Optional[StrictStr], Field(description="Comma separated list of NodeIds")] = Query(None, description="Comma separated list of NodeIds or NUTS", alias="nodes"),
+    nodes: Annotated[Optional[StrictStr], Field(description="Comma separated list of NodeIds")] = Query(None, description="Comma separated list of NodeIds or NUTS, 'total' for the sum over all nodes", alias="nodes"),
     start_date: Annotated[Optional[date], Field(description="Start date of requested data")] = Query(None, description="Start date of requested data", alias="startDate"),
     end_date: Annotated[Optional[date], Field(description="End date of requested data")] = Query(None, description="End date of requested data", alias="endDate"),
     compartments: Annotated[Optional[StrictStr], Field(description="Comma separated list of Compartment IDs")] = Query(None, description="Comma separated list of Compartment IDs", alias="compartments"),
-    #aggregations: Annotated[Optional[Dict[str, Dict[str, List[StrictStr]]]], Field(description="Object with named (key) lists of compartment tags (value, AND connected)")] = Query(None, description="Object with named (key) lists of compartment tags (value, AND connected)", alias="aggregations"),
-    # TODO deepObject not supported by fastapi yet, wait for https://github.com/fastapi/fastapi/pull/9867 or do custom string based solution ¯\_(ツ)_/¯
-    groups: Annotated[Optional[StrictStr], Field(description="Comma separated list of groups requesting data for")] = Query(None, description="List of groups requesting data for", alias="groups"),
+    aggregations: Annotated[Optional[StrictStr], Field(description="JSON object with named (key) lists of compartment tags (value, AND connected)")] = Query(None, description="JSON object with named (key) lists of compartment tags (value, AND connected), e.g. {\"infected\": [\"infected\"]}. Returns the summed compartments per name instead of single compartments.", alias="aggregations"),
+    groups: Annotated[Optional[StrictStr], Field(description="Comma separated list of groups requesting data for")] = Query(None, description="List of groups requesting data for, 'total' for the sum over all groups", alias="groups"),
     percentiles: Annotated[Optional[StrictStr], Field(description="Comma separated list of requested percentiles of the data")] = Query(None, description="Requested percentiles of the data", alias="percentiles"),
+    spatial_aggregation: Annotated[Optional[SpatialAggregation], Field(description="Region level to roll the county nodes up to")] = Query(None, description="Region level to roll the county nodes up to (federal states or intermediate regions). The node field and the nodes filter then hold region keys.", alias="spatialAggregation"),
+    session: AsyncSession = Depends(get_session),
 ) -> List[Infectiondata]:
     """Get scenario&#39;s infection data based on specified filters."""
-    return await controller.get_infection_data(scenarioId, nodes, start_date, end_date, compartments, groups, percentiles)
+    media_type = negotiate_media_type(request.headers.get('accept'), INFECTIONDATA_MEDIA_TYPES)
+    return await controller.get_infection_data(
+        session, scenarioId, nodes, start_date, end_date, compartments, aggregations, groups, percentiles, spatial_aggregation,
+        media_type, request.headers.get('if-none-match')
+    )
 
 
 @router.get(
@@ -103,29 +130,47 @@ async def get_infection_data(
     response_model_by_alias=True,
 )
 async def get_scenario(
-    scenarioId: StrictStr = Path(..., description="")
+    scenarioId: StrictStr = Path(..., description=""),
+    session: AsyncSession = Depends(get_session),
 ) -> Scenario:
     """Get information about the specified scenario."""
     log.info(f'GET /scenarios/{scenarioId} received...')
     log.warning(f'GET /scenarios/{scenarioId} received... [WARN]')
-    return await controller.get_scenario(scenarioId)
+    return await controller.get_scenario(session, scenarioId)
 
 
 @router.put(
     "/scenarios/{scenarioId}",
+    status_code=202,
     responses={
-        201: {"model": ID, "description": "Added data to scenario."},
+        202: {"model": ScenarioImportJob, "description": "Accepted data for scenario, import job enqueued."},
     },
     tags=["Scenarios"],
     response_model_by_alias=True,
 )
 async def import_scenario_data(
     scenarioId: StrictStr = Path(..., description="UUID of the scenario"),
-    file: UploadFile = File(None, description="zipped HDF5 files of the simulation results")
-) -> ID:
+    file: UploadFile = File(None, description="zipped HDF5 files of the simulation results"),
+    session: AsyncSession = Depends(get_session),
+) -> ScenarioImportJob:
     """Supply simulation data for a scenario."""
     log.info(f'PUT /scenarios/{scenarioId} received...')
-    return await controller.import_scenario_data(scenarioId, file)
+    return await controller.import_scenario_data(session, scenarioId, file)
+
+@router.get(
+    "/scenarios/{scenarioId}/imports/{jobId}",
+    responses={
+        200: {"model": ScenarioImportJob, "description": "Returned state of the import job."},
+    },
+    tags=["Scenarios"],
+    response_model_by_alias=True,
+)
+async def get_import_status(
+    scenarioId: StrictStr = Path(..., description="UUID of the scenario"),
+    jobId: StrictStr = Path(..., description="ID of the import job")
+) -> ScenarioImportJob:
+    """Get the state of a scenario data import."""
+    return await controller.get_import_status(scenarioId, jobId)
 
 @router.put(
     "/scenarios/{scenarioId}/description",
@@ -137,11 +182,12 @@ async def import_scenario_data(
 )
 async def update_scenario_description(
     scenarioId: StrictStr = Path(..., description="UUID of the scenario"),
-    description: StrictStr  = Body(..., description="New description for the scenario")
+    description: StrictStr  = Body(..., description="New description for the scenario"),
+    session: AsyncSession = Depends(get_session),
 ) -> ReducedScenario:
     """Update description of a scenario."""
     log.info(f'PUT /scenarios/{scenarioId} received...')
-    return await controller.update_scenario_description(scenarioId, description)
+    return await controller.update_scenario_description(session, scenarioId, description)
 
 @router.get(
     "/scenarios",
@@ -151,9 +197,11 @@ async def update_scenario_description(
     tags=["Scenarios"],
     response_model_by_alias=True,
 )
-async def list_scenarios() -> List[ReducedScenario]:
+async def list_scenarios(
+    session: AsyncSession = Depends(get_session),
+) -> List[ReducedScenario]:
     """List all available scenarios."""
-    return await controller.list_scenarios()
+    return await controller.list_scenarios(session)
 
 # a toy endpoint to test authorization
 @router.post(
@@ -9,6 +9,7 @@ from typing_extensions import Annotated
 from fastapi import (  # noqa: F401
     APIRouter,
     Body,
+    Depends,
     File,
     Path,
     Query,
@@ -17,6 +18,10 @@ from fastapi import (  # noqa: F401
 )
 
 from app.controller.utils_controller import UtilsController
+from app.db import get_pool_status
+from app.models.pool_status import PoolStatus
+from app.models.user_detail import UserDetail
+from security_api import admin_filter
 
 
 router = APIRouter()
@@ -36,4 +41,24 @@ async def validate_and_forward_shared_case_data(
 ) -> None:
     """Share Case Data with ESID."""
     log.info(f'POST /utils/caseshare received...')
-    return await controller.handle_case_data_validation_upload(file, request.state)
\ No newline at end of file
+    return await controller.handle_case_data_validation_upload(file, request.state)
+
+
+@router.get(
+    "/utils/dbpool",
+    responses={
+        200: {"model": PoolStatus, "description": "Returned state of the database connection pool."},
+        401: {"description": "Missing or invalid token or X-Realm header."},
+        403: {"description": "User does not have the admin role."},
+    },
+    tags=["Utils"],
+    response_model_by_alias=True,
+)
+async def get_database_pool_status(
+    user: UserDetail = Depends(admin_filter),
+) -> PoolStatus:
+    """
+    Utilization of the database connection pool and time spent waiting for connections, for sizing the pool.
+    Requires the admin role, the middleware only authenticates modifying requests.
+    """
+    return get_pool_status()
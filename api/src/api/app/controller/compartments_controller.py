@@ -4,6 +4,7 @@ from typing import ClassVar, Dict, List, Tuple  # noqa: F401
 from pydantic import StrictStr
 from typing import Any, List, Optional
 from fastapi import HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models.error import Error
 from app.models.compartment import Compartment
@@ -16,24 +17,27 @@ class CompartmentController:
     
     async def create_compartment(
         self,
+        session: AsyncSession,
         compartment: Optional[Compartment],
     ) -> ID:
         """Create a new compartment."""
         if not compartment:
             raise HTTPException(status_code=500, detail="No compartment provided")
-        return compartment_create(compartment)
+        return await compartment_create(session, compartment)
 
 
     async def delete_compartment(
         self,
+        session: AsyncSession,
         compartmentId: StrictStr,
     ) -> None:
         """Delete specific compartment."""
-        return compartment_delete(compartmentId)
+        return await compartment_delete(session, compartmentId)
 
 
     async def list_compartments(
         self,
+        session: AsyncSession,
     ) -> List[Compartment]:
         """List all existing compartments."""
-        return compartment_get_all()
+        return await compartment_get_all(session)
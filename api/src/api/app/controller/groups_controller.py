@@ -4,6 +4,7 @@ from typing import ClassVar, Dict, List, Tuple  # noqa: F401
 from pydantic import StrictStr
 from typing import Any, List, Optional
 from fastapi import HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models.error import Error
 from app.models.group import Group
@@ -15,29 +16,33 @@ from app.db.tasks import group_create, group_delete_by_id, group_get_all, group_
 class GroupsController:
     async def create(
             self,
+            session: AsyncSession,
             group: Optional[Group]
     ) -> ID:
         """Create a new (stratification) group. All groups with the same category are mutually exclusive."""
         if not group:
             raise HTTPException(status_code=500, detail="No group provided")
-        return group_create(group)
+        return await group_create(session, group)
     
     async def delete(
             self,
+            session: AsyncSession,
             groupId: StrictStr
     ) -> None:
         """Delete the specified group."""
-        return group_delete_by_id(groupId)
+        return await group_delete_by_id(session, groupId)
 
 
     async def getAll(
-            self
+            self,
+            session: AsyncSession
         ) -> List[Group]:
         """List all (stratification) groups."""
-        return group_get_all()
+        return await group_get_all(session)
 
     async def getCategories(
-            self
+            self,
+            session: AsyncSession
     ) -> List[str]:
         """List all existing categories."""
-        return group_get_all_categories()
\ No newline at end of file
+        return await group_get_all_categories(session)
\ No newline at end of file
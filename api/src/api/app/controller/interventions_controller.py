@@ -4,6 +4,7 @@ from typing import ClassVar, Dict, List, Tuple  # noqa: F401
 from pydantic import StrictStr
 from typing import Any, List, Optional
 from fastapi import HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models.error import Error
 from app.models.id import ID
@@ -11,27 +12,31 @@ from app.models.intervention_template import InterventionTemplate
 
 from app.db.tasks import intervention_template_create, intervention_template_delete, intervention_template_get_all
 
+
 class InterventionsController:
     async def create_intervention_template(
         self,
+        session: AsyncSession,
         intervention_template: Optional[InterventionTemplate],
     ) -> ID:
         """Creates a new intervention template to be used in implementations."""
         if not intervention_template:
             raise HTTPException(status_code=500, detail="No intervention template provided")
-        return intervention_template_create(intervention_template)
+        return await intervention_template_create(session, intervention_template)
 
 
     async def delete_intervention_template(
         self,
+        session: AsyncSession,
         interventionTemplateId: StrictStr,
     ) -> None:
         """Delete an intervention template."""
-        return intervention_template_delete(interventionTemplateId)
+        return await intervention_template_delete(session, interventionTemplateId)
 
 
     async def list_intervention_templates(
         self,
+        session: AsyncSession,
     ) -> List[InterventionTemplate]:
         """List available Intervention templates that can be implemented."""
-        return intervention_template_get_all()
+        return await intervention_template_get_all(session)
@@ -4,6 +4,7 @@ from typing import ClassVar, Dict, List, Tuple  # noqa: F401
 from pydantic import StrictStr
 from typing import Any, List, Optional
 from fastapi import HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models.error import Error
 from app.models.id import ID
@@ -17,32 +18,36 @@ class ModelController:
 
     async def create_model(
         self,
+        session: AsyncSession,
         model: Optional[Model],
     ) -> ID:
         """Create a new simulation model."""
         if not model:
             raise HTTPException(status_code=500, detail="No model provided")
-        return model_create(model)
+        return await model_create(session, model)
 
 
     async def delete_model(
         self,
+        session: AsyncSession,
         modelId: StrictStr,
     ) -> None:
         """Delete a model if it is not referenced in any scenarios."""
-        return model_delete(modelId)
+        return await model_delete(session, modelId)
 
 
     async def get_model(
         self,
+        session: AsyncSession,
         modelId: StrictStr,
     ) -> Model:
         """Get specific model information."""
-        return model_get_by_id(modelId)
+        return await model_get_by_id(session, modelId)
 
 
     async def list_models(
         self,
+        session: AsyncSession,
     ) -> List[ReducedInfo]:
         """List all available simulation models."""
-        return model_get_all()
+        return await model_get_all(session)
@@ -2,6 +2,7 @@
 
 from typing import ClassVar, Dict, List, Tuple  # noqa: F401
 from fastapi import HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from pydantic import StrictStr
 from typing import Any, List, Optional
@@ -18,57 +19,64 @@ class NodeController:
 
     async def create_node(
         self,
+        session: AsyncSession,
         node: Optional[Node],
     ) -> ID:
         """Create a new node."""
         if not node:
             raise HTTPException(status_code=500, detail="No node provided")
-        return node_create(node)
+        return await node_create(session, node)
 
 
     async def create_node_list(
         self,
+        session: AsyncSession,
         node_list: Optional[NodeList],
     ) -> ID:
         """Create a new node list."""
         if not node_list:
             raise HTTPException(status_code=500, detail="No node list provided")
-        return nodelist_create(node_list)
+        return await nodelist_create(session, node_list)
 
 
     async def delete_node(
         self,
+        session: AsyncSession,
         nodeId: StrictStr,
     ) -> None:
         """Delete a node."""
-        return node_delete(nodeId)
+        return await node_delete(session, nodeId)
 
 
     async def delete_node_list(
         self,
+        session: AsyncSession,
         nodeListId: StrictStr,
     ) -> None:
         """Delete the specified node list."""
-        return nodelist_delete(nodeListId)
+        return await nodelist_delete(session, nodeListId)
 
 
     async def get_node_list(
         self,
+        session: AsyncSession,
         nodeListId: StrictStr,
     ) -> NodeListWithNodes:
         """Get specified node list."""
-        return nodelist_get_by_id(nodeListId)
+        return await nodelist_get_by_id(session, nodeListId)
 
 
     async def list_node_lists(
         self,
+        session: AsyncSession,
     ) -> List[ReducedInfo]:
         """List defined node lists."""
-        return nodelist_get_all()
+        return await nodelist_get_all(session)
 
 
     async def list_nodes(
         self,
+        session: AsyncSession,
     ) -> List[Node]:
         """List all available nodes."""
-        return node_get_all()
+        return await node_get_all(session)
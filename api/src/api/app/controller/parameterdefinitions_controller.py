@@ -4,6 +4,7 @@ from typing import ClassVar, Dict, List, Tuple  # noqa: F401
 from pydantic import StrictStr
 from typing import Any, List, Optional
 from fastapi import HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models.error import Error
 from app.models.id import ID
@@ -11,35 +12,40 @@ from app.models.parameter_definition import ParameterDefinition
 
 from app.db.tasks import parameter_definition_create, parameter_definition_get_all, parameter_definition_get_by_id, parameter_definition_delete
 
+
 class ParameterController:
     
     async def create_parameter_definition(
         self,
+        session: AsyncSession,
         parameter_definition: Optional[ParameterDefinition],
     ) -> ID:
         """Create a new parameter definition."""
         if not parameter_definition:
             raise HTTPException(status_code=500, detail="No parameter definition provided")
-        return parameter_definition_create(parameter_definition)
+        return await parameter_definition_create(session, parameter_definition)
 
 
     async def delete_parameter_definition(
         self,
+        session: AsyncSession,
         parameterId: StrictStr,
     ) -> None:
         """Delete a parameter definition."""
-        return parameter_definition_delete(parameterId)
+        return await parameter_definition_delete(session, parameterId)
 
 
     async def list_parameter_definitions(
         self,
+        session: AsyncSession,
     ) -> List[ParameterDefinition]:
         """List all existing Parameter definitions."""
-        return parameter_definition_get_all()
+        return await parameter_definition_get_all(session)
 
     async def get_parameter_definition(
         self,
+        session: AsyncSession,
         parameterId: StrictStr,
     ) -> ParameterDefinition:
         """Get specific Parameter definitions."""
-        return parameter_definition_get_by_id(parameterId)
\ No newline at end of file
+        return await parameter_definition_get_by_id(session, parameterId)
\ No newline at end of file
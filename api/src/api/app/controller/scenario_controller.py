@@ -1,22 +1,23 @@
 # coding: utf-8
 
 from typing import ClassVar, Dict, List, Tuple  # noqa: F401
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
+import hashlib
+import json
 import uuid
-import zipfile
 import aiofiles
-import asyncio
-import h5py
-import numpy
-from json import dumps
-from pathlib import Path
-from pydantic import Field, StrictBytes, StrictFloat, StrictInt, StrictStr
+from celery.result import AsyncResult
+from pydantic import Field, StrictBytes, StrictFloat, StrictInt, StrictStr, TypeAdapter, ValidationError
 from typing import Any, Dict, List, Optional, Tuple, Union, Set
 from typing_extensions import Annotated
 from fastapi import HTTPException, UploadFile
+from fastapi.responses import Response, StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
 import os
-import re
+import shutil
 
+from worker import celery_app
 from app.utils.utility import _get_input_directory, _create_empty_directory
 
 from app.models.error import Error
@@ -24,272 +25,282 @@ from app.models.id import ID
 from app.models.infectiondata import Infectiondata
 from app.models.reduced_scenario import ReducedScenario
 from app.models.scenario import Scenario
-from app.models.model import Model
-from app.models.group import Group
-from app.models.compartment import Compartment
-from app.models.node_list import NodeList
-from app.models.node import Node
+from app.models.scenario_import_job import ScenarioImportJob
+from app.utils.constants import SpatialAggregation
+from app.utils.data_formats import STREAM_ENCODERS
+from app.utils.result_cache import get_result_cache
 
+from app.db import create_session
 from app.db.tasks import (
     scenario_create,
     scenario_get_by_id,
     scenario_get_all,
     scenario_get_data_by_filter,
+    scenario_get_timestamp_simulated,
+    scenario_stream_data_by_filter,
     scenario_delete,
-    model_get_by_id,
-    group_get_all,
-    compartment_get_all,
-    node_get_by_list,
-    datapoint_update_all_by_scenario,
     scenario_update_description
 )
+from app.jobs.scenario_import import (
+    ScenarioImportError,
+    UPLOAD_CHUNK_SIZE,
+    enqueue_scenario_import,
+    extract_percentiles,
+)
 
-class LookupObject:
-    scenario: Scenario = None
-    model: Model = None
-    groups: List[Group] = []
-    compartments: List[Compartment] = []
-    nodes: List[Node]
+# Named lists of compartment tags (AND connected) of the infection data aggregations
+_AGGREGATIONS_ADAPTER = TypeAdapter(Dict[StrictStr, List[StrictStr]])
+# Serializer of infection data JSON responses (same output as the endpoint's response model)
+_INFECTIONDATA_ADAPTER = TypeAdapter(List[Infectiondata])
 
-CompartmentNames = {
-    0: "MildInfections",
-    1: "Hospitalized",
-    2: "ICU",
-    3: "Dead"
-}
 
 class ScenarioController:
     
     async def create_scenario(
         self,
+        session: AsyncSession,
         scenario: Optional[Scenario]
     ) -> ID:
         """Create a new scenario to be simulated."""
         if not scenario:
             raise HTTPException(status_code=500, detail="No scenario provided")
-        return scenario_create(scenario)
+        return await scenario_create(session, scenario)
 
 
     async def delete_scenario(
         self,
+        session: AsyncSession,
         scenarioId: StrictStr,
     ) -> None:
         """Delete the Scenario and its data"""
-        return scenario_delete(scenarioId)
+        return await scenario_delete(session, scenarioId)
 
     async def get_scenario(
         self,
+        session: AsyncSession,
         scenarioId: StrictStr,
     ) -> Scenario:
         """Get information about the specified scenario."""
-        return scenario_get_by_id(scenarioId)
+        return await scenario_get_by_id(session, scenarioId)
 
     async def list_scenarios(
         self,
+        session: AsyncSession,
     ) -> List[ReducedScenario]:
         """List all available scenarios."""
-        return scenario_get_all()
+        return await scenario_get_all(session)
 
     async def get_infection_data(
         self,
+        session: AsyncSession,
+        scenarioId: StrictStr,
+        nodes: Optional[StrictStr],
+        start_date: Optional[date],
+        end_date: Optional[date],
+        compartments: Optional[StrictStr],
+        aggregations: Optional[StrictStr],
+        groups: Optional[StrictStr],
+        percentiles: Optional[StrictStr],
+        spatial_aggregation: Optional[SpatialAggregation],
+        media_type: StrictStr,
+        if_none_match: Optional[StrictStr],
+    ) -> Response:
+        """
+        Get scenario&#39;s infection data based on specified filters in the given media type
+        (JSON or see STREAM_ENCODERS).
+        Responses are cached and carry an ETag derived from the filters and the scenario's last import,
+        so requests with a matching If-None-Match are answered with 304 without querying the data.
+        """
+        filters = self._data_filters(
+            scenarioId, nodes, start_date, end_date, compartments, aggregations, groups, percentiles,
+            spatial_aggregation
+        )
+        timestamp_simulated = await scenario_get_timestamp_simulated(session, scenarioId)
+        key = self._data_cache_key(filters, timestamp_simulated, media_type)
+        headers = {'ETag': f'"{key}"', 'Cache-Control': 'private, no-cache', 'Vary': 'Accept'}
+        if if_none_match and self._etag_matches(if_none_match, key):
+            return Response(status_code=304, headers=headers)
+
+        cache = get_result_cache()
+        body = await cache.get_async(key)
+        if body is not None:
+            return Response(body, media_type=media_type, headers=headers)
+        # The key and the data are read in separate statements, so an import committed in between would leave
+        # its data cached under the key of the previous import. Results are only cached if the version is unchanged.
+        if media_type in STREAM_ENCODERS:
+            chunks = STREAM_ENCODERS[media_type](scenario_stream_data_by_filter(**filters))
+            # The stream outlives the request's session
+            async def still_valid() -> bool:
+                async with create_session() as check_session:
+                    return await self._data_unchanged(check_session, scenarioId, timestamp_simulated)
+            return StreamingResponse(cache.tee(key, chunks, still_valid), media_type=media_type, headers=headers)
+        data = await scenario_get_data_by_filter(session, **filters)
+        unchanged = await self._data_unchanged(session, scenarioId, timestamp_simulated)
+        # Return the connection to the pool before the serialization
+        await session.close()
+        # Serializing large results takes a while, keep it off the event loop
+        body = await run_in_threadpool(_INFECTIONDATA_ADAPTER.dump_json, data, by_alias=True)
+        if unchanged:
+            await cache.set_async(key, body)
+        return Response(body, media_type=media_type, headers=headers)
+
+    @staticmethod
+    async def _data_unchanged(
+        session: AsyncSession,
+        scenarioId: StrictStr,
+        timestamp_simulated: Optional[datetime],
+    ) -> bool:
+        """Whether the scenario's data is still the version of the given last import (False if it was deleted)."""
+        try:
+            return await scenario_get_timestamp_simulated(session, scenarioId) == timestamp_simulated
+        except HTTPException:
+            return False
+
+    @staticmethod
+    def _data_cache_key(filters: Dict[str, Any], timestamp_simulated: Optional[datetime], media_type: StrictStr) -> str:
+        """Cache key (and ETag) of infection data: hash of the normalized filters, the data version and media type."""
+        def normalized(value: Any) -> Any:
+            if isinstance(value, list):
+                return sorted(set(value))
+            if isinstance(value, dict):
+                return {name: normalized(tags) for name, tags in value.items()}
+            if isinstance(value, date):
+                return value.isoformat()
+            return value
+        fingerprint = {name: normalized(value) for name, value in filters.items()}
+        fingerprint['timestampSimulated'] = timestamp_simulated.isoformat() if timestamp_simulated else None
+        fingerprint['mediaType'] = media_type
+        return hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode('utf-8')).hexdigest()[:32]
+
+    @staticmethod
+    def _etag_matches(if_none_match: str, key: str) -> bool:
+        """Whether an If-None-Match header matches the ETag of the given cache key (weak comparison)."""
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            if tag == '*' or tag.removeprefix('W/') == f'"{key}"':
+                return True
+        return False
+
+    @staticmethod
+    def _data_filters(
         scenarioId: StrictStr,
         nodes: Optional[StrictStr],
         start_date: Optional[date],
         end_date: Optional[date],
         compartments: Optional[StrictStr],
-        # aggregations: Optional[Dict[str, Dict[str, List[StrictStr]]]],
+        aggregations: Optional[StrictStr],
         groups: Optional[StrictStr],
         percentiles: Optional[StrictStr],
-    ) -> List[Infectiondata]:
-        """Get scenario&#39;s infection data based on specified filters."""
-        return scenario_get_data_by_filter(
+        spatial_aggregation: Optional[SpatialAggregation],
+    ) -> Dict[str, Any]:
+        """Split the comma separated (and JSON) query parameters into the filter arguments of the data tasks."""
+        parsed_aggregations = None
+        if aggregations:
+            try:
+                parsed_aggregations = _AGGREGATIONS_ADAPTER.validate_json(aggregations)
+            except ValidationError:
+                raise HTTPException(
+                    status_code=422,
+                    detail='aggregations must be a JSON object with named lists of compartment tags'
+                )
+        return dict(
             scenarioId=scenarioId,
             nodes=[StrictStr(node) for node in nodes.split(',')] if nodes else None,
             start_date=start_date,
             end_date=end_date,
             compartments=[StrictStr(comp) for comp in compartments.split(',')] if compartments else None,
-            # aggregations,
+            aggregations=parsed_aggregations,
             groups=[StrictStr(group) for group in groups.split(',')] if groups else None,
-            percentiles=[StrictInt(perc) for perc in percentiles.split(',')] if percentiles else None
+            percentiles=[StrictInt(perc) for perc in percentiles.split(',')] if percentiles else None,
+            spatial_aggregation=spatial_aggregation
         )
 
     async def import_scenario_data(
         self,
+        session: AsyncSession,
         scenarioId: StrictStr,
         file: UploadFile,
-    ) -> ID:
-        """Supply simulation data for a scenario."""
+    ) -> ScenarioImportJob:
+        """Supply simulation data for a scenario. The data is imported by a background job."""
         if not file or not file.filename.endswith('.zip'):
             raise HTTPException(
                 status_code=422,
                 detail="No file uploaded with request or not a .zip file"
             )
-        percentile_paths = await self._read_zip_file(file)
-        
-        # Get info for lookups
-        info = LookupObject()
-        info.scenario = scenario_get_by_id(scenarioId)
-        info.model = model_get_by_id(info.scenario.model_id)
-        info.groups = [group for group in group_get_all() if group.id in info.model.groups]
-        info.compartments = [comp for comp in compartment_get_all() if comp.id in info.model.compartments]
-        info.nodes = node_get_by_list(info.scenario.node_list_id)
-        # Handle h5 files for each percentile asynchronously
-        res = await asyncio.gather(*[self._read_percentiles(perc, percentile_paths[perc], info) for perc in percentile_paths.keys()], return_exceptions=True)
-        # Check if any percs had errors
-        errors = [ex for ex in res if isinstance(ex, Exception)]
-        if errors:
-            message = {}
-            for idx, error in enumerate(errors):
-                message[idx] = error.args
-            # also post error into log
-            print('Exception in PUT scenario/\{scenarioId\}:\n', dumps(message, indent=4))
-            raise HTTPException(
-                status_code=422,
-                detail=message
-            )
-        else:
-            # Flatten and send to DB
-            datapoint_update_all_by_scenario(scenarioId, numpy.concatenate(res).tolist())
-        return ID(id=scenarioId)
+        # Raises 404 if the scenario does not exist
+        await scenario_get_by_id(session, scenarioId)
+        # Return the connection to the pool before storing the upload
+        await session.close()
+
+        job_id = str(uuid.uuid4())
+        zip_path = await self._read_zip_file(file, job_id)
+        # Reject archives with an unexpected layout before enqueueing (only reads the zip directory)
+        try:
+            await run_in_threadpool(extract_percentiles, zip_path, None)
+        except ScenarioImportError as ex:
+            await run_in_threadpool(shutil.rmtree, os.path.dirname(zip_path), ignore_errors=True)
+            raise HTTPException(status_code=422, detail=ex.args[0])
 
+        await run_in_threadpool(enqueue_scenario_import, scenarioId, zip_path, job_id)
+        return ScenarioImportJob(jobId=job_id, scenarioId=scenarioId, state='PENDING')
+
+    async def get_import_status(
+        self,
+        scenarioId: StrictStr,
+        jobId: StrictStr,
+    ) -> ScenarioImportJob:
+        """Get the state of a scenario import job, 404 for unknown jobs and jobs of other scenarios."""
+        def read_status() -> ScenarioImportJob:
+            result = AsyncResult(jobId, app=celery_app)
+            # The result backend reports unknown IDs as PENDING, only enqueued jobs have their arguments stored
+            kwargs = result.kwargs
+            if not isinstance(kwargs, dict) or kwargs.get('scenarioId') != scenarioId:
+                raise HTTPException(status_code=404, detail='Import job not found')
+            state: str = result.state
+            job = ScenarioImportJob(jobId=jobId, scenarioId=scenarioId, state=state)
+            if state == 'PROGRESS' and isinstance(result.info, dict):
+                job.progress = result.info
+            elif state == 'FAILURE':
+                error = result.info
+                job.error = error.args[0] if isinstance(error, Exception) and error.args else str(error)
+            return job
+        # Result backend lookup is blocking
+        return await run_in_threadpool(read_status)
 
     async def _read_zip_file(
         self,
         file: UploadFile,
-    ) -> Dict[int, str]:
+        job_id: StrictStr,
+    ) -> str:
         """
-        A helper function to read the zip file asynchronously and save it in the input directory for further processing.
+        A helper function to stream the zip file into the input directory of the import job.
+        The upload is written in chunks, so memory usage does not depend on the size of the archive.
         Args:
             file (File): zip-file to be read
+            job_id (str): ID of the import job (name of its input directory)
+        Returns:
+            Path to the stored zip file
         """
+        input_dir: str = os.path.join(_get_input_directory(), job_id)
         try:
-            zip_fname: str = file.filename
-            fname: str = zip_fname.replace('.zip', '')
-            input_dir: str = os.path.join(_get_input_directory(), fname)
             _create_empty_directory(input_dir)
-            fpath: str = os.path.join(input_dir, zip_fname)
-            # Write uploaded file into input dir
+            fpath: str = os.path.join(input_dir, os.path.basename(file.filename))
+            # Write uploaded file into input dir chunk by chunk
             async with aiofiles.open(fpath, "wb") as out_file:
-                content = await file.read()
-                await out_file.write(content)
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    await out_file.write(chunk)
         except Exception:
+            await run_in_threadpool(shutil.rmtree, input_dir, ignore_errors=True)
             raise HTTPException(status_code=500, detail='There was an error uploading the file')
         finally:
             await file.close()
-        # Unzip file
-        out_folder: str = os.path.join(input_dir, "extracted")
-        with zipfile.ZipFile(fpath, 'r') as zip_ref:
-            zip_ref.extractall(out_folder)
-        
-        # Record uploaded percentiles and their paths
-        percentile_paths: Dict[int, str] = {}
-        expr = re.compile(r'^p([0-9]{1,2})$')
-
-        for percentile_dir in os.listdir(out_folder):
-            # validate percentile folders or raise exception
-            result = expr.match(percentile_dir)
-            if not result:
-                raise HTTPException(
-                    status_code=422,
-                    detail='The zip file internal folder structure of results does not match expected format'
-                )
-            percentile_paths[int(result.group(1))] = os.path.join(out_folder, percentile_dir)
-
-        return percentile_paths
-    
+        return fpath
 
-    async def _read_percentiles(
-            self,
-            percentile: int,
-            path: str,
-            infos: LookupObject
-    ) -> List[Infectiondata]:
-        """
-        A helper function to read the h5 files of a percentile asynchronously and send it to the DB.
-        Args:
-            percentile (int): value of the percentile
-            path (str): path in the input dir to the folder with the h5 files
-        """
-        # Get h5-files from folder
-        h5_files = list(Path(path).glob('*.h5'))
-        datapoints: List[Infectiondata] = []
-
-        for path in h5_files:
-            file = h5py.File(path, "r")
-
-            # validate nodes
-            infoNodes: Set[StrictStr] = set([inode.nuts for inode in infos.nodes])
-            fileNodes: Set[str] = set([str(fnode).zfill(5) for fnode in file.keys()])
-            if not fileNodes.issubset(infoNodes):
-                # some nodes not in db
-                raise Exception({
-                    'percentile': percentile,
-                    'unknownNodes': f'Following nodes in file not found in DB: {fileNodes.difference(infoNodes)}'
-                })
-            is_groups_validated = False
-            is_compartments_validated = False
-            is_dates_validated = False
-            
-            for node in file.keys():
-
-                # validate groups:
-                if not is_groups_validated:
-                    infoGroups: Set[StrictStr] = set([igroup.name for igroup in infos.groups])
-                    fileGroups: Set[str] = set([str(fgroup) for fgroup in file[node].keys()])
-                    fileGroups.remove('Time')
-                    if not fileGroups.issubset(infoGroups):
-                        # some groups not in DB
-                        raise Exception({
-                            'percentile': percentile,
-                            'unknownGroups': f'Following groups in file not found in DB: {fileGroups.difference(infoGroups)}'
-                        })
-                    is_groups_validated = True
-
-                for group in file[node].keys():
-                    # Skip Time group
-                    if(group == 'Time'):
-                        continue
-
-                    # validate days
-                    if not is_dates_validated:
-                        # Scenario duration according to DB
-                        days_simulated = (infos.scenario.end_date - infos.scenario.start_date).days + 1
-                        if len(file[node][group]) != days_simulated:
-                            raise Exception({
-                                'percentile': percentile,
-                                'dateMismatch': f'Scenario duration is {days_simulated} days but file contains {len(file[node][group])} datapoints'
-                            })
-                        is_dates_validated = True
-
-                    for dayoffset, compartments in enumerate(file[node][group]):
-
-                        # validate compartments
-                        if not is_compartments_validated:
-                            infoCompartments: Set[StrictStr] = set([icomp.name for icomp in infos.compartments])
-                            fileCompartments: Set[str] = set([CompartmentNames[fcomp] for fcomp, _ in enumerate(compartments)])
-                            if not fileCompartments.issubset(infoCompartments):
-                                raise Exception({
-                                    'percentile': percentile,
-                                    'unknownCompartments': f'following compartments in file not found in DB: {fileCompartments.difference(infoCompartments)}'
-                                })
-                            is_compartments_validated = True
-
-                        for compartment, value in enumerate(compartments):
-                            # Create Datapoint from infos
-                            datapoints.append(Infectiondata(
-                                date=infos.scenario.start_date + timedelta(days=dayoffset),
-                                node=next((n.id for n in infos.nodes if n.nuts == node.zfill(5)), None),
-                                group=next((g.id for g in infos.groups if g.name == group), None),
-                                compartment=next((c.id for c in infos.compartments if c.name == CompartmentNames[compartment]), None),
-                                percentile=percentile,
-                                value=value
-                            ))
-        return datapoints
-    
     async def update_scenario_description(
         self,
+        session: AsyncSession,
         scenarioId: StrictStr,
         description: StrictStr,
     ) -> ReducedScenario:
         """Update description of a scenario."""
-        return scenario_update_description(scenarioId, description)
\ No newline at end of file
+        return await scenario_update_description(session, scenarioId, description)
\ No newline at end of file
@@ -9,13 +9,16 @@ from pydantic import Field, StrictBytes, StrictFloat, StrictInt, StrictStr
 from typing import Any, Dict, List, Optional, Tuple, Union, Set
 from typing_extensions import Annotated
 from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
 from starlette.datastructures import State
 from app.models.user_detail import UserDetail
+from app.utils.case_data_validation import CaseDataValidationError, CaseDataValidator, ValidatingReader
+from app.utils.realm_directory import get_realm_directory
 from core import config
 from functools import lru_cache
 from minio import Minio
 import os
-import requests
+import time
 
 log = logging.getLogger('API.Utils')
 logging.basicConfig(level=logging.INFO)
@@ -43,20 +46,10 @@ class UtilsController:
                 status_code=400,
                 detail=f"File has the wrong content type. Accepts {valid_content_types} but got '{file.content_type}'"
             )
-        # Check first line
-        line = file.file.readline().decode(encoding='utf-8')
-        num_cols = len(line.split(';'))  # This assumes ';' is always used as separator
-        if num_cols != 76:  # This is also assumes the file always hass this magic number of columns
-            log.warning(f"File has the wrong amount of columns. Needs 76 but has '{num_cols}'")
-            raise HTTPException(
-                status_code=400,
-                detail=f"File has the wrong amount of columns. Needs 76 but has '{num_cols}'"
-            )
-        
-        # Validation successful, upload to minio bucket
+        # Upload to minio bucket, the content is validated while it is uploaded
         lha_id: str = request_state.realm
         # Get lha display name
-        lha_name = next((realm['displayName'] for realm in get_realms() if realm['realm'] == lha_id), 'LHA ID not found or IDP API unreachable')
+        lha_name = get_realm_directory().display_name(lha_id) or 'LHA ID not found or IDP API unreachable'
         uploader: UserDetail = request_state.user
 
         meta = {
@@ -77,20 +70,40 @@ class UtilsController:
         log.info(f'meta info: {meta}')
         
         client = create_minio_client()
-        # go to end of stream to read size
-        file.file.seek(0, os.SEEK_END)
-        size = file.file.tell()
+        # size is known from parsing the request, only seek to the end of the stream if not
+        size = file.size
+        if size is None:
+            file.file.seek(0, os.SEEK_END)
+            size = file.file.tell()
         # reset to start for upload
         file.file.seek(0, 0)
         try:
-            result = client.put_object(
-                bucket_name='private-lha-data',
-                object_name=object_path_in_bucket,
-                data=file.file,
-                length=size,
-                metadata=meta
-            )
+            # the minio client blocks, so upload in a worker thread to keep serving other requests meanwhile
+            # files larger than a part are uploaded as multipart upload with parts sent in parallel
+            # the content is validated alongside, invalid content fails the upload before it completes
+            start = time.perf_counter()
+            with ValidatingReader(file.file, size, CaseDataValidator()) as data:
+                result = await run_in_threadpool(
+                    client.put_object,
+                    bucket_name='private-lha-data',
+                    object_name=object_path_in_bucket,
+                    data=data,
+                    length=size,
+                    metadata=meta,
+                    part_size=config.UPLOAD_FORWARD_PART_SIZE,
+                    num_parallel_uploads=config.UPLOAD_FORWARD_PARALLEL_UPLOADS,
+                )
+            duration = time.perf_counter() - start
             log.info(f'created: {result.object_name}, etag: {result.etag}, version: {result.version_id}')
+            log.info(
+                f'uploaded {size / 1e6:.1f} MB in {duration:.2f} s ({size / 1e6 / max(duration, 1e-6):.1f} MB/s)'
+            )
+        except CaseDataValidationError as ex:
+            log.warning(f'Invalid case data file: {ex}')
+            raise HTTPException(
+                status_code=400,
+                detail=str(ex)
+            )
         except Exception as ex:
             log.warning(f'Unable to upload file: {ex}')
             raise HTTPException(
@@ -100,18 +113,6 @@ class UtilsController:
         log.info('POST /utils/caseshare success')
         return None
 
-@lru_cache
-def get_realms() -> List[Any]:
-    """
-    Request realm list from IDP API
-    """
-    result_realms = requests.get(f'{str(config.IDP_API_URL)}/realms')
-    if result_realms.status_code != 200:
-        log.warning('IDP API unreachable to request realms')
-        return []
-    return result_realms.json()
-
-
 @lru_cache
 def create_minio_client() -> Minio:
     """
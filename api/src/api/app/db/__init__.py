@@ -1,9 +1,54 @@
+from typing import AsyncIterator
+
+from core import config
 from core.config import DATABASE_URL
-from sqlmodel import Session, create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.pool import TimedQueuePool
+from app.models.pool_status import PoolStatus
+
+# Async engine on asyncpg, so database waits do not block the event loop
+engine = create_async_engine(
+    str(DATABASE_URL.replace(driver='asyncpg')),
+    echo=config.DB_ECHO,
+    poolclass=TimedQueuePool,
+    pool_size=config.DB_POOL_SIZE,
+    max_overflow=config.DB_MAX_OVERFLOW,
+    pool_timeout=config.DB_POOL_TIMEOUT,
+    pool_recycle=config.DB_POOL_RECYCLE,
+    pool_pre_ping=config.DB_POOL_PRE_PING,
+    connect_args={'server_settings': {'statement_timeout': str(config.DB_STATEMENT_TIMEOUT)}},
+)
+
+
+def create_session() -> AsyncSession:
+    """
+    New session on the async engine, use as `async with create_session() as session:` outside of requests.
+    Attributes are not expired on commit, lazy loading is not available with async sessions.
+    """
+    return AsyncSession(engine, expire_on_commit=False)
+
 
-engine = create_engine(str(DATABASE_URL), echo=True, future=True)
+async def get_session() -> AsyncIterator[AsyncSession]:
+    """Session dependency of the endpoints, closed (and its connection returned to the pool) after the request."""
+    async with create_session() as session:
+        yield session
 
 
-def get_session():
-    with Session(engine) as session:
-        yield session
\ No newline at end of file
+def get_pool_status() -> PoolStatus:
+    """Current utilization of the connection pool and the time requests waited for connections."""
+    pool: TimedQueuePool = engine.pool
+    stats = pool.wait_stats
+    return PoolStatus.from_dict({
+        'size': pool.size(),
+        'checkedOut': pool.checkedout(),
+        'checkedIn': pool.checkedin(),
+        'overflow': max(pool.overflow(), 0),
+        'maxOverflow': config.DB_MAX_OVERFLOW,
+        'checkouts': stats.checkouts,
+        'timeouts': stats.timeouts,
+        'waitSecondsTotal': stats.wait_seconds_total,
+        'waitSecondsMax': stats.wait_seconds_max,
+        'waitSecondsAvg': stats.wait_seconds_total / stats.checkouts if stats.checkouts else 0.0,
+    })
@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import time
+from datetime import date
+from typing import AsyncIterator, Dict, Iterator, List
+from uuid import UUID
+
+import numpy
+import pandas
+from pydantic import StrictStr
+from sqlalchemy import column, table, text
+from sqlalchemy.sql.expression import TableClause
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+import app.db.models as db
+
+log = logging.getLogger('API.DB.Bulk')
+logging.basicConfig(level=logging.INFO)
+
+# Number of rows formatted per CSV chunk while streaming into COPY
+COPY_CHUNK_ROWS = 200_000
+# Column order of the CSV rows streamed into the datapoint table
+_DATAPOINT_COPY_COLUMNS: List[str] = [
+    'scenarioId', 'nodeId', 'groupId', 'compartmentId', 'percentile', 'date', 'value'
+]
+# Columns identifying a time series and column order of the CSV rows streamed into the series table
+_SERIES_KEY_COLUMNS: List[str] = ['nodeId', 'groupId', 'compartmentId', 'percentile']
+_SERIES_COPY_COLUMNS: List[str] = ['scenarioId', *_SERIES_KEY_COLUMNS, 'values']
+
+
+async def _prefetch_chunks(chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Iterate CSV chunks asynchronously, formatting them in the threadpool one chunk ahead,
+    so the formatting of the next chunk overlaps with sending the current one.
+    """
+    pending = asyncio.ensure_future(run_in_threadpool(next, chunks, None))
+    try:
+        while (chunk := await pending) is not None:
+            pending = asyncio.ensure_future(run_in_threadpool(next, chunks, None))
+            yield chunk
+    finally:
+        pending.cancel()
+
+
+def datapoint_partition_name(scenarioId: StrictStr) -> str:
+    """Name of the partition of the datapoint table holding the datapoints of the given scenario."""
+    return f'{db.ScenarioDatapoint.__tablename__}_{UUID(str(scenarioId)).hex}'
+
+
+async def datapoint_partition_drop(session: AsyncSession, scenarioId: StrictStr) -> None:
+    """Drop the partition of the datapoint table of the given scenario (if any) in the session's transaction."""
+    await session.exec(text(f'DROP TABLE IF EXISTS "{datapoint_partition_name(scenarioId)}"'))
+
+
+def datapoint_staging_name(scenarioId: StrictStr) -> str:
+    """Name of the table the datapoints of the given scenario are loaded into before replacing its partition."""
+    return f'{datapoint_partition_name(scenarioId)}_staging'
+
+
+def datapoint_staging_table(scenarioId: StrictStr) -> TableClause:
+    """The staging table of the given scenario (see `datapoint_staging_create`) for use in queries."""
+    return table(
+        datapoint_staging_name(scenarioId),
+        *(column(c.name, c.type) for c in db.ScenarioDatapoint.__table__.columns)
+    )
+
+
+async def datapoint_staging_create(session: AsyncSession, scenarioId: StrictStr) -> None:
+    """
+    Create an empty staging table for the datapoints of the given scenario in the session's transaction.
+    It is a plain table with the columns and indexes of the datapoint table, so loading it locks neither the
+    datapoint table nor the scenario's current partition, and it is dropped along with a rolled back transaction.
+    The check on the scenario lets `datapoint_staging_swap` attach it as partition without scanning it.
+    """
+    staging = datapoint_staging_name(scenarioId)
+    # DDL cannot take bind parameters, the scenario ID is validated as UUID by datapoint_partition_name
+    await session.exec(text(
+        f'CREATE TABLE "{staging}" (LIKE "{db.ScenarioDatapoint.__tablename__}" INCLUDING INDEXES, '
+        f"""CONSTRAINT "{staging}_bound" CHECK ("scenarioId" = '{UUID(str(scenarioId))}'))"""
+    ))
+
+
+async def datapoint_staging_swap(session: AsyncSession, scenarioId: StrictStr) -> None:
+    """
+    Replace the partition of the given scenario (if any) with its loaded staging table in the session's transaction.
+    Dropping the old partition locks the whole datapoint table until the transaction ends, so this should be the
+    last step before committing: readers keep seeing the old datapoints while the staging table is loaded and only
+    wait for the commit of the swap. The foreign keys of the datapoint table are validated on the staging table
+    beforehand, attaching it then only has to check the catalog.
+    """
+    partition = datapoint_partition_name(scenarioId)
+    staging = datapoint_staging_name(scenarioId)
+    parent = db.ScenarioDatapoint.__tablename__
+    foreign_keys = (await session.exec(text(
+        'SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint '
+        "WHERE conrelid = CAST(:parent AS regclass) AND contype = 'f' AND conparentid = 0"
+    ), params={'parent': parent})).all()
+    for name, definition in foreign_keys:
+        await session.exec(text(f'ALTER TABLE "{staging}" ADD CONSTRAINT "{name}" {definition}'))
+    await datapoint_partition_drop(session, scenarioId)
+    await session.exec(text(f'ALTER TABLE "{staging}" RENAME TO "{partition}"'))
+    await session.exec(text(f'ALTER INDEX "{staging}_pkey" RENAME TO "{partition}_pkey"'))
+    await session.exec(text(
+        f'''ALTER TABLE "{parent}" ATTACH PARTITION "{partition}" FOR VALUES IN ('{UUID(str(scenarioId))}')'''
+    ))
+    # The partition bound enforces the check from now on
+    await session.exec(text(f'ALTER TABLE "{partition}" DROP CONSTRAINT "{staging}_bound"'))
+
+
+def _datapoint_csv_chunks(
+    scenarioId: StrictStr,
+    start_date: date,
+    datapoints: Dict[str, numpy.ndarray],
+    chunk_rows: int = COPY_CHUNK_ROWS,
+) -> Iterator[bytes]:
+    """Format the columnar datapoints as CSV chunks matching `_DATAPOINT_COPY_COLUMNS`."""
+    start = numpy.datetime64(start_date, 'D')
+    total = len(datapoints['value'])
+    for offset in range(0, total, chunk_rows):
+        part = slice(offset, min(offset + chunk_rows, total))
+        frame = pandas.DataFrame({
+            'scenarioId': scenarioId,
+            'nodeId': datapoints['nodeId'][part],
+            'groupId': datapoints['groupId'][part],
+            'compartmentId': datapoints['compartmentId'][part],
+            'percentile': datapoints['percentile'][part],
+            'date': numpy.datetime_as_string(start + datapoints['dayOffset'][part].astype('timedelta64[D]'), unit='D'),
+            'value': datapoints['value'][part],
+        })
+        # NaN has to be spelled out, an empty field is NULL for COPY
+        yield frame.to_csv(header=False, index=False, na_rep='NaN').encode('utf-8')
+
+
+def _series_csv_chunks(
+    scenarioId: StrictStr,
+    datapoints: Dict[str, numpy.ndarray],
+    chunk_rows: int = COPY_CHUNK_ROWS,
+) -> Iterator[bytes]:
+    """
+    Pivot the columnar datapoints into one array of daily values per series and format them as CSV chunks
+    matching `_SERIES_COPY_COLUMNS`. The arrays start at day offset 0, missing days are filled with NaN.
+    """
+    if len(datapoints['value']) == 0:
+        return
+    frame = pandas.DataFrame({column: datapoints[column] for column in [*_SERIES_KEY_COLUMNS, 'dayOffset', 'value']})
+    days = int(frame['dayOffset'].max()) + 1
+    matrix = frame.pivot(index=_SERIES_KEY_COLUMNS, columns='dayOffset', values='value').reindex(columns=range(days))
+    # chunk_rows counts values, so each chunk holds roughly the same amount of data as a datapoint chunk
+    series_per_chunk = max(1, chunk_rows // days)
+    for offset in range(0, len(matrix), series_per_chunk):
+        part = matrix.iloc[offset:offset + series_per_chunk]
+        values = part.to_csv(header=False, index=False, na_rep='NaN').splitlines()
+        yield ''.join(
+            f'{scenarioId},{node},{group},{compartment},{percentile},"{{{row}}}"\n'
+            for (node, group, compartment, percentile), row in zip(part.index, values)
+        ).encode('utf-8')
+
+
+async def _copy(session: AsyncSession, table: str, columns: List[str], chunks: Iterator[bytes]) -> float:
+    """Stream CSV chunks into the given table on the session's connection. Returns the elapsed seconds."""
+    started = time.perf_counter()
+    connection = await (await session.connection()).get_raw_connection()
+    # COPY ... FROM STDIN on the asyncpg connection, inside the transaction of the session
+    await connection.driver_connection.copy_to_table(
+        table, source=_prefetch_chunks(chunks), columns=columns, format='csv'
+    )
+    return time.perf_counter() - started
+
+
+async def datapoint_copy(
+    session: AsyncSession,
+    scenarioId: StrictStr,
+    start_date: date,
+    datapoints: Dict[str, numpy.ndarray],
+) -> int:
+    """
+    Stream columnar datapoints into the staging table of the scenario (see `datapoint_staging_create`)
+    using `COPY ... FROM STDIN` (CSV).
+    Runs on the connection of the given session, so it is part of the session's transaction.
+    Returns the number of copied rows.
+    """
+    rows = len(datapoints['value'])
+    elapsed = await _copy(
+        session,
+        datapoint_staging_name(scenarioId),
+        _DATAPOINT_COPY_COLUMNS,
+        _datapoint_csv_chunks(scenarioId, start_date, datapoints)
+    )
+    log.info(
+        f'COPY of {rows} datapoints for scenario {scenarioId} took {elapsed:.2f}s '
+        f'({rows / elapsed if elapsed else 0:.0f} rows/s)'
+    )
+    return rows
+
+
+async def series_copy(
+    session: AsyncSession,
+    scenarioId: StrictStr,
+    datapoints: Dict[str, numpy.ndarray],
+) -> int:
+    """
+    Stream columnar datapoints into the series table (one array of daily values per series) using `COPY ... FROM STDIN`.
+    Runs on the connection of the given session, so it is part of the session's transaction.
+    Returns the number of copied datapoints.
+    """
+    rows = len(datapoints['value'])
+    elapsed = await _copy(
+        session,
+        db.ScenarioSeries.__tablename__,
+        _SERIES_COPY_COLUMNS,
+        _series_csv_chunks(scenarioId, datapoints)
+    )
+    log.info(
+        f'COPY of {rows} datapoints as series for scenario {scenarioId} took {elapsed:.2f}s '
+        f'({rows / elapsed if elapsed else 0:.0f} rows/s)'
+    )
+    return rows
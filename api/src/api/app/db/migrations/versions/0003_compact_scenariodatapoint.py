@@ -0,0 +1,82 @@
+"""Compact scenariodatapoint: natural composite key, date column and narrow types
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+import sqlmodel
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+_KEY_COLUMNS = '"scenarioId", "nodeId", "groupId", "compartmentId", percentile, date'
+_FOREIGN_KEYS = [('scenarioId', 'scenario'), ('nodeId', 'node'), ('groupId', 'group'), ('compartmentId', 'compartment')]
+
+
+def upgrade():
+    # Rewrite into a fresh table instead of altering in place, so the dropped id does not linger in the tuples
+    op.create_table('scenariodatapoint_compact',
+    sa.Column('scenarioId', sa.Uuid(), nullable=False),
+    sa.Column('nodeId', sa.Uuid(), nullable=False),
+    sa.Column('groupId', sa.Uuid(), nullable=False),
+    sa.Column('compartmentId', sa.Uuid(), nullable=False),
+    sa.Column('percentile', sa.SmallInteger(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('value', sa.REAL(), nullable=False)
+    )
+    op.execute(
+        'INSERT INTO scenariodatapoint_compact '
+        'SELECT "scenarioId", "nodeId", "groupId", "compartmentId", percentile::smallint, "timestamp"::date, '
+        'value::real '
+        'FROM scenariodatapoint'
+    )
+    op.drop_index('ix_scenariodatapoint_filter', table_name='scenariodatapoint', postgresql_include=['value'])
+    op.drop_table('scenariodatapoint')
+    op.rename_table('scenariodatapoint_compact', 'scenariodatapoint')
+    # The key index doubles as the covering filter index (SQLAlchemy cannot express INCLUDE on primary keys)
+    op.execute(
+        'ALTER TABLE scenariodatapoint ADD CONSTRAINT scenariodatapoint_pkey '
+        f'PRIMARY KEY ({_KEY_COLUMNS}) INCLUDE (value)'
+    )
+    for column, table in _FOREIGN_KEYS:
+        op.create_foreign_key(f'scenariodatapoint_{column}_fkey', 'scenariodatapoint', table, [column], ['id'])
+
+
+def downgrade():
+    op.create_table('scenariodatapoint_wide',
+    sa.Column('id', sa.Uuid(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+    sa.Column('scenarioId', sa.Uuid(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.Column('nodeId', sa.Uuid(), nullable=False),
+    sa.Column('groupId', sa.Uuid(), nullable=False),
+    sa.Column('compartmentId', sa.Uuid(), nullable=False),
+    sa.Column('percentile', sa.Integer(), nullable=False),
+    sa.Column('value', sa.Float(), nullable=False)
+    )
+    op.execute(
+        'INSERT INTO scenariodatapoint_wide '
+        '("scenarioId", "timestamp", "nodeId", "groupId", "compartmentId", percentile, value) '
+        # Via text, so the doubles get the shortest decimal of the float4 (0.1 instead of 0.10000000149011612)
+        'SELECT "scenarioId", date::timestamp, "nodeId", "groupId", "compartmentId", percentile, value::text::float8 '
+        'FROM scenariodatapoint'
+    )
+    op.drop_table('scenariodatapoint')
+    op.rename_table('scenariodatapoint_wide', 'scenariodatapoint')
+    op.alter_column('scenariodatapoint', 'id', server_default=None)
+    op.create_primary_key('scenariodatapoint_pkey', 'scenariodatapoint', ['id'])
+    for column, table in _FOREIGN_KEYS:
+        op.create_foreign_key(f'scenariodatapoint_{column}_fkey', 'scenariodatapoint', table, [column], ['id'])
+    op.create_index(
+        'ix_scenariodatapoint_filter',
+        'scenariodatapoint',
+        ['scenarioId', 'nodeId', 'groupId', 'compartmentId', 'percentile', 'timestamp'],
+        unique=False,
+        postgresql_include=['value'],
+    )
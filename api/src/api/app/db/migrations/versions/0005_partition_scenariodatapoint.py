@@ -0,0 +1,81 @@
+"""Partition scenariodatapoint by scenario (LIST on scenarioId)
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+import uuid
+
+import sqlmodel
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+_KEY_COLUMNS = '"scenarioId", "nodeId", "groupId", "compartmentId", percentile, date'
+_FOREIGN_KEYS = [('scenarioId', 'scenario'), ('nodeId', 'node'), ('groupId', 'group'), ('compartmentId', 'compartment')]
+
+
+def _create_datapoint_table(name, **kwargs):
+    op.create_table(name,
+    sa.Column('scenarioId', sa.Uuid(), nullable=False),
+    sa.Column('nodeId', sa.Uuid(), nullable=False),
+    sa.Column('groupId', sa.Uuid(), nullable=False),
+    sa.Column('compartmentId', sa.Uuid(), nullable=False),
+    sa.Column('percentile', sa.SmallInteger(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('value', sa.REAL(), nullable=False),
+    **kwargs
+    )
+
+
+def _finish_datapoint_table():
+    op.execute(
+        'ALTER TABLE scenariodatapoint ADD CONSTRAINT scenariodatapoint_pkey '
+        f'PRIMARY KEY ({_KEY_COLUMNS}) INCLUDE (value)'
+    )
+    for column, table in _FOREIGN_KEYS:
+        op.create_foreign_key(f'scenariodatapoint_{column}_fkey', 'scenariodatapoint', table, [column], ['id'])
+
+
+def upgrade():
+    op.rename_table('scenariodatapoint', 'scenariodatapoint_unpartitioned')
+    op.execute(
+        'ALTER TABLE scenariodatapoint_unpartitioned '
+        'RENAME CONSTRAINT scenariodatapoint_pkey TO scenariodatapoint_unpartitioned_pkey'
+    )
+    _create_datapoint_table('scenariodatapoint', postgresql_partition_by='LIST ("scenarioId")')
+    # One partition per scenario with results (same naming as app.db.bulk.datapoint_partition_name)
+    connection = op.get_bind()
+    scenarios = connection.execute(
+        sa.text('SELECT DISTINCT "scenarioId" FROM scenariodatapoint_unpartitioned')
+    ).scalars()
+    for scenarioId in scenarios:
+        scenarioId = uuid.UUID(str(scenarioId))
+        op.execute(
+            f'CREATE TABLE scenariodatapoint_{scenarioId.hex} PARTITION OF scenariodatapoint '
+            f"FOR VALUES IN ('{scenarioId}')"
+        )
+    op.execute('INSERT INTO scenariodatapoint SELECT * FROM scenariodatapoint_unpartitioned')
+    # Key and foreign keys are added after the copy, building the indexes once is much faster than maintaining them
+    _finish_datapoint_table()
+    op.drop_table('scenariodatapoint_unpartitioned')
+
+
+def downgrade():
+    op.rename_table('scenariodatapoint', 'scenariodatapoint_partitioned')
+    op.execute(
+        'ALTER TABLE scenariodatapoint_partitioned '
+        'RENAME CONSTRAINT scenariodatapoint_pkey TO scenariodatapoint_partitioned_pkey'
+    )
+    _create_datapoint_table('scenariodatapoint')
+    op.execute('INSERT INTO scenariodatapoint SELECT * FROM scenariodatapoint_partitioned')
+    _finish_datapoint_table()
+    # Drops the partitions as well
+    op.drop_table('scenariodatapoint_partitioned')
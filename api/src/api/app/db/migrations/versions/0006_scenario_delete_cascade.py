@@ -0,0 +1,43 @@
+"""Cascade scenario deletes to dependent tables
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+import sqlmodel
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+# (constraint, table, referenced table, columns, referenced columns)
+_FOREIGN_KEYS = [
+    ('parametervalue_scenarioId_fkey', 'parametervalue', 'scenario', ['scenarioId'], ['id']),
+    ('interventionimplementation_scenarioId_fkey', 'interventionimplementation', 'scenario', ['scenarioId'], ['id']),
+    ('scenariodatapoint_scenarioId_fkey', 'scenariodatapoint', 'scenario', ['scenarioId'], ['id']),
+    ('scenarioseries_scenarioId_fkey', 'scenarioseries', 'scenario', ['scenarioId'], ['id']),
+    (
+        'parametervalueentry_parameterValueIdScenario_parameterValu_fkey', 'parametervalueentry', 'parametervalue',
+        ['parameterValueIdScenario', 'parameterValueIdDefinition'], ['scenarioId', 'definitionId']
+    ),
+]
+
+
+def _recreate_foreign_keys(ondelete):
+    for name, table, referent, columns, referent_columns in _FOREIGN_KEYS:
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referent, columns, referent_columns, ondelete=ondelete)
+
+
+def upgrade():
+    _recreate_foreign_keys('CASCADE')
+
+
+def downgrade():
+    _recreate_foreign_keys(None)
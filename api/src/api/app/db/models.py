@@ -1,9 +1,10 @@
+import datetime as dt
 import uuid
 from datetime import date, datetime  # noqa: F401
 from typing import List, Optional
 
 from sqlmodel import Field, Relationship, SQLModel, ARRAY, Float, Column
-from sqlalchemy import ForeignKeyConstraint, PrimaryKeyConstraint
+from sqlalchemy import REAL, ForeignKeyConstraint, PrimaryKeyConstraint, SmallInteger
 
 
 class Scenario(SQLModel, table=True):
@@ -20,8 +21,8 @@ class Scenario(SQLModel, table=True):
     nodeListId: Optional[uuid.UUID] = Field(foreign_key="nodelist.id", nullable=False)
     nodelist: "NodeList" = Relationship(back_populates="scenarios")
 
-    modelParameters: List["ParameterValue"] = Relationship(back_populates="scenario", cascade_delete=True)
-    linkedInterventions: List["InterventionImplementation"] = Relationship(back_populates="scenario", cascade_delete=True)
+    modelParameters: List["ParameterValue"] = Relationship(back_populates="scenario", cascade_delete=True, passive_deletes=True)
+    linkedInterventions: List["InterventionImplementation"] = Relationship(back_populates="scenario", cascade_delete=True, passive_deletes=True)
 
     percentiles: Optional[str] = Field(default='50')
 
@@ -45,9 +46,9 @@ class ParameterValue(SQLModel, table=True):
     __tableargs__ = (
         PrimaryKeyConstraint('scenarioId', 'definitionId'),
     )
-    scenarioId: Optional[uuid.UUID] = Field(default=None, nullable=False, primary_key=True, foreign_key="scenario.id") # cascade delete this if Scenario is deleted
+    scenarioId: Optional[uuid.UUID] = Field(default=None, nullable=False, primary_key=True, foreign_key="scenario.id", ondelete="CASCADE") # cascade delete this if Scenario is deleted
     definitionId: Optional[uuid.UUID] = Field(default=None, nullable=False, primary_key=True, foreign_key="parameterdefinition.id") # Cannot delete ParameterDefinition if used in Scenario
-    values: List["ParameterValueEntry"] = Relationship(back_populates="parameterValueLink", cascade_delete=True)
+    values: List["ParameterValueEntry"] = Relationship(back_populates="parameterValueLink", cascade_delete=True, passive_deletes=True)
 
     scenario: "Scenario" = Relationship(back_populates="modelParameters")
     parameter: "ParameterDefinition" = Relationship(back_populates="scenarioLinks")
@@ -58,7 +59,8 @@ class ParameterValueEntry(SQLModel, table=True):
     __table_args__ = (
         ForeignKeyConstraint(
             ['parameterValueIdScenario', 'parameterValueIdDefinition'],
-            ['parametervalue.scenarioId', 'parametervalue.definitionId']
+            ['parametervalue.scenarioId', 'parametervalue.definitionId'],
+            ondelete='CASCADE'
         ),
     )
     id: Optional[uuid.UUID] = Field(default_factory=uuid.uuid4, primary_key=True, nullable=False)
@@ -154,7 +156,7 @@ class InterventionImplementation(SQLModel, table=True):
     __tableargs__ = (
         PrimaryKeyConstraint('scenarioId', 'interventionId'),
     )
-    scenarioId: Optional[uuid.UUID] = Field(default=None, nullable=False, primary_key=True, foreign_key="scenario.id") # Cascade delete this if Scenario is deleted
+    scenarioId: Optional[uuid.UUID] = Field(default=None, nullable=False, primary_key=True, foreign_key="scenario.id", ondelete="CASCADE") # Cascade delete this if Scenario is deleted
     interventionId: Optional[uuid.UUID] = Field(default=None, nullable=False, primary_key=True, foreign_key="interventiontemplate.id") # Cannot delete InterventionTemplate if used in Scenario
     startDate: Optional[date] = Field(default=None, nullable=False)
     endDate: Optional[date] = Field(default=None, nullable=False)
@@ -194,11 +196,57 @@ class NodeListNodeLink(SQLModel, table=True):
 
 
 class ScenarioDatapoint(SQLModel, table=True):
-    id: Optional[uuid.UUID] = Field(default_factory=uuid.uuid4, primary_key=True, nullable=False)
-    scenarioId: Optional[uuid.UUID] = Field(default=None, nullable=False, foreign_key="scenario.id")
-    timestamp: Optional[datetime] = Field(default=None, nullable=False) # TODO: date enough?
-    nodeId: Optional[uuid.UUID] = Field(default=None, nullable=False, foreign_key="node.id")
-    groupId: Optional[uuid.UUID] = Field(default=None, nullable=False, foreign_key="group.id")
-    compartmentId: Optional[uuid.UUID] = Field(default=None, nullable=False, foreign_key="compartment.id")
-    percentile: Optional[int] = Field(default=None, nullable=False)
-    value: Optional[float] = Field(default=None, nullable=False)
+    # Natural composite key, ordered for the infection data filters (equality filters first, date range last)
+    # The primary key index is created with INCLUDE (value) by the migrations, so filtered queries are index-only scans
+    # List partitioned by scenario (one partition per scenario, see app.db.bulk), replacing results swaps in a newly
+    # loaded partition, deleting them drops it and queries filtered by scenario only touch that partition
+    __table_args__ = (
+        PrimaryKeyConstraint('scenarioId', 'nodeId', 'groupId', 'compartmentId', 'percentile', 'date'),
+        {'postgresql_partition_by': 'LIST ("scenarioId")'},
+    )
+    scenarioId: Optional[uuid.UUID] = Field(default=None, nullable=False, primary_key=True, foreign_key="scenario.id", ondelete="CASCADE")
+    nodeId: Optional[uuid.UUID] = Field(default=None, nullable=False, primary_key=True, foreign_key="node.id")
+    groupId: Optional[uuid.UUID] = Field(default=None, nullable=False, primary_key=True, foreign_key="group.id")
+    compartmentId: Optional[uuid.UUID] = Field(default=None, nullable=False, primary_key=True, foreign_key="compartment.id")
+    percentile: Optional[int] = Field(default=None, nullable=False, primary_key=True, sa_type=SmallInteger)
+    # Annotated via the module, the class scope name `date` shadows the type from here on
+    date: Optional[dt.date] = Field(default=None, nullable=False, primary_key=True)
+    value: Optional[float] = Field(default=None, nullable=False, sa_type=REAL)
+
+
+class ScenarioSeries(SQLModel, table=True):
+    # Alternative storage of scenario results (SCENARIO_DATA_STORAGE=series): one row per time series
+    # values[1] holds the value of the scenario start date, days without a value are stored as NaN
+    scenarioId: Optional[uuid.UUID] = Field(default=None, nullable=False, primary_key=True, foreign_key="scenario.id", ondelete="CASCADE")
+    nodeId: Optional[uuid.UUID] = Field(default=None, nullable=False, primary_key=True, foreign_key="node.id")
+    groupId: Optional[uuid.UUID] = Field(default=None, nullable=False, primary_key=True, foreign_key="group.id")
+    compartmentId: Optional[uuid.UUID] = Field(default=None, nullable=False, primary_key=True, foreign_key="compartment.id")
+    percentile: Optional[int] = Field(default=None, nullable=False, primary_key=True, sa_type=SmallInteger)
+    values: Optional[List[float]] = Field(default=None, sa_column=Column(ARRAY(REAL), nullable=False))
+
+
+class ScenarioRegionDatapoint(SQLModel, table=True):
+    # Optional roll-up of the datapoints of a scenario to regions (SCENARIO_REGION_ROLLUP), filled during import
+    # level is a SpatialAggregation (app.utils.constants), region the state key or intermediate region ID
+    scenarioId: Optional[uuid.UUID] = Field(default=None, nullable=False, primary_key=True, foreign_key="scenario.id", ondelete="CASCADE")
+    level: Optional[str] = Field(default=None, nullable=False, primary_key=True)
+    region: Optional[str] = Field(default=None, nullable=False, primary_key=True)
+    groupId: Optional[uuid.UUID] = Field(default=None, nullable=False, primary_key=True, foreign_key="group.id")
+    compartmentId: Optional[uuid.UUID] = Field(default=None, nullable=False, primary_key=True, foreign_key="compartment.id")
+    percentile: Optional[int] = Field(default=None, nullable=False, primary_key=True, sa_type=SmallInteger)
+    # Annotated via the module, the class scope name `date` shadows the type from here on
+    date: Optional[dt.date] = Field(default=None, nullable=False, primary_key=True)
+    value: Optional[float] = Field(default=None, nullable=False, sa_type=REAL)
+
+
+class ScenarioTotalDatapoint(SQLModel, table=True):
+    # Sums of the datapoints of a scenario over all groups, all nodes or both, filled during import
+    # nodeId and groupId hold the node or group ID as string or TOTAL_KEY (app.utils.constants) for the summed dimension
+    scenarioId: Optional[uuid.UUID] = Field(default=None, nullable=False, primary_key=True, foreign_key="scenario.id", ondelete="CASCADE")
+    nodeId: Optional[str] = Field(default=None, nullable=False, primary_key=True)
+    groupId: Optional[str] = Field(default=None, nullable=False, primary_key=True)
+    compartmentId: Optional[uuid.UUID] = Field(default=None, nullable=False, primary_key=True, foreign_key="compartment.id")
+    percentile: Optional[int] = Field(default=None, nullable=False, primary_key=True, sa_type=SmallInteger)
+    # Annotated via the module, the class scope name `date` shadows the type from here on
+    date: Optional[dt.date] = Field(default=None, nullable=False, primary_key=True)
+    value: Optional[float] = Field(default=None, nullable=False, sa_type=REAL)
@@ -0,0 +1,49 @@
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolWaitStats:
+    """Thread-safe counters of the checkouts from a connection pool and the time spent waiting for them."""
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, wait: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool of the async engine that records how long each checkout waits for a connection,
+    including the time to open new connections. The stats survive `dispose()`, which recreates the pool.
+    """
+    def __init__(self, *args, wait_stats: PoolWaitStats = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = wait_stats or PoolWaitStats()
+
+    def recreate(self) -> 'TimedQueuePool':
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except TimeoutError:
+            self.wait_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - start)
+        return connection
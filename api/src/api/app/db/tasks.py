@@ -1,54 +1,68 @@
 from collections import defaultdict
 import json
-from typing import List, Optional, Union
-from uuid import uuid4
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
+from uuid import UUID, uuid4
+import numpy
 from pydantic import StrictInt, StrictStr
-from datetime import date, datetime, time
+from datetime import date, datetime
 
-from app.db import get_session
+from app.db import create_session
+from core import config
+from app.db.bulk import (
+    datapoint_copy, datapoint_partition_drop, datapoint_staging_create, datapoint_staging_swap, datapoint_staging_table,
+    series_copy
+)
 
 import app.db.models as db
 from app.models import *
 
-from app.utils.constants import MovementFilter
-from app.utils.defaultDict import County, age_groups
+from app.utils.constants import TOTAL_KEY, MovementFilter, SpatialAggregation
+from app.utils.defaultDict import County, IntermediateRegionIDsToCountyIDs, age_groups
 
 from fastapi import HTTPException
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
-from sqlalchemy import delete
+from sqlalchemy import (
+    ColumnElement, Double, Integer, Row, Select, String, Subquery, Text, Uuid,
+    cast, column, delete, func, insert, literal, null, text, true, tuple_, union_all, values
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+# Number of rows fetched per round trip (and handed out per batch) when streaming scenario data
+DATA_STREAM_BATCH_SIZE = 10_000
+# Memory granted to the grouping queries computing the totals and region roll-up of a scenario during import
+MATERIALIZE_WORK_MEM = '256MB'
 
 
 ## Compartments ##
-def compartment_create(compartment: Compartment) -> ID:
+async def compartment_create(session: AsyncSession, compartment: Compartment) -> ID:
     compartment_obj = db.Compartment(
         name=compartment.name,
         description=compartment.description,
         tags=','.join(compartment.tags) if compartment.tags else None,
         )
-    with next(get_session()) as session:
-        session.add(compartment_obj)
-        session.commit()
-        session.refresh(compartment_obj)
+    session.add(compartment_obj)
+    await session.commit()
+    await session.refresh(compartment_obj)
     return ID(id=str(compartment_obj.id))
 
-def compartment_delete(id: StrictStr) -> None:
+async def compartment_delete(session: AsyncSession, id: StrictStr) -> None:
     query = select(db.Compartment).where(db.Compartment.id == id).options(selectinload(db.Compartment.modelLinks))
-    with next(get_session()) as session:
-        compartment: db.Compartment = session.exec(query).one_or_none()
-        if not compartment:
-            raise HTTPException(status_code=404, detail='A compartment with this ID does not exist')
-        if len(compartment.modelLinks) > 0:
-            raise HTTPException(status_code=409, detail='Compartment is still linked to models: {}'.format( ', '.join([str(link.modelId) for link in compartment.modelLinks])))
-        session.delete(compartment)
-        session.commit()
+    compartment: db.Compartment = (await session.exec(query)).one_or_none()
+    if not compartment:
+        raise HTTPException(status_code=404, detail='A compartment with this ID does not exist')
+    if len(compartment.modelLinks) > 0:
+        raise HTTPException(status_code=409, detail='Compartment is still linked to models: {}'.format( ', '.join([str(link.modelId) for link in compartment.modelLinks])))
+    await session.delete(compartment)
+    await session.commit()
     return
 
-def compartment_get_all() -> List[Compartment]:
+async def compartment_get_all(session: AsyncSession) -> List[Compartment]:
     query = select(db.Compartment)
-    with next(get_session()) as session:
-        compartments: List[db.Compartment] = session.exec(query).all()
+    compartments: List[db.Compartment] = (await session.exec(query)).all()
     return [Compartment(
         id=str(compartment.id),
         name=compartment.name,
@@ -58,39 +72,36 @@ def compartment_get_all() -> List[Compartment]:
 
 
 ## Groups ##
-def group_create(group: Group) -> ID:
+async def group_create(session: AsyncSession, group: Group) -> ID:
     group_obj = db.Group(
         name=group.name,
         description=group.description,
         category=group.category
     )
-    with next(get_session()) as session:
-        session.add(group_obj)
-        session.commit()
-        session.refresh(group_obj)
+    session.add(group_obj)
+    await session.commit()
+    await session.refresh(group_obj)
     return ID(id=str(group_obj.id))
 
-def group_delete_by_id(id: StrictStr) -> None:
+async def group_delete_by_id(session: AsyncSession, id: StrictStr) -> None:
     query = select(db.Group).where(db.Group.id == id).options(selectinload(db.Group.parameterValueEntries)).options(selectinload(db.Group.modelLinks))
-    with next(get_session()) as session:
-        group: db.Group = session.exec(query).one_or_none()
-        if not group:
-            raise HTTPException(status_code=404, detail='A group with this ID does not exist')
-        message = {}
-        if len(group.parameterValueEntries) > 0:
-            message['parameterValues'] = 'Group is still linked to parameter values: {}'.format(', '.join([str(entry.id) for entry in group.parameterValueEntries]))
-        if len(group.modelLinks) > 0:
-            message['models'] = 'Group is still linked to models: {}'.format(', '.join([str(link.modelId) for link in group.modelLinks]))
-        if message:
-            raise HTTPException(status_code=409, detail=message)
-        session.delete(group)
-        session.commit()
+    group: db.Group = (await session.exec(query)).one_or_none()
+    if not group:
+        raise HTTPException(status_code=404, detail='A group with this ID does not exist')
+    message = {}
+    if len(group.parameterValueEntries) > 0:
+        message['parameterValues'] = 'Group is still linked to parameter values: {}'.format(', '.join([str(entry.id) for entry in group.parameterValueEntries]))
+    if len(group.modelLinks) > 0:
+        message['models'] = 'Group is still linked to models: {}'.format(', '.join([str(link.modelId) for link in group.modelLinks]))
+    if message:
+        raise HTTPException(status_code=409, detail=message)
+    await session.delete(group)
+    await session.commit()
     return
 
-def group_get_all() -> List[Group]:
+async def group_get_all(session: AsyncSession) -> List[Group]:
     query = select(db.Group)
-    with next(get_session()) as session:
-        groups: List[db.Group] = session.exec(query).all()
+    groups: List[db.Group] = (await session.exec(query)).all()
     return [Group(
         id=str(group.id),
         name=group.name,
@@ -98,42 +109,38 @@ def group_get_all() -> List[Group]:
         category=group.category
     ) for group in groups]
 
-def group_get_all_categories() -> List[str]:
+async def group_get_all_categories(session: AsyncSession) -> List[str]:
     query = select(db.Group.category).distinct()
-    with next(get_session()) as session:
-        categories: List[str] = session.exec(query).all()
+    categories: List[str] = (await session.exec(query)).all()
     return categories
 
 
 ## Intervention Templates ##
-def intervention_template_create(intervention: InterventionTemplate) -> ID:
+async def intervention_template_create(session: AsyncSession, intervention: InterventionTemplate) -> ID:
     template_obj = db.InterventionTemplate(
         name=intervention.name,
         description=intervention.description,
         tags=','.join(intervention.tags) if intervention.tags else None,
     )
-    with next(get_session()) as session:
-        session.add(template_obj)
-        session.commit()
-        session.refresh(template_obj)
+    session.add(template_obj)
+    await session.commit()
+    await session.refresh(template_obj)
     return ID(id=str(template_obj.id))
 
-def intervention_template_delete(id: StrictStr) -> None:
+async def intervention_template_delete(session: AsyncSession, id: StrictStr) -> None:
     query = select(db.InterventionTemplate).where(db.InterventionTemplate.id == id).options(selectinload(db.InterventionTemplate.implementations))
-    with next(get_session()) as session:
-        template: db.InterventionTemplate = session.exec(query).one_or_none()
-        if not template:
-            raise HTTPException(status_code=404, detail="An intervention template with this ID does not exist")
-        if len(template.implementations) > 0:
-            raise HTTPException(status_code=409, detail='Intervention template is still used in scenario: {}'.format( ', '.join([str(link.scenarioId) for link in template.implementations])))
-        session.delete(template)
-        session.commit()
+    template: db.InterventionTemplate = (await session.exec(query)).one_or_none()
+    if not template:
+        raise HTTPException(status_code=404, detail="An intervention template with this ID does not exist")
+    if len(template.implementations) > 0:
+        raise HTTPException(status_code=409, detail='Intervention template is still used in scenario: {}'.format( ', '.join([str(link.scenarioId) for link in template.implementations])))
+    await session.delete(template)
+    await session.commit()
     return
 
-def intervention_template_get_all() -> List[InterventionTemplate]:
+async def intervention_template_get_all(session: AsyncSession) -> List[InterventionTemplate]:
     query = select(db.InterventionTemplate)
-    with next(get_session()) as session:
-        templates: List[db.InterventionTemplate] = session.exec(query).all()
+    templates: List[db.InterventionTemplate] = (await session.exec(query)).all()
     return [InterventionTemplate(
         id=str(entry.id),
         name=entry.name,
@@ -143,7 +150,7 @@ def intervention_template_get_all() -> List[InterventionTemplate]:
 
 
 ## Models ##
-def model_create(model: Model) -> ID:
+async def model_create(session: AsyncSession, model: Model) -> ID:
     model_obj = db.Model(
         name=model.name,
         description=model.description,
@@ -151,79 +158,81 @@ def model_create(model: Model) -> ID:
         # groups=model.groups                               Links for groups
         # parameterDefinitions=model.parameter_definitions  Links for parameter definitions
     )
-    with next(get_session()) as session:
-        message = {}
-        # Check compartments are valid
-        foundCompartments: List[db.Compartment] = session.exec(
-            select(db.Compartment).where(db.Compartment.id.in_(model.compartments))
-        ).all()
-        if not len(foundCompartments) == len(model.compartments):
-            wrongCompartments = list(set(model.compartments).difference([str(compartment.id) for compartment in foundCompartments]))
-            message['compartments'] = 'One or more Compartment IDs do not exist in compartment table. Unknown compartments: {}'.format( ', '.join(wrongCompartments))
-        # Check groups are valid
-        foundGroups: List[db.Group] = session.exec(
-            select(db.Group).where(db.Group.id.in_(model.groups))
-        ).all()
-        if not len(foundGroups) == len(model.groups):
-            wrongGroups = list(set(model.groups).difference([str(group.id) for group in foundGroups]))
-            message['groups'] = 'One or more Group IDs do not exist in group table. Unknown groups: {}'.format( ', '.join(wrongGroups))
-        # Check parameter definitions are valid
-        foundParameters: List[db.ParameterDefinition] = session.exec(
-            select(db.ParameterDefinition).where(db.ParameterDefinition.id.in_(model.parameter_definitions))
-        ).all()
-        if not len(foundParameters) == len(model.parameter_definitions):
-            wrongParameters = list(set(model.parameter_definitions).difference([str(param.id) for param in foundParameters]))
-            message['parameter_definitions'] = 'One or more Parameter Definition IDs do not exist in parameter definition table. Unknown parameter definitions: {}'.format( ', '.join(wrongParameters))
-        # Raise Exception if any validation issues found
-        if message:
-            raise HTTPException(status_code=422, detail=message)
-
-        # Otherwise create object & Link Table entries TODO parallelize write ops like these?
-        session.add(model_obj)
-        # Compartment Links
-        session.add_all([db.ModelCompartmentLink(
-            modelId=model_obj.id,
-            compartmentId=compartmentId
-        ) for compartmentId in model.compartments])
-        # Group Links
-        session.add_all([db.ModelGroupLink(
-            modelId=model_obj.id,
-            groupId=groupId
-        ) for groupId in model.groups])
-        # Parameter Definition Links
-        session.add_all([db.ModelParameterDefinitionLink(
-            modelId=model_obj.id,
-            parameterId=defininitionId
-        ) for defininitionId in model.parameter_definitions])
-        # Commit & refresh to get final object
-        session.commit()
-        session.refresh(model_obj)
+    message = {}
+    # Check compartments are valid
+    foundCompartments: List[db.Compartment] = (await session.exec(
+        select(db.Compartment).where(db.Compartment.id.in_(model.compartments))
+    )).all()
+    if not len(foundCompartments) == len(model.compartments):
+        wrongCompartments = list(set(model.compartments).difference([str(compartment.id) for compartment in foundCompartments]))
+        message['compartments'] = 'One or more Compartment IDs do not exist in compartment table. Unknown compartments: {}'.format( ', '.join(wrongCompartments))
+    # Check groups are valid
+    foundGroups: List[db.Group] = (await session.exec(
+        select(db.Group).where(db.Group.id.in_(model.groups))
+    )).all()
+    if not len(foundGroups) == len(model.groups):
+        wrongGroups = list(set(model.groups).difference([str(group.id) for group in foundGroups]))
+        message['groups'] = 'One or more Group IDs do not exist in group table. Unknown groups: {}'.format( ', '.join(wrongGroups))
+    # Check parameter definitions are valid
+    foundParameters: List[db.ParameterDefinition] = (await session.exec(
+        select(db.ParameterDefinition).where(db.ParameterDefinition.id.in_(model.parameter_definitions))
+    )).all()
+    if not len(foundParameters) == len(model.parameter_definitions):
+        wrongParameters = list(set(model.parameter_definitions).difference([str(param.id) for param in foundParameters]))
+        message['parameter_definitions'] = 'One or more Parameter Definition IDs do not exist in parameter definition table. Unknown parameter definitions: {}'.format( ', '.join(wrongParameters))
+    # Raise Exception if any validation issues found
+    if message:
+        raise HTTPException(status_code=422, detail=message)
+
+    # Otherwise create object & Link Table entries TODO parallelize write ops like these?
+    session.add(model_obj)
+    # Compartment Links
+    session.add_all([db.ModelCompartmentLink(
+        modelId=model_obj.id,
+        compartmentId=compartmentId
+    ) for compartmentId in model.compartments])
+    # Group Links
+    session.add_all([db.ModelGroupLink(
+        modelId=model_obj.id,
+        groupId=groupId
+    ) for groupId in model.groups])
+    # Parameter Definition Links
+    session.add_all([db.ModelParameterDefinitionLink(
+        modelId=model_obj.id,
+        parameterId=defininitionId
+    ) for defininitionId in model.parameter_definitions])
+    # Commit & refresh to get final object
+    await session.commit()
+    await session.refresh(model_obj)
     return ID(id=str(model_obj.id))
 
-def model_delete(id: StrictStr) -> None:
+async def model_delete(session: AsyncSession, id: StrictStr) -> None:
     query = (
         select(db.Model).where(db.Model.id == id)
         .options(selectinload(db.Model.scenarios))
         )
-    with next(get_session()) as session:
-        model: db.Model = session.exec(query).one_or_none()
-        if not model:
-            raise HTTPException(status_code=404, detail='A model with this ID does not exist')
-        if len(model.scenarios) > 0:
-            raise HTTPException(status_code=404, detail='Model is still linked to scenarios: {}'.format(', '.join([str(link.id) for link in model.scenarios])))
-        session.delete(model)
-        session.commit()
+    model: db.Model = (await session.exec(query)).one_or_none()
+    if not model:
+        raise HTTPException(status_code=404, detail='A model with this ID does not exist')
+    if len(model.scenarios) > 0:
+        raise HTTPException(status_code=404, detail='Model is still linked to scenarios: {}'.format(', '.join([str(link.id) for link in model.scenarios])))
+    await session.delete(model)
+    await session.commit()
     return
 
-def model_get_by_id(id: StrictStr) -> Model:
-    query = select(db.Model).where(db.Model.id == id)
-    with next(get_session()) as session:
-        model: db.Model = session.exec(query).one_or_none()
-        if not model:
-            raise HTTPException(status_code=404, detail='A model with this ID does not exist')
-        compartmentIDs: List[StrictStr] = [str(compartment.compartmentId) for compartment in model.compartments]
-        groupIDs: List[StrictStr] = [str(group.groupId) for group in model.groups]
-        definitionIDs: List[StrictStr] = [str(definition.parameterId) for definition in model.parameterDefinitions]
+async def model_get_by_id(session: AsyncSession, id: StrictStr) -> Model:
+    query = (
+        select(db.Model).where(db.Model.id == id)
+        .options(selectinload(db.Model.compartments))
+        .options(selectinload(db.Model.groups))
+        .options(selectinload(db.Model.parameterDefinitions))
+        )
+    model: db.Model = (await session.exec(query)).one_or_none()
+    if not model:
+        raise HTTPException(status_code=404, detail='A model with this ID does not exist')
+    compartmentIDs: List[StrictStr] = [str(compartment.compartmentId) for compartment in model.compartments]
+    groupIDs: List[StrictStr] = [str(group.groupId) for group in model.groups]
+    definitionIDs: List[StrictStr] = [str(definition.parameterId) for definition in model.parameterDefinitions]
     return Model(
         id=str(model.id),
         name=model.name,
@@ -233,10 +242,9 @@ def model_get_by_id(id: StrictStr) -> Model:
         parameterDefinitions=definitionIDs
     )
 
-def model_get_all():
+async def model_get_all(session: AsyncSession):
     query = select(db.Model)
-    with next(get_session()) as session:
-        models: List[db.Model] = session.exec(query).all()
+    models: List[db.Model] = (await session.exec(query)).all()
     return [ReducedInfo(
         id=str(model.id),
         name=model.name,
@@ -245,86 +253,80 @@ def model_get_all():
 
 
 ## Nodes ##
-def node_create(node: Node) -> ID:
+async def node_create(session: AsyncSession, node: Node) -> ID:
     node_obj = db.Node(
         nuts=node.nuts,
         name=node.name
         )
-    with next(get_session()) as session:
-        session.add(node_obj)
-        session.commit()
-        session.refresh(node_obj)
+    session.add(node_obj)
+    await session.commit()
+    await session.refresh(node_obj)
     return ID(id=str(node_obj.id))
 
-def node_get_all() -> List[Node]:
+async def node_get_all(session: AsyncSession) -> List[Node]:
     query = select(db.Node)
-    with next(get_session()) as session:
-        nodes: List[db.Node] = session.exec(query).all()
+    nodes: List[db.Node] = (await session.exec(query)).all()
     return [Node(
         id=str(node.id),
         nuts=node.nuts,
         name=node.name,
     ) for node in nodes]
 
-def node_get_by_list(id: StrictStr) -> List[Node]:
+async def node_get_by_list(session: AsyncSession, id: StrictStr) -> List[Node]:
     query = select(db.Node).where(db.Node.id.in_(select(db.NodeListNodeLink.nodeId).where(db.NodeListNodeLink.listId == id)))
-    with next(get_session()) as session:
-        nodes: List[Node] = session.exec(query).all()
+    nodes: List[Node] = (await session.exec(query)).all()
     return [Node(
         id=str(node.id),
         nuts=node.nuts,
         name=node.name,
     ) for node in nodes]
 
-def node_delete(id: StrictStr) -> None:
+async def node_delete(session: AsyncSession, id: StrictStr) -> None:
     query = select(db.Node).where(db.Node.id == id).options(selectinload(db.Node.nodelistLinks))
-    with next(get_session()) as session:
-        node: db.Node = session.exec(query).one_or_none()
-        if not node:
-            raise HTTPException(status_code=404, detail='A node with this ID does not exist')
-        if len(node.nodelistLinks) > 0:
-            raise HTTPException(status_code=409, detail='Node is still linked in node lists: {}'.format( ', '.join([str(link.listId) for link in node.nodelistLinks])))
-        session.delete(node)
-        session.commit()
+    node: db.Node = (await session.exec(query)).one_or_none()
+    if not node:
+        raise HTTPException(status_code=404, detail='A node with this ID does not exist')
+    if len(node.nodelistLinks) > 0:
+        raise HTTPException(status_code=409, detail='Node is still linked in node lists: {}'.format( ', '.join([str(link.listId) for link in node.nodelistLinks])))
+    await session.delete(node)
+    await session.commit()
     return
 
 
 ## Nodelists ##
-def nodelist_create(nodeList: NodeList) -> ID:
+async def nodelist_create(session: AsyncSession, nodeList: NodeList) -> ID:
     list_obj = db.NodeList(
         name=nodeList.name,
         description=nodeList.description,
         )
     query = select(db.Node).where(db.Node.id.in_(nodeList.node_ids))
-    with next(get_session()) as session:
-        # Check Nodes are valid
-        foundNodes: List[db.Node] = session.exec(query).all()
-        if not len(foundNodes) == len(nodeList.node_ids):
-            wrongNodes = list(set(nodeList.node_ids).difference([str(node.id) for node in foundNodes]))
-            raise HTTPException(status_code=422, detail='One or more Node IDs do not exist in nodes table. Unknown nodes: {}'.format( ', '.join(wrongNodes)))
-        # Create Nodelist Object
-        session.add(list_obj)
-        # Add Node Link Table Entries (Relations)
-        session.add_all([db.NodeListNodeLink(
-                nodeId=nodeId,
-                listId=list_obj.id
-            ) for nodeId in nodeList.node_ids])
-        # Commit & refresh to get final object
-        session.commit()
-        session.refresh(list_obj)
+    # Check Nodes are valid
+    foundNodes: List[db.Node] = (await session.exec(query)).all()
+    if not len(foundNodes) == len(nodeList.node_ids):
+        wrongNodes = list(set(nodeList.node_ids).difference([str(node.id) for node in foundNodes]))
+        raise HTTPException(status_code=422, detail='One or more Node IDs do not exist in nodes table. Unknown nodes: {}'.format( ', '.join(wrongNodes)))
+    # Create Nodelist Object
+    session.add(list_obj)
+    # Add Node Link Table Entries (Relations)
+    session.add_all([db.NodeListNodeLink(
+            nodeId=nodeId,
+            listId=list_obj.id
+        ) for nodeId in nodeList.node_ids])
+    # Commit & refresh to get final object
+    await session.commit()
+    await session.refresh(list_obj)
     return ID(id=str(list_obj.id))
 
-def nodelist_get_by_id(id: StrictStr) -> NodeListWithNodes:
+async def nodelist_get_by_id(session: AsyncSession, id: StrictStr) -> NodeListWithNodes:
     query = select(db.NodeList).where(db.NodeList.id == id).options(selectinload(db.NodeList.nodeLinks).selectinload(db.NodeListNodeLink.node))
-    with next(get_session()) as session:
-        nodelist: db.NodeList = session.exec(query).one_or_none()
-        if not nodelist:
-            raise HTTPException(status_code=404, detail='A nodelist with this ID does not exist')
-        nodeIDs: List[Node] = [Node(
-            id=str(link.node.id),
-            nuts=link.node.nuts,
-            name=link.node.name
-            )for link in nodelist.nodeLinks]
+    nodelist: db.NodeList = (await session.exec(query)).one_or_none()
+    if not nodelist:
+        raise HTTPException(status_code=404, detail='A nodelist with this ID does not exist')
+    nodeIDs: List[Node] = [Node(
+        id=str(link.node.id),
+        nuts=link.node.nuts,
+        name=link.node.name
+        )for link in nodelist.nodeLinks]
     return NodeListWithNodes(
         id=str(nodelist.id),
         name=nodelist.name,
@@ -332,87 +334,81 @@ def nodelist_get_by_id(id: StrictStr) -> NodeListWithNodes:
         nodeIds=nodeIDs
     )
 
-def nodelist_get_all() -> List[ReducedInfo]:
+async def nodelist_get_all(session: AsyncSession) -> List[ReducedInfo]:
     query = select(db.NodeList)
-    with next(get_session()) as session:
-        nodelists: List[db.NodeList] = session.exec(query).all()
+    nodelists: List[db.NodeList] = (await session.exec(query)).all()
     return [ReducedInfo(
         id=str(list.id),
         name=list.name,
         description=list.description
     ) for list in nodelists]
 
-def nodelist_delete(id: StrictStr) -> None:
+async def nodelist_delete(session: AsyncSession, id: StrictStr) -> None:
     query = select(db.NodeList).where(db.NodeList.id == id).options(selectinload(db.NodeList.scenarios))
-    with next(get_session()) as session:
-        nodelist: db.NodeList = session.exec(query).one_or_none()
-        if not nodelist:
-            raise HTTPException(status_code=404, detail='A nodelist with this ID does not exist')
-        if len(nodelist.scenarios) > 0:
-            raise HTTPException(status_code=409, detail='Nodelist is still linked to scenarios: {}'.format(', '.join([str(link.id) for link in nodelist.scenarios])))
-        session.delete(nodelist)
-        session.commit()
+    nodelist: db.NodeList = (await session.exec(query)).one_or_none()
+    if not nodelist:
+        raise HTTPException(status_code=404, detail='A nodelist with this ID does not exist')
+    if len(nodelist.scenarios) > 0:
+        raise HTTPException(status_code=409, detail='Nodelist is still linked to scenarios: {}'.format(', '.join([str(link.id) for link in nodelist.scenarios])))
+    await session.delete(nodelist)
+    await session.commit()
     return
 
 
 ## Parameter Definitions ##
-def parameter_definition_create(parameter: ParameterDefinition) -> ID:
+async def parameter_definition_create(session: AsyncSession, parameter: ParameterDefinition) -> ID:
     definition_obj = db.ParameterDefinition(
         name=parameter.name,
         description=parameter.description
     )
-    with next(get_session()) as sesssion:
-        sesssion.add(definition_obj)
-        sesssion.commit()
-        sesssion.refresh(definition_obj)
+    session.add(definition_obj)
+    await session.commit()
+    await session.refresh(definition_obj)
     return ID(id=str(definition_obj.id))
 
-def parameter_definition_get_all() -> List[ParameterDefinition]:
+async def parameter_definition_get_all(session: AsyncSession) -> List[ParameterDefinition]:
     query = select(db.ParameterDefinition)
-    with next(get_session()) as session:
-        definitions: List[db.ParameterDefinition] = session.exec(query).all()
+    definitions: List[db.ParameterDefinition] = (await session.exec(query)).all()
     return [ParameterDefinition(
         id=str(definition.id),
         name=definition.name,
         description=definition.description
     ) for definition in definitions]
 
-def parameter_definition_get_by_id(id: StrictStr) -> ParameterDefinition:
+async def parameter_definition_get_by_id(session: AsyncSession, id: StrictStr) -> ParameterDefinition:
     query = select(db.ParameterDefinition).where(db.ParameterDefinition.id == id)
-    with next(get_session()) as session:
-        parameter: db.ParameterDefinition = session.exec(query).one_or_none()
-        if not parameter:
-            raise HTTPException(status_code=404, detail='A parameter definition with this ID does not exist')
+    parameter: db.ParameterDefinition = (await session.exec(query)).one_or_none()
+    if not parameter:
+        raise HTTPException(status_code=404, detail='A parameter definition with this ID does not exist')
     return ParameterDefinition(
         id=str(parameter.id),
         name=parameter.name,
         description=parameter.description
     )
 
-def parameter_definition_delete(id: StrictStr) -> None:
+async def parameter_definition_delete(session: AsyncSession, id: StrictStr) -> None:
     query = (
         select(db.ParameterDefinition).where(db.ParameterDefinition.id == id)
         .options(selectinload(db.ParameterDefinition.scenarioLinks))
         .options(selectinload(db.ParameterDefinition.modelLinks))
         )
-    with next(get_session()) as session:
-        definition: db.ParameterDefinition = session.exec(query).one_or_none()
-        if not definition:
-            raise HTTPException(status_code=404, detail='A parameter definition with this ID does not exist')
-        message = {}
-        if len(definition.scenarioLinks) > 0:
-            message['scenarios'] = 'Parameter Definition is still used in scenarios: {}'.format(', '.join([str(link.scenarioId) for link in definition.scenarioLinks]))
-        if len(definition.modelLinks) > 0:
-            message['models'] = 'Parameter Definition is still used in models: {}'.format(', '.join([str(link.modelId) for link in definition.modelLinks]))
-        if message:
-            raise HTTPException(status_code=409, detail=message)
-        session.delete(definition)
-        session.commit()
+    definition: db.ParameterDefinition = (await session.exec(query)).one_or_none()
+    if not definition:
+        raise HTTPException(status_code=404, detail='A parameter definition with this ID does not exist')
+    message = {}
+    if len(definition.scenarioLinks) > 0:
+        message['scenarios'] = 'Parameter Definition is still used in scenarios: {}'.format(', '.join([str(link.scenarioId) for link in definition.scenarioLinks]))
+    if len(definition.modelLinks) > 0:
+        message['models'] = 'Parameter Definition is still used in models: {}'.format(', '.join([str(link.modelId) for link in definition.modelLinks]))
+    if message:
+        raise HTTPException(status_code=409, detail=message)
+    await session.delete(definition)
+    await session.commit()
     return
 
 
 ## Scenarios ##
-def scenario_create(scenario: Scenario) -> ID:
+async def scenario_create(session: AsyncSession, scenario: Scenario) -> ID:
     scenario_obj = db.Scenario(
         name=scenario.name,
         description=scenario.description,
@@ -426,105 +422,103 @@ def scenario_create(scenario: Scenario) -> ID:
         creatorUserId=scenario.creator_user_id,
         creatorOrgId=scenario.creator_org_id
     )
-    with next(get_session()) as session:
-        nested_dict = lambda: defaultdict(nested_dict)
-        message = nested_dict()
-        # validate model
-        model: db.Model = session.exec(
-            select(db.Model).where(db.Model.id == scenario.model_id)
-            .options(selectinload(db.Model.parameterDefinitions))
-            .options(selectinload(db.Model.groups))
-        ).one_or_none()
-        if not model:
-            message['modelId'] = 'A model with this ID does not exist'
-        # validate node list
-        nodelist: db.NodeList = session.exec(
-            select(db.NodeList).where(db.NodeList.id == scenario.node_list_id)
-        ).one_or_none()
-        if not nodelist:
-            message['nodeListID'] = 'A nodelist with this ID does not exist'
-        # validate interventions (if there are any)
-        if scenario.linked_interventions:
-            foundInterventions: List[db.InterventionTemplate] = session.exec(
-                select(db.InterventionTemplate).where(db.InterventionTemplate.id.in_([intervention.intervention_id for intervention in scenario.linked_interventions]))
-            ).all()
-            if not len(foundInterventions) == len(scenario.linked_interventions):
-                wrongInterventions = list(set([intervention.intervention_id for intervention in scenario.linked_interventions]).difference([str(intervention.id) for intervention in foundInterventions]))
-                message['linkedInterventions'] = 'One or more linked interventions do not exist in intervention template table. Unknown interventions: {}'.format(', '.join(wrongInterventions))
-        # validate parameters
-        if model:
-            # check each parameter matches model parameters
-            params_onModel = set([str(definition.parameterId) for definition in model.parameterDefinitions])
-            params_onScenario = set([impl.parameter_id for impl in scenario.model_parameters])
-            if params_onModel.difference(params_onScenario):
-                message['modelParameters']['missing'] = 'One or parameters of model {modelID} are not defined. Missing parameters: {params}'.format(modelID=str(model.id), params=', '.join(params_onModel.difference(params_onScenario)))
-            if params_onScenario.difference(params_onModel):
-                message['modelParameters']['unknown'] = 'One or more parameters do not exist in model {modelID}. Unknown parameters: {params}'.format(modelID=str(model.id), params=', '.join(params_onScenario.difference(params_onModel)))
-            # check each parameter group matches model groups
-            groups_onModel = set([str(group.groupId) for group in model.groups])
-            for parameter in scenario.model_parameters:
-                groups_onParameter = set([group.group_id for group in parameter.values])
-                if groups_onModel.difference(groups_onParameter):
-                    message['modelParameters'][parameter.parameter_id]['missing'] = 'One or more groups of model {modelID} are not defined. Missing groups: {groups}'.format(modelID=str(model.id), groups=', '.join(groups_onModel.difference(groups_onParameter)))
-                if groups_onParameter.difference(groups_onModel):
-                    message['modelParameters'][parameter.parameter_id]['unknown'] = 'One or more groups do not exist in model {modelID}. Unknown groups: {groups}'.format(modelID=str(model.id), groups=', '.join(groups_onParameter.difference(groups_onModel)))
-        # Raise exception if anyvalidation issues found
-        if message:
-            raise HTTPException(status_code=422, detail=json.loads(json.dumps(message)))
-        
-        # Otherwise create Scenario & Link Table entries
-        session.add(scenario_obj)
-        # Intervention Implementation Links (if there are interventions)
-        if scenario.linked_interventions:
-            session.add_all([db.InterventionImplementation(
-                    scenarioId=scenario_obj.id,
-                    interventionId=intervention.intervention_id,
-                    startDate=intervention.start_date,
-                    endDate=intervention.end_date,
-                    coefficient=intervention.coefficient,
-                ) for intervention in scenario.linked_interventions])
-        # Parameter Value Links
+    nested_dict = lambda: defaultdict(nested_dict)
+    message = nested_dict()
+    # validate model
+    model: db.Model = (await session.exec(
+        select(db.Model).where(db.Model.id == scenario.model_id)
+        .options(selectinload(db.Model.parameterDefinitions))
+        .options(selectinload(db.Model.groups))
+    )).one_or_none()
+    if not model:
+        message['modelId'] = 'A model with this ID does not exist'
+    # validate node list
+    nodelist: db.NodeList = (await session.exec(
+        select(db.NodeList).where(db.NodeList.id == scenario.node_list_id)
+    )).one_or_none()
+    if not nodelist:
+        message['nodeListID'] = 'A nodelist with this ID does not exist'
+    # validate interventions (if there are any)
+    if scenario.linked_interventions:
+        foundInterventions: List[db.InterventionTemplate] = (await session.exec(
+            select(db.InterventionTemplate).where(db.InterventionTemplate.id.in_([intervention.intervention_id for intervention in scenario.linked_interventions]))
+        )).all()
+        if not len(foundInterventions) == len(scenario.linked_interventions):
+            wrongInterventions = list(set([intervention.intervention_id for intervention in scenario.linked_interventions]).difference([str(intervention.id) for intervention in foundInterventions]))
+            message['linkedInterventions'] = 'One or more linked interventions do not exist in intervention template table. Unknown interventions: {}'.format(', '.join(wrongInterventions))
+    # validate parameters
+    if model:
+        # check each parameter matches model parameters
+        params_onModel = set([str(definition.parameterId) for definition in model.parameterDefinitions])
+        params_onScenario = set([impl.parameter_id for impl in scenario.model_parameters])
+        if params_onModel.difference(params_onScenario):
+            message['modelParameters']['missing'] = 'One or parameters of model {modelID} are not defined. Missing parameters: {params}'.format(modelID=str(model.id), params=', '.join(params_onModel.difference(params_onScenario)))
+        if params_onScenario.difference(params_onModel):
+            message['modelParameters']['unknown'] = 'One or more parameters do not exist in model {modelID}. Unknown parameters: {params}'.format(modelID=str(model.id), params=', '.join(params_onScenario.difference(params_onModel)))
+        # check each parameter group matches model groups
+        groups_onModel = set([str(group.groupId) for group in model.groups])
         for parameter in scenario.model_parameters:
-            session.add(db.ParameterValue(
-            scenarioId=scenario_obj.id,
-            definitionId=parameter.parameter_id,
-            ))
-            # Parameter Value Entry Links
-            session.add_all([db.ParameterValueEntry(
-                parameterValueIdScenario=scenario_obj.id,
-                parameterValueIdDefinition=parameter.parameter_id,
-                groupId=group.group_id,
-                valueMin=group.value_min,
-                valueMax=group.value_max,
-            ) for group in parameter.values])
-        session.commit()
-        session.refresh(scenario_obj)
+            groups_onParameter = set([group.group_id for group in parameter.values])
+            if groups_onModel.difference(groups_onParameter):
+                message['modelParameters'][parameter.parameter_id]['missing'] = 'One or more groups of model {modelID} are not defined. Missing groups: {groups}'.format(modelID=str(model.id), groups=', '.join(groups_onModel.difference(groups_onParameter)))
+            if groups_onParameter.difference(groups_onModel):
+                message['modelParameters'][parameter.parameter_id]['unknown'] = 'One or more groups do not exist in model {modelID}. Unknown groups: {groups}'.format(modelID=str(model.id), groups=', '.join(groups_onParameter.difference(groups_onModel)))
+    # Raise exception if anyvalidation issues found
+    if message:
+        raise HTTPException(status_code=422, detail=json.loads(json.dumps(message)))
+        
+    # Otherwise create Scenario & Link Table entries
+    session.add(scenario_obj)
+    # Intervention Implementation Links (if there are interventions)
+    if scenario.linked_interventions:
+        session.add_all([db.InterventionImplementation(
+                scenarioId=scenario_obj.id,
+                interventionId=intervention.intervention_id,
+                startDate=intervention.start_date,
+                endDate=intervention.end_date,
+                coefficient=intervention.coefficient,
+            ) for intervention in scenario.linked_interventions])
+    # Parameter Value Links
+    for parameter in scenario.model_parameters:
+        session.add(db.ParameterValue(
+        scenarioId=scenario_obj.id,
+        definitionId=parameter.parameter_id,
+        ))
+        # Parameter Value Entry Links
+        session.add_all([db.ParameterValueEntry(
+            parameterValueIdScenario=scenario_obj.id,
+            parameterValueIdDefinition=parameter.parameter_id,
+            groupId=group.group_id,
+            valueMin=group.value_min,
+            valueMax=group.value_max,
+        ) for group in parameter.values])
+    await session.commit()
+    await session.refresh(scenario_obj)
     return ID(id=str(scenario_obj.id))
 
-def scenario_get_by_id(id: StrictStr) -> Scenario:
+async def scenario_get_by_id(session: AsyncSession, id: StrictStr) -> Scenario:
     query = (
         select(db.Scenario).where(db.Scenario.id == id)
         .options(selectinload(db.Scenario.modelParameters).selectinload(db.ParameterValue.values))
         .options(selectinload(db.Scenario.linkedInterventions))
         )
-    with next(get_session()) as session:
-        scenario: db.Scenario = session.exec(query).one_or_none()
-        if not scenario:
-            raise HTTPException(status_code=404, detail='a scenario with this ID does not exist')
-        modelParams: List[ParameterValue] = [ParameterValue(
-            parameterId=str(value.definitionId),
-            values=[ParameterValueEntry(
-                groupId=str(entry.groupId),
-                valueMin=entry.valueMin,
-                valueMax=entry.valueMax,
-            ) for entry in value.values]
-        ) for value in scenario.modelParameters]
-        linkedInterventions=[InterventionImplementation(
-            interventionId=str(intervention.interventionId),
-            startDate=intervention.startDate,
-            endDate=intervention.endDate,
-            coefficient=intervention.coefficient,
-        ) for intervention in scenario.linkedInterventions]
+    scenario: db.Scenario = (await session.exec(query)).one_or_none()
+    if not scenario:
+        raise HTTPException(status_code=404, detail='a scenario with this ID does not exist')
+    modelParams: List[ParameterValue] = [ParameterValue(
+        parameterId=str(value.definitionId),
+        values=[ParameterValueEntry(
+            groupId=str(entry.groupId),
+            valueMin=entry.valueMin,
+            valueMax=entry.valueMax,
+        ) for entry in value.values]
+    ) for value in scenario.modelParameters]
+    linkedInterventions=[InterventionImplementation(
+        interventionId=str(intervention.interventionId),
+        startDate=intervention.startDate,
+        endDate=intervention.endDate,
+        coefficient=intervention.coefficient,
+    ) for intervention in scenario.linkedInterventions]
     return Scenario(
         id=str(scenario.id),
         name=scenario.name,
@@ -542,10 +536,9 @@ def scenario_get_by_id(id: StrictStr) -> Scenario:
         creator_org_id=scenario.creatorOrgId
     )
 
-def scenario_get_all() -> List[ReducedScenario]:
+async def scenario_get_all(session: AsyncSession) -> List[ReducedScenario]:
     query = select(db.Scenario)
-    with next(get_session()) as session:
-        scenarios: List[db.Scenario] = session.exec(query).all()
+    scenarios: List[db.Scenario] = (await session.exec(query)).all()
     return [ReducedScenario(
         id=str(sc.id),
         name=sc.name,
@@ -557,126 +550,533 @@ def scenario_get_all() -> List[ReducedScenario]:
         timestampSimulated=sc.timestampSimulated,
     ) for sc in scenarios]
 
-def scenario_delete(id: StrictStr) -> None:
+async def scenario_get_timestamp_simulated(session: AsyncSession, id: StrictStr) -> Optional[datetime]:
+    """Time of the last data import of a scenario (None if no data was imported yet), the version of its data."""
+    query = select(db.Scenario.timestampSimulated, db.Scenario.id).where(db.Scenario.id == id)
+    scenario = (await session.exec(query)).one_or_none()
+    if not scenario:
+        raise HTTPException(status_code=404, detail='a scenario with this ID does not exist')
+    return scenario.timestampSimulated
+
+
+async def scenario_delete(session: AsyncSession, id: StrictStr) -> None:
     query = (
-        select(db.Scenario).where(db.Scenario.id == id)
+        select(db.Scenario.id).where(db.Scenario.id == id)
     )
-    with next(get_session()) as session:
-        scenario: db.Scenario = session.exec(query).one_or_none()
-        if not scenario:
-            raise HTTPException(status_code=404, detail='A scenario with this ID does not exist')
-        
-        # Delete Intervention Implementations for this scenario
-        interventions: List[db.InterventionImplementation] = session.exec(
-            select(db.InterventionImplementation).where(db.InterventionImplementation.scenarioId == id)
-        ).all()
-        for intervention in interventions:
-            session.delete(intervention)
-        # Delete Parameter Values for this scenario
-        parameters: List[db.ParameterValue] = session.exec(
-            select(db.ParameterValue).where(db.ParameterValue.scenarioId == id)
-        ).all()
-        for param in parameters:
-            session.delete(param)
-        # Delete Parameter Value Entries tied to the parameter values (also found by scenario id due to composite key)
-        entries: List[db.ParameterValueEntry] = session.exec(
-            select(db.ParameterValueEntry).where(db.ParameterValueEntry.parameterValueIdScenario == id)
-        ).all()
-        for entry in entries:
-            session.delete(entry)
-        # Delete all datapoints associated to the scenario
-        data: List[db.ScenarioDatapoint] = session.exec(
-            select(db.ScenarioDatapoint).where(db.ScenarioDatapoint.scenarioId == id)
-        ).all()
-        for point in data:
-            session.delete(point)
-
-        # Finally delete scenario
-        session.delete(scenario)
-        session.commit()
+    if not (await session.exec(query)).one_or_none():
+        raise HTTPException(status_code=404, detail='A scenario with this ID does not exist')
+
+    # Delete all datapoints associated to the scenario by dropping its partition
+    await datapoint_partition_drop(session, id)
+    # Delete the scenario with a single statement, the database cascades to
+    # intervention implementations, parameter values (and their entries) and series
+    await session.exec(delete(db.Scenario).where(db.Scenario.id == id))
+    await session.commit()
     return
 
-def scenario_get_data_by_filter(
+def _scenario_data_source(
+    scenarioId: StrictStr,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    use_series: bool,
+    use_staging: bool = False,
+) -> Subquery:
+    """
+    Selectable with one row per datapoint of a scenario (nodeId, groupId, compartmentId, percentile, date, value),
+    read from the storage layout the scenario was imported with (use_series, see `_has_series`)
+    or, with use_staging, from the rows of a running import (see `datapoint_update_all_by_scenario`).
+    The date range is applied here, series are sliced server-side before being expanded into rows.
+    """
+    if not use_series:
+        points = datapoint_staging_table(scenarioId).c if use_staging else db.ScenarioDatapoint
+        query = select(
+            points.nodeId, points.groupId, points.compartmentId, points.percentile, points.date, points.value
+        ).where(points.scenarioId == scenarioId)
+        if start_date:
+            query = query.where(points.date >= start_date)
+        if end_date:
+            query = query.where(points.date <= end_date)
+        return query.subquery('datapoints')
+
+    series = db.ScenarioSeries
+    # 1-based array bounds of the requested date range (Postgres clamps slices to the array bounds)
+    first = func.greatest(start_date - db.Scenario.startDate + 1, 1) if start_date else literal(1)
+    last = end_date - db.Scenario.startDate + 1 if end_date else func.cardinality(series.values)
+    day = func.unnest(series.values[first:last]).table_valued(
+        'value', with_ordinality='ordinality'
+    ).render_derived('day')
+    query = select(
+        series.nodeId,
+        series.groupId,
+        series.compartmentId,
+        series.percentile,
+        (db.Scenario.startDate + cast(first + day.c.ordinality - 2, Integer)).label('date'),
+        day.c.value,
+    ).select_from(series).join(
+        db.Scenario, db.Scenario.id == series.scenarioId
+    ).join(
+        day, true()
+    ).where(series.scenarioId == scenarioId).where(day.c.value != float('nan'))
+    return query.subquery('datapoints')
+
+
+async def _has_series(session: AsyncSession, scenarioId: StrictStr) -> bool:
+    """
+    Whether the scenario's data is stored as series. An import stores a scenario in one layout only,
+    so scenarios imported before SCENARIO_DATA_STORAGE was switched are read from their original layout.
+    """
+    series = db.ScenarioSeries
+    query = select(series.scenarioId).where(series.scenarioId == scenarioId).limit(1)
+    return (await session.exec(query)).first() is not None
+
+
+def _aggregation_compartments(aggregations: Dict[str, List[StrictStr]]) -> Select:
+    """
+    Selectable mapping each named aggregation to the compartments carrying all of its tags (aggregation, compartmentId).
+    Compartment tags are stored comma separated, they are matched in the database.
+    """
+    return union_all(*(
+        select(
+            literal(name, String).label('aggregation'),
+            db.Compartment.id.label('compartmentId')
+        ).where(func.string_to_array(db.Compartment.tags, ',', type_=ARRAY(Text)).contains(cast(tags, ARRAY(Text))))
+        for name, tags in aggregations.items()
+    ))
+
+
+def _node_regions(level: SpatialAggregation) -> Select:
+    """
+    Selectable mapping county nodes to the regions of the given level (nodeId, region).
+    States are the first two digits of the county key,
+    intermediate regions come from `IntermediateRegionIDsToCountyIDs`.
+    """
+    if level == SpatialAggregation.STATE:
+        return select(db.Node.id.label('nodeId'), func.substr(db.Node.nuts, 1, 2).label('region'))
+    counties = values(column('nuts', String), column('region', String), name='county_regions').data([
+        (str(county).zfill(5), str(region))
+        for region, counties in IntermediateRegionIDsToCountyIDs.items()
+        for county in counties
+    ])
+    return select(db.Node.id.label('nodeId'), counties.c.region).join(counties, counties.c.nuts == db.Node.nuts)
+
+
+def _region_rollup_source(
+    scenarioId: StrictStr,
+    level: SpatialAggregation,
+    start_date: Optional[date],
+    end_date: Optional[date],
+) -> Subquery:
+    """Precomputed roll-up of a scenario as data source (region in place of nodeId)."""
+    rollup = db.ScenarioRegionDatapoint
+    query = select(
+        rollup.region.label('nodeId'), rollup.groupId, rollup.compartmentId, rollup.percentile,
+        rollup.date, rollup.value
+    ).where(rollup.scenarioId == scenarioId, rollup.level == level.value)
+    if start_date:
+        query = query.where(rollup.date >= start_date)
+    if end_date:
+        query = query.where(rollup.date <= end_date)
+    return query.subquery('datapoints')
+
+
+async def _has_region_rollup(session: AsyncSession, scenarioId: StrictStr, level: Optional[SpatialAggregation]) -> bool:
+    """Whether the scenario's data can be served from the precomputed roll-up of the given level."""
+    if not level or not config.SCENARIO_REGION_ROLLUP:
+        return False
+    rollup = db.ScenarioRegionDatapoint
+    return (await session.exec(
+        select(rollup.scenarioId).where(rollup.scenarioId == scenarioId, rollup.level == level.value).limit(1)
+    )).first() is not None
+
+
+def _totals_source(
+    scenarioId: StrictStr,
+    node_total: bool,
+    group_total: bool,
+    start_date: Optional[date],
+    end_date: Optional[date],
+) -> Subquery:
+    """Materialized totals of a scenario as data source (node and group IDs as strings)."""
+    totals = db.ScenarioTotalDatapoint
+    query = select(
+        totals.nodeId, totals.groupId, totals.compartmentId, totals.percentile, totals.date, totals.value
+    ).where(
+        totals.scenarioId == scenarioId,
+        totals.nodeId == TOTAL_KEY if node_total else totals.nodeId != TOTAL_KEY,
+        totals.groupId == TOTAL_KEY if group_total else totals.groupId != TOTAL_KEY,
+    )
+    if start_date:
+        query = query.where(totals.date >= start_date)
+    if end_date:
+        query = query.where(totals.date <= end_date)
+    return query.subquery('datapoints')
+
+
+async def _has_totals(
+    session: AsyncSession,
+    scenarioId: StrictStr,
+    nodes: Optional[List[StrictStr]],
+    groups: Optional[List[StrictStr]],
+) -> bool:
+    """Whether totals are requested and the scenario's totals were materialized during import."""
+    if TOTAL_KEY not in (nodes or []) and TOTAL_KEY not in (groups or []):
+        return False
+    totals = db.ScenarioTotalDatapoint
+    query = select(totals.scenarioId).where(totals.scenarioId == scenarioId).limit(1)
+    return (await session.exec(query)).first() is not None
+
+
+def _split_total(keys: Optional[List[StrictStr]]) -> List[Tuple[bool, Optional[List[StrictStr]]]]:
+    """Split a node or group filter into the requested parts: (total, keys of single nodes or groups)."""
+    if not keys or TOTAL_KEY not in keys:
+        return [(False, keys)]
+    singles = [key for key in keys if key != TOTAL_KEY]
+    return [(True, None)] + ([(False, singles)] if singles else [])
+
+
+def _scenario_data_query(
     scenarioId: StrictStr,
     nodes: Optional[List[StrictStr]],
     start_date: Optional[date],
     end_date: Optional[date],
     compartments: Optional[List[StrictStr]],
-    # aggregations: Optional[Dict[str, Dict[str, List[StrictStr]]]],
     groups: Optional[List[StrictStr]],
     percentiles: Optional[List[StrictInt]],
-) -> List[Infectiondata]:
+    aggregations: Optional[Dict[str, List[StrictStr]]] = None,
+    spatial_aggregation: Optional[SpatialAggregation] = None,
+    use_rollup: bool = False,
+    use_totals: bool = False,
+    use_series: bool = False,
+    use_staging: bool = False,
+) -> Select:
+    """
+    Query for the datapoints of a scenario matching the filters
+    (nodeId, groupId, compartmentId, aggregation, percentile, date, value).
+    With aggregations, the values of the compartments matching each aggregation's tags are summed up per
+    node, group, percentile and date instead (compartmentId is NULL, aggregation holds the name).
+    With a spatial aggregation, nodes are rolled up to the regions of that level (nodeId holds the region key and
+    the nodes filter selects regions), either on the fly or from the precomputed roll-up (use_rollup).
+    TOTAL_KEY in the nodes or groups filter requests the sum over all nodes or groups (labelled TOTAL_KEY),
+    either on the fly or from the materialized totals (use_totals). Node and group IDs are strings then.
+    Datapoints are read from the rows or, with use_series, the series of the scenario
+    (with use_staging, from the rows of a running import).
+    """
+    # Totals are labelled with a string, so all parts of a request return node and group IDs as strings
+    as_strings = TOTAL_KEY in (nodes or []) or TOTAL_KEY in (groups or [])
+    parts = [
+        _scenario_data_part(
+            scenarioId, node_total, node_keys, group_total, group_keys, start_date, end_date, compartments,
+            percentiles, aggregations, spatial_aggregation, use_rollup, use_totals, use_series, use_staging,
+            as_strings
+        )
+        for node_total, node_keys in _split_total(nodes)
+        for group_total, group_keys in _split_total(groups)
+    ]
+    if len(parts) == 1:
+        return parts[0]
+    return select(*union_all(*parts).subquery('parts').c)
+
+
+def _scenario_data_part(
+    scenarioId: StrictStr,
+    node_total: bool,
+    nodes: Optional[List[StrictStr]],
+    group_total: bool,
+    groups: Optional[List[StrictStr]],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    compartments: Optional[List[StrictStr]],
+    percentiles: Optional[List[StrictInt]],
+    aggregations: Optional[Dict[str, List[StrictStr]]],
+    spatial_aggregation: Optional[SpatialAggregation],
+    use_rollup: bool,
+    use_totals: bool,
+    use_series: bool,
+    use_staging: bool,
+    as_strings: bool,
+) -> Select:
+    """Query for one combination of (total or single) nodes and groups of `_scenario_data_query`."""
     # validate scenario ID?
-    query = select(db.ScenarioDatapoint).where(db.ScenarioDatapoint.scenarioId == scenarioId)
+    # The total over all nodes does not depend on the regions
+    if node_total:
+        spatial_aggregation = None
+    # Totals per region are not materialized
+    materialized = use_totals and (node_total or (group_total and not spatial_aggregation))
+    if materialized:
+        source = _totals_source(scenarioId, node_total, group_total, start_date, end_date)
+    elif spatial_aggregation and use_rollup:
+        source = _region_rollup_source(scenarioId, spatial_aggregation, start_date, end_date)
+        spatial_aggregation = None
+    else:
+        source = _scenario_data_source(scenarioId, start_date, end_date, use_series, use_staging)
+    source_from = source
+    summed = False
+    node = source.c.nodeId
+    group = source.c.groupId
+    if spatial_aggregation:
+        regions = _node_regions(spatial_aggregation).subquery('regions')
+        source_from = source_from.join(regions, regions.c.nodeId == source.c.nodeId)
+        node = regions.c.region
+        summed = True
+    compartment = source.c.compartmentId
+    aggregation = null()
+    if aggregations:
+        mapping = _aggregation_compartments(aggregations).subquery('aggregations')
+        source_from = source_from.join(mapping, mapping.c.compartmentId == source.c.compartmentId)
+        compartment = null()
+        aggregation = mapping.c.aggregation
+        summed = True
+
+    filters = []
     # if nodes supplied select only those node else return all
     if nodes:
-        query = query.where(db.ScenarioDatapoint.nodeId.in_(nodes))
-    if start_date:
-        query = query.where(db.ScenarioDatapoint.timestamp >= datetime.combine(start_date, time.min))
-    if end_date:
-        query = query.where(db.ScenarioDatapoint.timestamp <= datetime.combine(end_date, time.min))
+        filters.append(node.in_(nodes))
     if compartments:
-        query = query.where(db.ScenarioDatapoint.compartmentId.in_(compartments))
+        filters.append(source.c.compartmentId.in_(compartments))
     if groups:
-        query = query.where(db.ScenarioDatapoint.groupId.in_(groups))
+        filters.append(group.in_(groups))
     if percentiles:
-        query = query.where(db.ScenarioDatapoint.percentile.in_(percentiles))
-    
-    with next(get_session()) as session:
-        datapoints: List[db.ScenarioDatapoint] = session.exec(query).all()
-    return [Infectiondata(
-        date=point.timestamp.date(),
+        filters.append(source.c.percentile.in_(percentiles))
+
+    # Columns the values are summed up per
+    keys = [source.c.percentile, source.c.date]
+    if aggregations:
+        keys.append(aggregation)
+    else:
+        keys.append(compartment)
+    if node_total and not materialized:
+        node = literal(TOTAL_KEY, String)
+        summed = True
+    else:
+        keys.append(node)
+    if group_total and not materialized:
+        group = literal(TOTAL_KEY, String)
+        summed = True
+    else:
+        keys.append(group)
+    if as_strings:
+        node, group = cast(node, String), cast(group, String)
+
+    query = select(
+        node.label('nodeId'),
+        group.label('groupId'),
+        compartment.label('compartmentId'),
+        aggregation.label('aggregation'),
+        source.c.percentile,
+        source.c.date,
+        (func.sum(source.c.value) if summed else source.c.value).label('value'),
+    ).select_from(source_from).where(*filters)
+    if summed:
+        query = query.group_by(*keys)
+    return query
+
+
+async def scenario_region_rollup_update(
+    session: AsyncSession,
+    scenarioId: StrictStr,
+    use_staging: bool = False,
+) -> None:
+    """
+    Recompute the roll-up of a scenario's datapoints to all region levels in the session's transaction.
+    With use_staging, from the rows loaded by a running import (see `datapoint_update_all_by_scenario`).
+    """
+    rollup = db.ScenarioRegionDatapoint
+    await session.exec(delete(rollup).where(rollup.scenarioId == scenarioId))
+    # Let the grouping of the whole scenario run as in-memory hash aggregate instead of an external sort
+    await session.exec(text(f"SET LOCAL work_mem = '{MATERIALIZE_WORK_MEM}'"))
+    use_series = not use_staging and await _has_series(session, scenarioId)
+    for level in SpatialAggregation:
+        data = _scenario_data_query(
+            scenarioId, None, None, None, None, None, None, spatial_aggregation=level, use_series=use_series,
+            use_staging=use_staging
+        ).subquery()
+        await session.exec(insert(rollup).from_select(
+            ['scenarioId', 'level', 'region', 'groupId', 'compartmentId', 'percentile', 'date', 'value'],
+            select(
+                literal(UUID(str(scenarioId)), Uuid), literal(level.value), data.c.nodeId, data.c.groupId,
+                data.c.compartmentId, data.c.percentile, data.c.date, data.c.value
+            )
+        ))
+
+
+async def scenario_totals_update(session: AsyncSession, scenarioId: StrictStr, use_staging: bool = False) -> None:
+    """
+    Recompute the sums of a scenario's datapoints over all groups, all nodes and both in the session's transaction.
+    All three are computed in one pass over the datapoints using grouping sets.
+    With use_staging, from the rows loaded by a running import (see `datapoint_update_all_by_scenario`).
+    """
+    totals = db.ScenarioTotalDatapoint
+    await session.exec(delete(totals).where(totals.scenarioId == scenarioId))
+    # Let the grouping of the whole scenario run as in-memory hash aggregate instead of an external sort
+    await session.exec(text(f"SET LOCAL work_mem = '{MATERIALIZE_WORK_MEM}'"))
+    use_series = not use_staging and await _has_series(session, scenarioId)
+    data = _scenario_data_source(scenarioId, None, None, use_series, use_staging)
+    common = (data.c.compartmentId, data.c.percentile, data.c.date)
+    await session.exec(insert(totals).from_select(
+        ['scenarioId', 'nodeId', 'groupId', 'compartmentId', 'percentile', 'date', 'value'],
+        select(
+            literal(UUID(str(scenarioId)), Uuid),
+            # The summed dimension is NULL in its grouping set
+            func.coalesce(cast(data.c.nodeId, String), TOTAL_KEY),
+            func.coalesce(cast(data.c.groupId, String), TOTAL_KEY),
+            *common,
+            func.sum(data.c.value),
+        ).group_by(func.grouping_sets(
+            tuple_(data.c.nodeId, *common), tuple_(data.c.groupId, *common), tuple_(*common)
+        ))
+    ))
+
+
+def _response_value(value: ColumnElement) -> ColumnElement:
+    """
+    The stored float4 value as the double with the same shortest decimal representation (0.1 instead of
+    0.10000000149011612), so responses show the imported values without artifacts of the single precision storage.
+    Postgres formats float4 as the shortest text that reads back as the same float4.
+    """
+    return cast(cast(value, Text), Double)
+
+
+async def scenario_get_data_by_filter(
+    session: AsyncSession,
+    scenarioId: StrictStr,
+    nodes: Optional[List[StrictStr]],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    compartments: Optional[List[StrictStr]],
+    aggregations: Optional[Dict[str, List[StrictStr]]],
+    groups: Optional[List[StrictStr]],
+    percentiles: Optional[List[StrictInt]],
+    spatial_aggregation: Optional[SpatialAggregation] = None,
+) -> List[Infectiondata]:
+    source = _scenario_data_query(
+        scenarioId, nodes, start_date, end_date, compartments, groups, percentiles, aggregations,
+        spatial_aggregation, await _has_region_rollup(session, scenarioId, spatial_aggregation),
+        await _has_totals(session, scenarioId, nodes, groups), await _has_series(session, scenarioId)
+    ).subquery()
+    query = select(
+        source.c.nodeId,
+        source.c.groupId,
+        source.c.compartmentId,
+        source.c.aggregation,
+        source.c.percentile,
+        source.c.date,
+        _response_value(source.c.value).label('value'),
+    )
+    datapoints = (await session.exec(query)).all()
+    # Building the models of large results takes a while, keep it off the event loop
+    return await run_in_threadpool(lambda: [Infectiondata(
+        date=point.date,
         node=str(point.nodeId),
         group=str(point.groupId),
-        compartment=str(point.compartmentId),
-        # aggregation=
+        compartment=str(point.compartmentId) if point.compartmentId else None,
+        aggregation=point.aggregation,
         percentile=point.percentile,
         value=point.value
-    ) for point in datapoints]
+    ) for point in datapoints])
+
 
-def datapoint_update_all_by_scenario(
+async def scenario_stream_data_by_filter(
     scenarioId: StrictStr,
-    datapoints: List[Infectiondata]
+    nodes: Optional[List[StrictStr]],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    compartments: Optional[List[StrictStr]],
+    aggregations: Optional[Dict[str, List[StrictStr]]],
+    groups: Optional[List[StrictStr]],
+    percentiles: Optional[List[StrictInt]],
+    spatial_aggregation: Optional[SpatialAggregation] = None,
+    batch_size: int = DATA_STREAM_BATCH_SIZE,
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Stream the datapoints matching the filters in batches of rows
+    (nodeId, groupId, compartmentId, aggregation, percentile, date, value) using a server-side cursor.
+    IDs are returned as strings, which spares parsing and formatting millions of UUID objects.
+    Uses its own session, which stays open until the generator is exhausted or closed,
+    since the response is streamed after the request's session dependency has been released.
+    """
+    async with create_session() as session:
+        source = _scenario_data_query(
+            scenarioId, nodes, start_date, end_date, compartments, groups, percentiles, aggregations,
+            spatial_aggregation, await _has_region_rollup(session, scenarioId, spatial_aggregation),
+            await _has_totals(session, scenarioId, nodes, groups), await _has_series(session, scenarioId)
+        ).subquery()
+        query = select(
+            *(cast(source.c[column], String).label(column) for column in ('nodeId', 'groupId', 'compartmentId')),
+            source.c.aggregation,
+            source.c.percentile,
+            source.c.date,
+            _response_value(source.c.value).label('value'),
+        )
+        result = await session.stream(query.execution_options(yield_per=batch_size))
+        async for batch in result.partitions():
+            yield batch
+
+
+async def datapoint_update_all_by_scenario(
+    session: AsyncSession,
+    scenarioId: StrictStr,
+    datapoints: Dict[str, numpy.ndarray]
 ) -> None:
+    """
+    Replace all datapoints of a scenario.
+    Readers keep seeing the old datapoints until the new ones are committed. Rows are loaded into a staging table
+    that replaces the scenario's partition only at the end, so the datapoint table is locked just for that swap.
+    Args:
+        datapoints: columnar arrays ('dayOffset', 'nodeId', 'groupId', 'compartmentId', 'percentile', 'value')
+            with the day offsets relative to the scenario start date
+    """
+    # The whole scenario is replaced in one transaction, which may take longer than the API's statement timeout
+    await session.exec(text('SET LOCAL statement_timeout = 0'))
     query = select(db.Scenario).where(db.Scenario.id == scenarioId)
-    with next(get_session()) as session:
-        # Delete old datapoints
-        session.exec(
-            # SQLAlchemy Statement to delete all records without loading all found entries into memory
-            delete(db.ScenarioDatapoint).where(db.ScenarioDatapoint.scenarioId == scenarioId)
+    scenario: db.Scenario = (await session.exec(query)).one_or_none()
+    if not scenario:
+        raise HTTPException(status_code=404, detail='A scenario with this ID does not exist')
+    # Delete old datapoints of both storage layouts, the scenario is stored in the configured layout only
+    # (reads pick the layout that holds the scenario's data, see _has_series)
+    await session.exec(delete(db.ScenarioSeries).where(db.ScenarioSeries.scenarioId == scenarioId))
+    # Stream new datapoints into the table (same transaction as the delete)
+    use_staging = config.SCENARIO_DATA_STORAGE != 'series'
+    if use_staging:
+        # Load the rows next to the scenario's partition instead of emptying it
+        await datapoint_staging_create(session, scenarioId)
+        await datapoint_copy(session, scenarioId, scenario.startDate, datapoints)
+    else:
+        await series_copy(session, scenarioId, datapoints)
+    # Materialize the totals over groups and nodes from the new datapoints
+    await scenario_totals_update(session, scenarioId, use_staging)
+    # Precompute the region roll-up from the new datapoints (or drop the outdated one)
+    if config.SCENARIO_REGION_ROLLUP:
+        await scenario_region_rollup_update(session, scenarioId, use_staging)
+    else:
+        await session.exec(
+            delete(db.ScenarioRegionDatapoint).where(db.ScenarioRegionDatapoint.scenarioId == scenarioId)
         )
-        # Add new datapoints
-        session.add_all([db.ScenarioDatapoint(
-            scenarioId=scenarioId,
-            timestamp=datetime.combine(dp.var_date, time.min),
-            nodeId=dp.node,
-            groupId=dp.group,
-            compartmentId=dp.compartment,
-            percentile=dp.percentile,
-            value=dp.value
-        ) for dp in datapoints])
-        # Update timestampSimulated
-        scenario: db.Scenario = session.exec(query).one_or_none()
-        scenario.timestampSimulated = datetime.now()
-        session.add(scenario)
-        session.commit()
+    # Replace (or drop) the scenario's partition last, this locks the datapoint table until the commit below
+    if use_staging:
+        await datapoint_staging_swap(session, scenarioId)
+    else:
+        await datapoint_partition_drop(session, scenarioId)
+    # Update timestampSimulated
+    scenario.timestampSimulated = datetime.now()
+    session.add(scenario)
+    await session.commit()
     return
 
 
-def scenario_update_description(
+async def scenario_update_description(
+    session: AsyncSession,
     scenarioId: StrictStr,
     description: StrictStr
 ) -> ID:
     query = select(db.Scenario).where(db.Scenario.id == scenarioId)
-    with next(get_session()) as session:
-        scenario: db.Scenario = session.exec(query).one_or_none()
-        if not scenario:
-            raise HTTPException(status_code=404, detail='A scenario with this ID does not exist')
-
-        scenario.description = description
-        session.add(scenario)
-        session.commit()
-        session.refresh(scenario)
+    scenario: db.Scenario = (await session.exec(query)).one_or_none()
+    if not scenario:
+        raise HTTPException(status_code=404, detail='A scenario with this ID does not exist')
+
+    scenario.description = description
+    session.add(scenario)
+    await session.commit()
+    await session.refresh(scenario)
     return ReducedScenario(
         id=str(scenario.id),
         name=scenario.name,
@@ -0,0 +1,373 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import re
+import shutil
+import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from json import dumps
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import h5py
+import numpy
+from celery.app.task import Context
+from pydantic import StrictStr
+
+from core import config
+from worker import celery_app
+from app.utils.utility import _create_directory
+
+from app.models.compartment import Compartment
+from app.models.group import Group
+from app.models.model import Model
+from app.models.node import Node
+from app.models.scenario import Scenario
+
+from app.db import create_session, engine
+from app.db.tasks import (
+    scenario_get_by_id,
+    model_get_by_id,
+    group_get_all,
+    compartment_get_all,
+    node_get_by_list,
+    datapoint_update_all_by_scenario,
+)
+
+log = logging.getLogger('API.Jobs.ScenarioImport')
+logging.basicConfig(level=logging.INFO)
+
+
+class ScenarioImportError(Exception):
+    """Exception for scenario result archives that cannot be imported. The first argument holds the error detail."""
+
+
+CompartmentNames = {
+    0: "MildInfections",
+    1: "Hospitalized",
+    2: "ICU",
+    3: "Dead"
+}
+
+class LookupObject:
+    """
+    Lookup index of a scenario import, built once per upload and shared by all percentiles.
+    Maps NUTS codes, group names and compartment indices (position in the h5 datasets) to compact integer codes.
+    The decoded ID columns hold these codes, `id_tables` maps them back to the IDs.
+    """
+    def __init__(
+        self,
+        scenario: Scenario,
+        model: Model,
+        groups: List[Group],
+        compartments: List[Compartment],
+        nodes: List[Node],
+    ):
+        self.scenario = scenario
+        self.model = model
+        self.groups = groups
+        self.compartments = compartments
+        self.nodes = nodes
+        self.node_codes: Dict[str, int] = {node.nuts: code for code, node in enumerate(nodes)}
+        self.group_codes: Dict[str, int] = {group.name: code for code, group in enumerate(groups)}
+        compartment_codes_by_name: Dict[str, int] = {
+            compartment.name: code for code, compartment in enumerate(compartments)
+        }
+        self.compartment_codes: Dict[int, int] = {
+            index: compartment_codes_by_name[name]
+            for index, name in CompartmentNames.items() if name in compartment_codes_by_name
+        }
+        self.id_tables: Dict[str, numpy.ndarray] = {
+            'nodeId': numpy.array([node.id for node in nodes], dtype=object),
+            'groupId': numpy.array([group.id for group in groups], dtype=object),
+            'compartmentId': numpy.array([compartment.id for compartment in compartments], dtype=object),
+        }
+
+    def resolve_ids(self, datapoints: Dict[str, numpy.ndarray]) -> Dict[str, numpy.ndarray]:
+        """Replace the integer codes of the ID columns with the actual IDs."""
+        return {
+            key: self.id_tables[key][column] if key in self.id_tables else column
+            for key, column in datapoints.items()
+        }
+
+# Size of the chunks used to stream uploaded archives to disk and to extract their members
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Columns (and their dtypes) of the columnar datapoint arrays produced during import
+DatapointColumns: Dict[str, Any] = {
+    'dayOffset': numpy.int32,
+    'nodeId': numpy.int32,
+    'groupId': numpy.int16,
+    'compartmentId': numpy.int16,
+    'percentile': numpy.int16,
+    'value': numpy.float64,
+}
+
+def _concatenate_columns(parts: List[Dict[str, Any]]) -> Dict[str, numpy.ndarray]:
+    """Concatenate lists of columnar datapoint arrays into one array per column."""
+    columns: Dict[str, numpy.ndarray] = {}
+    for key, dtype in DatapointColumns.items():
+        chunks = [chunk for part in parts for chunk in (part[key] if isinstance(part[key], list) else [part[key]])]
+        columns[key] = numpy.concatenate(chunks) if chunks else numpy.empty(0, dtype=dtype)
+    return columns
+
+def _decode_h5_file(
+        percentile: int,
+        path: str,
+        infos: LookupObject
+) -> Dict[str, numpy.ndarray]:
+    """
+    Read one h5 file of a percentile into compact columnar arrays.
+    Each dataset `file[node][group]` (days x compartments) is read as a whole and flattened day-major,
+    so no per-value objects are created.
+    Runs in the import executor, so it has to stay a picklable module level function.
+    Args:
+        percentile (int): value of the percentile
+        path (str): path to the h5 file
+        infos (LookupObject): lookup index of the import
+    Returns:
+        Dict with equally long columns 'dayOffset', 'nodeId', 'groupId', 'compartmentId', 'percentile' & 'value'.
+        The ID columns contain codes of `infos.id_tables`.
+    """
+    columns: Dict[str, List[numpy.ndarray]] = {key: [] for key in DatapointColumns}
+
+    # Scenario duration according to DB
+    days_simulated = (infos.scenario.end_date - infos.scenario.start_date).days + 1
+    infoNodes: Set[StrictStr] = set(infos.node_codes.keys())
+    infoGroups: Set[StrictStr] = set(infos.group_codes.keys())
+    infoCompartments: Set[StrictStr] = set([CompartmentNames[index] for index in infos.compartment_codes.keys()])
+
+    with h5py.File(path, "r") as file:
+        # validate nodes
+        fileNodes: Set[str] = set([str(fnode).zfill(5) for fnode in file.keys()])
+        if not fileNodes.issubset(infoNodes):
+            # some nodes not in db
+            raise Exception({
+                'percentile': percentile,
+                'unknownNodes': f'Following nodes in file not found in DB: {fileNodes.difference(infoNodes)}'
+            })
+        compartment_codes: Optional[numpy.ndarray] = None
+
+        for node in file.keys():
+            # validate groups
+            fileGroups: Set[str] = set([str(fgroup) for fgroup in file[node].keys()])
+            fileGroups.discard('Time')
+            if not fileGroups.issubset(infoGroups):
+                # some groups not in DB
+                raise Exception({
+                    'percentile': percentile,
+                    'unknownGroups': f'Following groups in file not found in DB: {fileGroups.difference(infoGroups)}'
+                })
+            node_code = infos.node_codes[node.zfill(5)]
+
+            for group in fileGroups:
+                # Read whole dataset at once (rows: days, columns: compartments)
+                values: numpy.ndarray = numpy.atleast_2d(file[node][group][()])
+                num_days, num_compartments = values.shape
+
+                # validate days
+                if num_days != days_simulated:
+                    raise Exception({
+                        'percentile': percentile,
+                        'dateMismatch': (
+                            f'Scenario duration is {days_simulated} days but file contains {num_days} datapoints'
+                        )
+                    })
+
+                # validate compartments
+                if compartment_codes is None or len(compartment_codes) != num_compartments:
+                    fileCompartments: Set[str] = set(
+                        [CompartmentNames.get(fcomp, str(fcomp)) for fcomp in range(num_compartments)]
+                    )
+                    if not fileCompartments.issubset(infoCompartments):
+                        raise Exception({
+                            'percentile': percentile,
+                            'unknownCompartments': (
+                                'following compartments in file not found in DB: '
+                                f'{fileCompartments.difference(infoCompartments)}'
+                            )
+                        })
+                    compartment_codes = numpy.array(
+                        [infos.compartment_codes[fcomp] for fcomp in range(num_compartments)],
+                        dtype=DatapointColumns['compartmentId']
+                    )
+
+                # Build columns for the whole dataset (day-major, same order as the file)
+                size = values.size
+                columns['dayOffset'].append(
+                    numpy.repeat(numpy.arange(num_days, dtype=DatapointColumns['dayOffset']), num_compartments)
+                )
+                columns['nodeId'].append(numpy.full(size, node_code, dtype=DatapointColumns['nodeId']))
+                columns['groupId'].append(numpy.full(size, infos.group_codes[group], dtype=DatapointColumns['groupId']))
+                columns['compartmentId'].append(numpy.tile(compartment_codes, num_days))
+                columns['percentile'].append(numpy.full(size, percentile, dtype=DatapointColumns['percentile']))
+                columns['value'].append(values.ravel().astype(DatapointColumns['value'], copy=False))
+    return _concatenate_columns([columns])
+
+def extract_percentiles(
+        zip_path: str,
+        out_folder: Optional[str],
+) -> Dict[int, str]:
+    """
+    Extract the h5 files of a result archive member by member and record the percentile folders.
+    Members are streamed to disk in chunks, so at most one chunk of a member is held in memory.
+    Raises ScenarioImportError if the archive does not match the expected layout or holds no results,
+    i.e. has no percentile folders or a percentile folder without h5 files.
+    Args:
+        zip_path (str): path to the uploaded zip file
+        out_folder (str): folder to extract the percentile folders into, None to only validate the layout
+    Returns:
+        Dict of percentile and the path to its folder with the h5 files
+    """
+    percentile_paths: Dict[int, str] = {}
+    # Number of h5 files directly in each percentile folder, the files the import reads
+    h5_files: Dict[int, int] = {}
+    expr = re.compile(r'^p([0-9]{1,2})$')
+
+    if not zipfile.is_zipfile(zip_path):
+        raise ScenarioImportError('The uploaded file is not a valid zip file')
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        for member in zip_ref.infolist():
+            parts = Path(member.filename).parts
+            # validate percentile folders or raise exception
+            result = expr.match(parts[0]) if len(parts) > 0 else None
+            if not result or '..' in parts:
+                raise ScenarioImportError(
+                    'The zip file internal folder structure of results does not match expected format'
+                )
+            percentile = int(result.group(1))
+            percentile_dir = os.path.join(out_folder or '', parts[0])
+            percentile_paths[percentile] = percentile_dir
+            is_h5 = not member.is_dir() and member.filename.endswith('.h5')
+            h5_files[percentile] = h5_files.get(percentile, 0) + (is_h5 and len(parts) == 2)
+            if out_folder is None or not is_h5:
+                continue
+            # Stream member to disk
+            target = os.path.join(percentile_dir, *parts[1:])
+            _create_directory(os.path.dirname(target))
+            with zip_ref.open(member) as source, open(target, 'wb') as destination:
+                shutil.copyfileobj(source, destination, UPLOAD_CHUNK_SIZE)
+
+    # An import without results would replace the scenario's data with nothing
+    if not percentile_paths:
+        raise ScenarioImportError('The zip file does not contain any percentile folders')
+    empty = [os.path.basename(percentile_paths[percentile]) for percentile, count in h5_files.items() if count == 0]
+    if empty:
+        raise ScenarioImportError(f'The percentile folders {", ".join(empty)} of the zip file contain no h5 files')
+    return percentile_paths
+
+@lru_cache
+def get_import_executor() -> Executor:
+    """
+    Create the executor used to decode the h5 files of scenario imports.
+    A process pool (default) decodes the files of an import in parallel without contending for the GIL.
+    """
+    if config.SCENARIO_IMPORT_EXECUTOR == 'thread':
+        return ThreadPoolExecutor(max_workers=config.SCENARIO_IMPORT_WORKERS, thread_name_prefix='scenario-import')
+    # spawn instead of fork: the parent process holds threads and DB connections that must not be inherited
+    return ProcessPoolExecutor(
+        max_workers=config.SCENARIO_IMPORT_WORKERS, mp_context=multiprocessing.get_context('spawn')
+    )
+
+
+async def _load_lookup(scenarioId: StrictStr) -> LookupObject:
+    """Build the lookup index of a scenario import from the DB."""
+    async with create_session() as session:
+        scenario = await scenario_get_by_id(session, scenarioId)
+        model = await model_get_by_id(session, scenario.model_id)
+        return LookupObject(
+            scenario=scenario,
+            model=model,
+            groups=[group for group in await group_get_all(session) if group.id in model.groups],
+            compartments=[comp for comp in await compartment_get_all(session) if comp.id in model.compartments],
+            nodes=await node_get_by_list(session, scenario.node_list_id),
+        )
+
+
+async def run_scenario_import(
+        scenarioId: StrictStr,
+        zip_path: str,
+        report_progress: Callable[..., None] = lambda step, **meta: None,
+) -> None:
+    """
+    Import a result archive into a scenario: extract it, decode all h5 files in the import executor
+    and replace the datapoints of the scenario.
+    Args:
+        scenarioId (str): UUID of the scenario
+        zip_path (str): path to the uploaded zip file in the input directory
+        report_progress (Callable): called with the current step and additional progress info
+    """
+    report_progress('extracting')
+    percentile_paths = extract_percentiles(zip_path, os.path.join(os.path.dirname(zip_path), "extracted"))
+
+    # Build lookup index once for all percentiles
+    info = await _load_lookup(scenarioId)
+
+    # Decode h5 files of all percentiles in the import executor
+    executor = get_import_executor()
+    futures = [
+        asyncio.wrap_future(executor.submit(_decode_h5_file, perc, str(h5_file), info))
+        for perc, path in percentile_paths.items()
+        for h5_file in Path(path).glob('*.h5')
+    ]
+    report_progress('decoding', filesDecoded=0, filesTotal=len(futures))
+    res: List[Dict[str, numpy.ndarray]] = []
+    errors: List[Exception] = []
+    for done, future in enumerate(asyncio.as_completed(futures), start=1):
+        try:
+            res.append(await future)
+        except Exception as ex:
+            errors.append(ex)
+        report_progress('decoding', filesDecoded=done, filesTotal=len(futures))
+    # Check if any files had errors
+    if errors:
+        message = {}
+        for idx, error in enumerate(errors):
+            message[idx] = error.args
+        # also post error into log
+        log.warning(f'Import into scenario {scenarioId} failed:\n{dumps(message, indent=4)}')
+        raise ScenarioImportError(message)
+
+    # Merge columns of all percentiles and send to DB
+    datapoints = info.resolve_ids(_concatenate_columns(res))
+    report_progress('loading', datapoints=len(datapoints['value']))
+    # No connection is held while decoding, the session only spans loading the data
+    async with create_session() as session:
+        await datapoint_update_all_by_scenario(session, scenarioId, datapoints)
+
+
+@celery_app.task(name='import_scenario_data', bind=True)
+def import_scenario_data(self, scenarioId: StrictStr, zipPath: str) -> StrictStr:
+    """Background job importing an uploaded result archive into a scenario."""
+    def report_progress(step: str, **meta: Any) -> None:
+        self.update_state(state='PROGRESS', meta={'step': step, **meta})
+
+    async def run() -> None:
+        # Pooled connections are bound to the event loop they were opened in, start and end with an empty pool
+        await engine.dispose(close=False)
+        try:
+            await run_scenario_import(scenarioId, zipPath, report_progress)
+        finally:
+            await engine.dispose()
+
+    log.info(f'Importing {zipPath} into scenario {scenarioId}...')
+    try:
+        asyncio.run(run())
+    finally:
+        # The input directory (archive and extracted files) belongs to this job only
+        shutil.rmtree(os.path.dirname(zipPath), ignore_errors=True)
+    log.info(f'Import into scenario {scenarioId} finished')
+    return scenarioId
+
+
+def enqueue_scenario_import(scenarioId: StrictStr, zip_path: str, job_id: StrictStr) -> None:
+    """
+    Enqueue the import job of an uploaded result archive (blocking).
+    The job's arguments are stored as its PENDING state right away, so queued jobs can be told from unknown IDs.
+    """
+    kwargs = {'scenarioId': scenarioId, 'zipPath': zip_path}
+    request = Context(task=import_scenario_data.name, args=[], kwargs=kwargs)
+    celery_app.backend.store_result(job_id, None, 'PENDING', request=request)
+    import_scenario_data.apply_async(kwargs=kwargs, task_id=job_id)
@@ -1,37 +1,56 @@
 from fastapi import HTTPException
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.utils.token_cache import get_token_cache
+from security_api import get_bearer, get_realm, verify_token
+
+# authenticate all methods except GET and OPTIONS
+PROTECTED_METHODS = {'POST', 'PUT', 'DELETE'}
 
-from security_api import get_user, get_bearer, get_realm
 
 # authentication middleware that filters requests before they reach the endpoints
 # so far it only checks if the user is authenticated for POST, PUT, DELETE methods
-class AuthenticationMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        # authenticate all methods except GET and OPTIONS
-        protected_methods = ['POST', 'PUT', 'DELETE']
-        if request.method in protected_methods:
-            try:
-                # try to verify token and extract user information
-                bearer = await get_bearer(request.headers.get("Authorization"))
-                realm = await get_realm(request.headers.get("X-Realm"))
-                user = await get_user(bearer, realm)
-                
-                # store user information in request state
-                # can be then accessed in endpoints e.g. 
-                # async def get_user(request: Request):
-                #     return request.state.user
-                request.state.user = user
-                request.state.realm = realm
-                # (Optional) role check can be added
-                # if ['admin'] not in user.role:
-                #     raise HTTPException(
-                #         status_code=403,
-                #         detail="Not authorized"
-                #     )
+# plain ASGI middleware: requests are passed on untouched, so other methods cost nothing
+# and request bodies (uploads) and streamed responses are not wrapped
+class AuthenticationMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or scope['method'] not in PROTECTED_METHODS:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        try:
+            # try to verify token and extract user information
+            bearer = await get_bearer(headers.get("Authorization"))
+            realm = await get_realm(headers.get("X-Realm"))
+            # repeated requests with the same token skip the signature verification until the token expires
+            token_cache = get_token_cache()
+            user = token_cache.get(bearer, realm)
+            if user is None:
+                user, expires_at = await verify_token(bearer, realm)
+                if expires_at is not None:
+                    token_cache.set(bearer, realm, user, expires_at)
+            # (Optional) role check can be added
+            # if ['admin'] not in user.role:
+            #     raise HTTPException(
+            #         status_code=403,
+            #         detail="Not authorized"
+            #     )
+
+        except HTTPException as e:
+            response = JSONResponse(e.detail, e.status_code, headers=e.headers)
+            await response(scope, receive, send)
+            return
 
-            except HTTPException as e:
-                return JSONResponse(e.detail, e.status_code)
-            
-        response = await call_next(request)
-        return response
\ No newline at end of file
+        # store user information in request state
+        # can be then accessed in endpoints e.g.
+        # async def get_user(request: Request):
+        #     return request.state.user
+        state = scope.setdefault("state", {})
+        state["user"] = user
+        state["realm"] = realm
+        await self.app(scope, receive, send)
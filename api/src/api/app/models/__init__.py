@@ -13,8 +13,10 @@ from .node import Node
 from .parameter_definition import ParameterDefinition
 from .parameter_value_entry import ParameterValueEntry
 from .parameter_value import ParameterValue
+from .pool_status import PoolStatus
 from .reduced_info import ReducedInfo
 from .reduced_scenario import ReducedScenario
 from .scenario import Scenario
+from .scenario_import_job import ScenarioImportJob
 from .tagged import Tagged
 from .user_detail import UserDetail
\ No newline at end of file
@@ -0,0 +1,106 @@
+# coding: utf-8
+
+"""
+    Pandemos
+
+    API for visualization of Infection Models
+
+    The version of the OpenAPI document: 1
+    Generated by OpenAPI Generator (https://openapi-generator.tech)
+
+    Do not edit the class manually.
+"""  # noqa: E501
+
+
+from __future__ import annotations
+import pprint
+import re  # noqa: F401
+import json
+
+
+
+
+from pydantic import BaseModel, ConfigDict, Field, StrictFloat, StrictInt
+from typing import Any, ClassVar, Dict, List, Optional
+try:
+    from typing import Self
+except ImportError:
+    from typing_extensions import Self
+
+class PoolStatus(BaseModel):
+    """
+    PoolStatus
+    """ # noqa: E501
+    size: StrictInt = Field(description="Number of persistent connections of the pool")
+    checked_out: StrictInt = Field(alias="checkedOut", description="Connections currently in use")
+    checked_in: StrictInt = Field(alias="checkedIn", description="Idle connections in the pool")
+    overflow: StrictInt = Field(description="Connections currently open beyond the pool size")
+    max_overflow: StrictInt = Field(alias="maxOverflow", description="Maximum number of overflow connections")
+    checkouts: StrictInt = Field(description="Connections handed out since the start of the API")
+    timeouts: StrictInt = Field(description="Checkouts that gave up waiting for a free connection")
+    wait_seconds_total: StrictFloat = Field(alias="waitSecondsTotal", description="Total time waited for connections in seconds")
+    wait_seconds_max: StrictFloat = Field(alias="waitSecondsMax", description="Longest wait for a connection in seconds")
+    wait_seconds_avg: StrictFloat = Field(alias="waitSecondsAvg", description="Average wait for a connection in seconds")
+    __properties: ClassVar[List[str]] = ["size", "checkedOut", "checkedIn", "overflow", "maxOverflow", "checkouts", "timeouts", "waitSecondsTotal", "waitSecondsMax", "waitSecondsAvg"]
+
+    model_config = {
+        "populate_by_name": True,
+        "validate_assignment": True,
+        "protected_namespaces": (),
+    }
+
+
+    def to_str(self) -> str:
+        """Returns the string representation of the model using alias"""
+        return pprint.pformat(self.model_dump(by_alias=True))
+
+    def to_json(self) -> str:
+        """Returns the JSON representation of the model using alias"""
+        # TODO: pydantic v2: use .model_dump_json(by_alias=True, exclude_unset=True) instead
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_json(cls, json_str: str) -> Self:
+        """Create an instance of PoolStatus from a JSON string"""
+        return cls.from_dict(json.loads(json_str))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the dictionary representation of the model using alias.
+
+        This has the following differences from calling pydantic's
+        `self.model_dump(by_alias=True)`:
+
+        * `None` is only added to the output dict for nullable fields that
+          were set at model initialization. Other fields with value `None`
+          are ignored.
+        """
+        _dict = self.model_dump(
+            by_alias=True,
+            exclude={
+            },
+            exclude_none=True,
+        )
+        return _dict
+
+    @classmethod
+    def from_dict(cls, obj: Dict) -> Self:
+        """Create an instance of PoolStatus from a dict"""
+        if obj is None:
+            return None
+
+        if not isinstance(obj, dict):
+            return cls.model_validate(obj)
+
+        _obj = cls.model_validate({
+            "size": obj.get("size"),
+            "checkedOut": obj.get("checkedOut"),
+            "checkedIn": obj.get("checkedIn"),
+            "overflow": obj.get("overflow"),
+            "maxOverflow": obj.get("maxOverflow"),
+            "checkouts": obj.get("checkouts"),
+            "timeouts": obj.get("timeouts"),
+            "waitSecondsTotal": obj.get("waitSecondsTotal"),
+            "waitSecondsMax": obj.get("waitSecondsMax"),
+            "waitSecondsAvg": obj.get("waitSecondsAvg")
+        })
+        return _obj
@@ -0,0 +1,275 @@
+import codecs
+import queue
+import re
+import threading
+from typing import BinaryIO, Dict, List, Optional
+
+import pyarrow
+import pyarrow.compute
+import pyarrow.csv
+
+# Shared case data files have this number of columns, separated by ';' (values are not quoted)
+CASE_DATA_COLUMNS = 76
+CASE_DATA_SEPARATOR = ';'
+# Longest accepted line in bytes, bounds the memory needed for validation
+CASE_DATA_MAX_LINE_LENGTH = 64 * 1024
+# Lines are checked in batches of about this many bytes, as each check has some overhead
+_BATCH_SIZE = 1024 * 1024
+
+# Basic column types, inferred from the values of the first data row
+NUMBER = 'number'
+DATE = 'date'
+TEXT = 'text'
+# Accepted decimal separators of numbers, each number column uses one of them
+DECIMAL_POINTS = '.,'
+_DATE_PATTERN = (
+    r'[0-9]{4}-[0-9]{2}-[0-9]{2}(?:[T ][0-9]{2}:[0-9]{2}(?::[0-9]{2}(?:\.[0-9]+)?)?)?'
+    r'|[0-9]{1,2}\.[0-9]{1,2}\.[0-9]{4}'
+)
+
+
+def _number_pattern(decimal_points: str) -> str:
+    """Pattern of numbers with any of the given decimal separators."""
+    # Also the special values of floating point numbers, as written e.g. by numpy and pandas
+    point = f'[{re.escape(decimal_points)}]'
+    return rf'[+-]?(?:(?:[0-9]+(?:{point}[0-9]*)?|{point}[0-9]+)(?:[eE][+-]?[0-9]+)?|(?i:nan|inf(?:inity)?))'
+
+
+def _decimal_point(number: str) -> Optional[str]:
+    """Decimal separator of a number, None if it has no decimals."""
+    return next((point for point in DECIMAL_POINTS if point in number), None)
+
+
+# Patterns by kind and, for numbers, by decimal separator (None while the separator of a column is not known yet)
+_DATE_REGEX = re.compile(_DATE_PATTERN)
+_NUMBER_REGEXES: Dict[Optional[str], re.Pattern] = {
+    None: re.compile(_number_pattern(DECIMAL_POINTS)),
+    **{point: re.compile(_number_pattern(point)) for point in DECIMAL_POINTS},
+}
+
+
+class CaseDataValidationError(ValueError):
+    """The case data file is malformed, the message describes the first problem found."""
+
+
+class CaseDataValidator:
+    """
+    Incremental validation of a case data file in a single pass: the data is fed in chunks of any size and only
+    the lines not checked yet are kept. Checks that the file is UTF-8 encoded, that every line has the expected
+    number of columns and that the values of every column have the type of that column in the first data row
+    (number, date or text, empty values are allowed). Numbers may use '.' or ',' as decimal separator, the first
+    value of a column with decimals decides the separator of all its values. The first line is the header.
+    Empty lines are ignored.
+
+    Complete lines are checked in batches with pyarrow's CSV parser, which releases the GIL, so validation can run
+    alongside the threads of an upload. Only invalid chunks are checked line by line to report the first problem.
+    Both match the values against the same patterns, so a file is valid or not regardless of how it is batched.
+    """
+    def __init__(self, columns: int = CASE_DATA_COLUMNS, max_line_length: int = CASE_DATA_MAX_LINE_LENGTH):
+        self.columns = columns
+        self.max_line_length = max_line_length
+        self.line_number = 0
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        # Data fed since the last check
+        self._pending: List[bytes] = []
+        self._pending_size = 0
+        self._header: Optional[List[str]] = None
+        self._kinds: Optional[List[str]] = None
+        # Decimal separator of each number column, None until a value with decimals was seen
+        self._decimal_points: List[Optional[str]] = []
+        self._convert_options: Optional[pyarrow.csv.ConvertOptions] = None
+
+    def feed(self, data: bytes, final: bool = False) -> None:
+        """Validate the next chunk of the file, `final` with the last chunk. Raises CaseDataValidationError."""
+        # Incomplete character at the end of the previous chunk, the decoder's error positions include it
+        buffered = self._decoder.getstate()[0]
+        try:
+            self._decoder.decode(data, final)
+        except UnicodeDecodeError as ex:
+            line_number = (
+                self.line_number + 1 + sum(chunk.count(b'\n') for chunk in self._pending)
+                + (buffered + data).count(b'\n', 0, ex.start)
+            )
+            raise CaseDataValidationError(f'File is not UTF-8 encoded: {ex.reason} in line {line_number}') from ex
+        self._pending.append(data)
+        self._pending_size += len(data)
+        if self._pending_size < _BATCH_SIZE and not final:
+            return
+        data = b''.join(self._pending)
+        end = data.rfind(b'\n') + 1
+        rest = data[end:]
+        self._pending, self._pending_size = [rest], len(rest)
+        if end:
+            self._check_lines(data[:end])
+        if final:
+            self._pending, self._pending_size = [], 0
+            self._check_line(rest.decode('utf-8'))
+        elif len(rest) > self.max_line_length:
+            raise CaseDataValidationError(f'Line {self.line_number + 1} is longer than {self.max_line_length} bytes')
+
+    def _check_lines(self, lines: bytes) -> None:
+        # Header and first data row are checked on their own, they define the column types
+        start = 0
+        while self._kinds is None and start < len(lines):
+            end = lines.index(b'\n', start)
+            self._check_line(lines[start:end].decode('utf-8'))
+            start = end + 1
+        if start == len(lines):
+            return
+        lines = lines[start:]
+        if self._valid_rows(lines):
+            self.line_number += lines.count(b'\n')
+            return
+        for line in lines[:-1].decode('utf-8').split('\n'):
+            self._check_line(line)
+
+    def _valid_rows(self, lines: bytes) -> bool:
+        try:
+            table = pyarrow.csv.read_csv(
+                pyarrow.py_buffer(lines),
+                read_options=pyarrow.csv.ReadOptions(autogenerate_column_names=True, use_threads=False),
+                parse_options=pyarrow.csv.ParseOptions(delimiter=CASE_DATA_SEPARATOR, quote_char=False),
+                convert_options=self._convert_options,
+            )
+        except pyarrow.ArrowInvalid:
+            return False
+        if table.num_columns != self.columns:
+            return False
+        decided: Dict[int, str] = {}
+        for index, kind in enumerate(self._kinds):
+            if kind == TEXT:
+                continue
+            column = table.column(index)
+            regex = _NUMBER_REGEXES[self._decimal_points[index]] if kind == NUMBER else _DATE_REGEX
+            if pyarrow.compute.all(
+                pyarrow.compute.match_substring_regex(column, f'^(?:{regex.pattern})$')
+            ).as_py() is False:
+                return False
+            if kind == NUMBER and self._decimal_points[index] is None:
+                # Valid if the numbers use one of the separators, the lines are checked one by one otherwise
+                used = [
+                    point for point in DECIMAL_POINTS
+                    if pyarrow.compute.any(pyarrow.compute.match_substring(column, point)).as_py()
+                ]
+                if len(used) > 1:
+                    return False
+                if used:
+                    decided[index] = used[0]
+        # Only valid batches decide separators, the line checks of an invalid one start from the previous state
+        for index, point in decided.items():
+            self._decimal_points[index] = point
+        return True
+
+    def _check_line(self, line: str) -> None:
+        self.line_number += 1
+        line = line.rstrip('\r')
+        if self.line_number == 1:
+            # byte order mark of files saved by Excel
+            line = line.removeprefix('\ufeff')
+        if not line:
+            return
+        values = line.split(CASE_DATA_SEPARATOR)
+        if len(values) != self.columns:
+            raise CaseDataValidationError(
+                f"Line {self.line_number} has the wrong amount of columns. Needs {self.columns} but has '{len(values)}'"
+            )
+        if self._header is None:
+            self._header = values
+            return
+        if self._kinds is None:
+            self._set_kinds(values)
+            return
+        for index, (name, kind, value) in enumerate(zip(self._header, self._kinds, values)):
+            if not value or kind == TEXT:
+                continue
+            if kind == DATE and not _DATE_REGEX.fullmatch(value):
+                raise CaseDataValidationError(
+                    f"Line {self.line_number}, column '{name}': '{value}' is not a {kind} as in the first data row"
+                )
+            if kind == NUMBER:
+                self._check_number(index, name, value)
+
+    def _check_number(self, index: int, name: str, value: str) -> None:
+        """Check a value of a number column, the first value with decimals decides the column's separator."""
+        point = self._decimal_points[index]
+        if not _NUMBER_REGEXES[point].fullmatch(value):
+            if point is not None and _NUMBER_REGEXES[None].fullmatch(value):
+                problem = f"is not a {NUMBER} with the decimal separator '{point}' of the column's previous values"
+            else:
+                problem = f'is not a {NUMBER} as in the first data row'
+            raise CaseDataValidationError(f"Line {self.line_number}, column '{name}': '{value}' {problem}")
+        if point is None:
+            self._decimal_points[index] = _decimal_point(value)
+
+    def _set_kinds(self, values: List[str]) -> None:
+        self._kinds = [
+            NUMBER if _NUMBER_REGEXES[None].fullmatch(value) else DATE if _DATE_REGEX.fullmatch(value) else TEXT
+            for value in values
+        ]
+        self._decimal_points = [
+            _decimal_point(value) if kind == NUMBER else None for kind, value in zip(self._kinds, values)
+        ]
+        # All columns are read as strings and matched like in _check_line, pyarrow's number parsing accepts more
+        self._convert_options = pyarrow.csv.ConvertOptions(
+            column_types={f'f{index}': pyarrow.string() for index in range(self.columns)},
+            null_values=[''],
+            strings_can_be_null=True,
+        )
+
+
+class ValidatingReader:
+    """
+    Read-only stream over a file of known length that tees the data read from it, e.g. by an upload, to a validator
+    running in a background thread, so validation needs no extra pass over the file and adds no time to the reads.
+    read() raises CaseDataValidationError once the validator found invalid data, at the latest when the last byte
+    is read. Use as context manager, so the background thread also ends if the reads are abandoned.
+    """
+    def __init__(self, file: BinaryIO, length: int, validator: CaseDataValidator, max_pending: int = 4):
+        self._file = file
+        self._remaining = length
+        self._validator = validator
+        self._finished = False
+        # Chunks read but not validated yet, reads wait for the validator if it falls behind
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._error: Optional[CaseDataValidationError] = None
+        self._abandoned = False
+        self._thread = threading.Thread(target=self._validate, name='CaseDataValidation', daemon=True)
+
+    def __enter__(self) -> 'ValidatingReader':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if not self._finished:
+            # stop the validator without waiting for it, it checks the flag after every chunk
+            self._finished = self._abandoned = True
+            try:
+                self._queue.put_nowait((b'', False))
+            except queue.Full:
+                pass
+
+    def read(self, size: int = -1) -> bytes:
+        if self._error:
+            raise self._error
+        data = self._file.read(size)
+        if not self._finished:
+            self._remaining -= len(data)
+            self._finished = not data or self._remaining <= 0
+            self._queue.put((data, self._finished))
+            if self._finished:
+                self._thread.join()
+                if self._error:
+                    raise self._error
+        return data
+
+    def _validate(self) -> None:
+        while not self._abandoned:
+            data, final = self._queue.get()
+            if not self._error and not self._abandoned:
+                try:
+                    self._validator.feed(data, final)
+                except CaseDataValidationError as ex:
+                    # keep taking chunks until the reader notices, so it does not wait for a full queue
+                    self._error = ex
+            if final:
+                return
@@ -12,3 +12,12 @@ class MigrationSort(str, Enum):
     INCOMING = "INCOMING"
     OUTGOING = "OUTGOING"
     TOTAL = "TOTAL"
+
+
+class SpatialAggregation(str, Enum):
+    STATE = "STATE"
+    INTERMEDIATE_REGION = "INTERMEDIATE_REGION"
+
+
+# Node or group key selecting (and labelling) the sum over all nodes or groups in infection data requests
+TOTAL_KEY = "total"
@@ -0,0 +1,176 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, List, Optional, Sequence
+
+import pyarrow
+import pyarrow.ipc
+import pyarrow.parquet
+from sqlalchemy import Row
+from starlette.concurrency import run_in_threadpool
+
+JSON_MEDIA_TYPE = 'application/json'
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+CSV_MEDIA_TYPE = 'text/csv'
+ARROW_STREAM_MEDIA_TYPE = 'application/vnd.apache.arrow.stream'
+PARQUET_MEDIA_TYPE = 'application/vnd.apache.parquet'
+
+# Media types of the infection data endpoint, the first one is the default
+INFECTIONDATA_MEDIA_TYPES: List[str] = [
+    JSON_MEDIA_TYPE, NDJSON_MEDIA_TYPE, CSV_MEDIA_TYPE, ARROW_STREAM_MEDIA_TYPE, PARQUET_MEDIA_TYPE
+]
+# Field names of streamed infection data (aliases of the Infectiondata model)
+INFECTIONDATA_FIELDS: List[str] = ['date', 'node', 'group', 'compartment', 'aggregation', 'percentile', 'value']
+# Typed columns of the binary formats, the repeated IDs are dictionary encoded
+INFECTIONDATA_ARROW_SCHEMA = pyarrow.schema([
+    ('date', pyarrow.date32()),
+    ('node', pyarrow.dictionary(pyarrow.int32(), pyarrow.string())),
+    ('group', pyarrow.dictionary(pyarrow.int32(), pyarrow.string())),
+    ('compartment', pyarrow.dictionary(pyarrow.int32(), pyarrow.string())),
+    ('aggregation', pyarrow.dictionary(pyarrow.int32(), pyarrow.string())),
+    ('percentile', pyarrow.int16()),
+    ('value', pyarrow.float32()),
+])
+
+
+def negotiate_media_type(accept: Optional[str], supported: List[str]) -> str:
+    """
+    Pick the supported media type preferred by an Accept header (highest quality first, then header order).
+    Falls back to the first supported media type for missing headers, wildcards or unsupported types.
+    """
+    if not accept:
+        return supported[0]
+    ranges = []
+    for position, entry in enumerate(accept.split(',')):
+        media_type, *params = [part.strip() for part in entry.split(';')]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            ranges.append((-quality, position, media_type.lower()))
+    for _, _, media_type in sorted(ranges):
+        if media_type in supported:
+            return media_type
+        if media_type in ('*/*', 'application/*'):
+            break
+    return supported[0]
+
+
+def _infectiondata_record(row: Row) -> list:
+    return [
+        row.date.isoformat(), row.nodeId, row.groupId, row.compartmentId, row.aggregation, row.percentile, row.value
+    ]
+
+
+def _ndjson_batch(batch: Sequence[Row]) -> bytes:
+    return ''.join(
+        json.dumps(dict(zip(INFECTIONDATA_FIELDS, _infectiondata_record(row)))) + '\n' for row in batch
+    ).encode('utf-8')
+
+
+def _csv_batch(batch: Sequence[Row], header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    if header:
+        writer.writerow(INFECTIONDATA_FIELDS)
+    writer.writerows(_infectiondata_record(row) for row in batch)
+    return buffer.getvalue().encode('utf-8')
+
+
+async def ndjson_chunks(batches: AsyncIterator[Sequence[Row]]) -> AsyncIterator[bytes]:
+    """Encode batches of datapoint rows as newline delimited JSON, one chunk per batch."""
+    async for batch in batches:
+        yield await run_in_threadpool(_ndjson_batch, batch)
+
+
+async def csv_chunks(batches: AsyncIterator[Sequence[Row]]) -> AsyncIterator[bytes]:
+    """Encode batches of datapoint rows as CSV with a header line, one chunk per batch."""
+    header = True
+    async for batch in batches:
+        yield await run_in_threadpool(_csv_batch, batch, header)
+        header = False
+    # Header only response for empty results
+    if header:
+        yield _csv_batch([], header)
+
+
+class _ChunkSink:
+    """
+    Write-only file object collecting the written bytes until they are taken.
+    Keeps counting the position, so writers relying on `tell` (Parquet footer offsets) work across chunks.
+    """
+    closed = False
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b''.join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _arrow_batch(batch: Sequence[Row]) -> pyarrow.RecordBatch:
+    def column(name: str, type: pyarrow.DataType) -> pyarrow.Array:
+        return pyarrow.array([getattr(row, name) for row in batch], type)
+
+    return pyarrow.record_batch([
+        column('date', pyarrow.date32()),
+        column('nodeId', pyarrow.string()).dictionary_encode(),
+        column('groupId', pyarrow.string()).dictionary_encode(),
+        column('compartmentId', pyarrow.string()).dictionary_encode(),
+        column('aggregation', pyarrow.string()).dictionary_encode(),
+        column('percentile', pyarrow.int16()),
+        column('value', pyarrow.float32()),
+    ], schema=INFECTIONDATA_ARROW_SCHEMA)
+
+
+async def arrow_stream_chunks(batches: AsyncIterator[Sequence[Row]]) -> AsyncIterator[bytes]:
+    """Encode batches of datapoint rows as Arrow IPC stream, one record batch (and chunk) per batch."""
+    sink = _ChunkSink()
+    with pyarrow.ipc.new_stream(sink, INFECTIONDATA_ARROW_SCHEMA) as writer:
+        async for batch in batches:
+            await run_in_threadpool(lambda: writer.write_batch(_arrow_batch(batch)))
+            yield sink.take()
+    yield sink.take()
+
+
+async def parquet_chunks(batches: AsyncIterator[Sequence[Row]]) -> AsyncIterator[bytes]:
+    """Encode batches of datapoint rows as Parquet file, one row group (and chunk) per batch."""
+    sink = _ChunkSink()
+    with pyarrow.parquet.ParquetWriter(sink, INFECTIONDATA_ARROW_SCHEMA) as writer:
+        async for batch in batches:
+            await run_in_threadpool(lambda: writer.write_batch(_arrow_batch(batch)))
+            yield sink.take()
+    # Footer
+    yield sink.take()
+
+
+# Encoders of the streaming media types
+STREAM_ENCODERS = {
+    NDJSON_MEDIA_TYPE: ndjson_chunks,
+    CSV_MEDIA_TYPE: csv_chunks,
+    ARROW_STREAM_MEDIA_TYPE: arrow_stream_chunks,
+    PARQUET_MEDIA_TYPE: parquet_chunks,
+}
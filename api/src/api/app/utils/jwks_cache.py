@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+
+import httpx
+import jwt
+from jwt import PyJWK, PyJWKSet
+
+from app.utils.token_cache import get_token_cache
+from core import config
+
+log = logging.getLogger('API.JWKSCache')
+logging.basicConfig(level=logging.INFO)
+
+# Most realms whose failed fetch is remembered, bounds the memory used by requests naming made-up realms
+MAX_FAILED_REALMS = 1024
+
+
+class JWKSFetchError(Exception):
+    """The signing keys of a realm could not be fetched from the IdP."""
+
+
+class UnknownRealmError(Exception):
+    """The IdP does not know the realm, it answered the request of the realm's signing keys with a client error."""
+
+
+class _RealmKeys:
+    """Signing keys of a realm by key ID and the time they were fetched."""
+    def __init__(self, keys: Dict[str, PyJWK]):
+        self.keys = keys
+        self.fetched_at = time.monotonic()
+
+
+class JWKSCache:
+    """
+    Per-realm cache of the IdP's token signing keys (JWKS), so verifying a token does not need a request to the IdP.
+    Keys are refetched after `ttl` seconds and when a token names an unknown key ID (key rotation), the latter
+    at most every `min_refresh_interval` seconds per realm, so tokens with made-up key IDs cannot flood the IdP.
+    If a refresh fails, the previously fetched keys are used until the next attempt.
+    Realms without keys whose fetch failed are not requested again for `min_refresh_interval` seconds either,
+    only realms with keys keep state beyond that, so made-up realm names neither flood the IdP nor fill the memory.
+    `on_keys_dropped` is called with the realm whenever keys of a realm are dropped (rotated away or the realm was
+    removed), so caches of tokens verified with them can be cleared.
+    """
+    def __init__(
+        self,
+        idp_root_url: str,
+        ttl: float,
+        min_refresh_interval: float,
+        timeout: float,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        on_keys_dropped: Optional[Callable[[str], None]] = None,
+    ):
+        self.idp_root_url = idp_root_url.rstrip('/')
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        # Transport of the requests to the IdP, the default one unless given (e.g. a stub IdP in tests)
+        self.transport = transport
+        self.on_keys_dropped = on_keys_dropped
+        self._realms: Dict[str, _RealmKeys] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # Time and error of the last failed fetch of realms without keys, oldest first
+        self._failures: Dict[str, Tuple[float, Exception]] = {}
+
+    def certs_url(self, realm: str) -> str:
+        return f'{self.idp_root_url}/realms/{realm}/protocol/openid-connect/certs'
+
+    async def get_signing_key(self, realm: str, token: str) -> PyJWK:
+        """
+        Signing key of the realm matching the key ID in the token's header.
+        Raises jwt.InvalidTokenError if the token names no known key, UnknownRealmError if the IdP does not know the
+        realm and JWKSFetchError if no keys could be fetched.
+        """
+        kid = jwt.get_unverified_header(token).get('kid')
+        if not kid:
+            raise jwt.InvalidTokenError('Token header does not name a signing key')
+        entry = self._realms.get(realm)
+        if entry is None or self._expired(entry) or (kid not in entry.keys and self._refreshable(entry)):
+            entry = await self._refresh(realm, entry)
+        key = entry.keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f'Unknown signing key {kid}')
+        return key
+
+    def _expired(self, entry: _RealmKeys) -> bool:
+        return time.monotonic() - entry.fetched_at > self.ttl
+
+    def _refreshable(self, entry: _RealmKeys) -> bool:
+        return time.monotonic() - entry.fetched_at > self.min_refresh_interval
+
+    async def _refresh(self, realm: str, outdated: Optional[_RealmKeys]) -> _RealmKeys:
+        if outdated is None:
+            self._raise_recent_failure(realm)
+        # Concurrent requests of a realm wait for a single fetch
+        lock = self._locks.get(realm)
+        if lock is None:
+            lock = self._locks[realm] = asyncio.Lock()
+        try:
+            async with lock:
+                entry = self._realms.get(realm)
+                if entry is not outdated:
+                    return entry
+                if outdated is None:
+                    self._raise_recent_failure(realm)
+                try:
+                    entry = _RealmKeys(await self._fetch(realm))
+                except UnknownRealmError as ex:
+                    # e.g. the realm was removed, its previous keys must not verify tokens anymore
+                    if self._realms.pop(realm, None) is not None:
+                        self._keys_dropped(realm)
+                    self._remember_failure(realm, ex)
+                    raise
+                except JWKSFetchError as ex:
+                    if outdated is None:
+                        self._remember_failure(realm, ex)
+                        raise
+                    log.warning(f'Refreshing signing keys of realm {realm} failed, keeping the previous keys: {ex}')
+                    # Retry after the minimum refresh interval instead of on every request
+                    outdated.fetched_at = time.monotonic() - self.ttl + self.min_refresh_interval
+                    return outdated
+                self._failures.pop(realm, None)
+                self._realms[realm] = entry
+                if outdated is not None and not outdated.keys.keys() <= entry.keys.keys():
+                    self._keys_dropped(realm)
+                return entry
+        finally:
+            # Only realms with keys keep their lock, waiters still hold it and find the failure remembered
+            if realm not in self._realms and self._locks.get(realm) is lock:
+                del self._locks[realm]
+
+    def _keys_dropped(self, realm: str) -> None:
+        log.info(f'Signing keys of realm {realm} were dropped')
+        if self.on_keys_dropped is not None:
+            self.on_keys_dropped(realm)
+
+    def _raise_recent_failure(self, realm: str) -> None:
+        """Raise the error of the realm's last fetch again if it failed less than `min_refresh_interval` ago."""
+        failure = self._failures.get(realm)
+        if failure is not None and time.monotonic() - failure[0] <= self.min_refresh_interval:
+            error = failure[1]
+            raise type(error)(*error.args)
+
+    def _remember_failure(self, realm: str, error: Exception) -> None:
+        self._failures.pop(realm, None)
+        self._failures[realm] = (time.monotonic(), error)
+        while len(self._failures) > MAX_FAILED_REALMS:
+            del self._failures[next(iter(self._failures))]
+
+    async def _fetch(self, realm: str) -> Dict[str, PyJWK]:
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout, transport=self.transport) as client:
+                response = await client.get(self.certs_url(realm))
+            if response.is_client_error:
+                raise UnknownRealmError(f'IdP answered {response.status_code} for the signing keys of realm {realm}')
+            response.raise_for_status()
+            jwk_set = PyJWKSet.from_dict(response.json())
+        except (httpx.HTTPError, ValueError, jwt.PyJWTError) as ex:
+            raise JWKSFetchError(f'{type(ex).__name__}: {ex}') from ex
+        log.info(f'Fetched signing keys of realm {realm}')
+        return {
+            key.key_id: key for key in jwk_set.keys
+            if key.public_key_use in ['sig', None] and key.key_id
+        }
+
+
+@lru_cache
+def get_jwks_cache() -> JWKSCache:
+    """Create the signing key cache of the configured IdP."""
+    return JWKSCache(
+        idp_root_url=str(config.IDP_ROOT_URL),
+        ttl=config.JWKS_CACHE_TTL,
+        min_refresh_interval=config.JWKS_MIN_REFRESH_INTERVAL,
+        timeout=config.IDP_REQUEST_TIMEOUT,
+        # Tokens verified with dropped keys have to be verified again
+        on_keys_dropped=get_token_cache().invalidate_realm,
+    )
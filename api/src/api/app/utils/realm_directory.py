@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import time
+from functools import lru_cache
+from typing import Dict, Optional
+
+import httpx
+
+from core import config
+
+log = logging.getLogger('API.RealmDirectory')
+logging.basicConfig(level=logging.INFO)
+
+
+class RealmDirectory:
+    """
+    Directory of the IdP's realms (LHAs) and their display names.
+    Lookups never wait for the IdP: they answer from the last fetched realm list and, if it is older than `ttl`
+    seconds, start a refresh in the background. After a failed fetch the next attempt is made after `retry_interval`
+    seconds, the previous realm list stays in use meanwhile.
+    """
+    def __init__(
+        self,
+        idp_api_url: str,
+        ttl: float,
+        retry_interval: float,
+        timeout: float,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.idp_api_url = idp_api_url.rstrip('/')
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self.timeout = timeout
+        # Transport of the requests to the IdP API, the default one unless given (e.g. a stub IdP in tests)
+        self.transport = transport
+        self._display_names: Dict[str, str] = {}
+        # monotonic time of the next refresh, initially right away
+        self._refresh_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def display_name(self, realm: str) -> Optional[str]:
+        """Display name of a realm, None if the realm is unknown or the realm list was not fetched yet."""
+        self.warm_up()
+        return self._display_names.get(realm)
+
+    def warm_up(self) -> None:
+        """Start a background refresh if the realm list is due and none is running, call from the event loop."""
+        if time.monotonic() < self._refresh_at or (self._refresh_task and not self._refresh_task.done()):
+            return
+        self._refresh_task = asyncio.get_running_loop().create_task(self.refresh())
+
+    async def refresh(self) -> None:
+        """Fetch the realm list from the IdP API, failures are logged and retried later."""
+        try:
+            display_names = await self._fetch()
+        except (httpx.HTTPError, ValueError, KeyError, TypeError) as ex:
+            log.warning(f'IDP API unreachable to request realms: {type(ex).__name__}: {ex}')
+            self._refresh_at = time.monotonic() + self.retry_interval
+            return
+        self._display_names = display_names
+        self._refresh_at = time.monotonic() + self.ttl
+        log.info(f'Fetched {len(self._display_names)} realms from the IDP API')
+
+    async def _fetch(self) -> Dict[str, str]:
+        async with httpx.AsyncClient(timeout=self.timeout, transport=self.transport) as client:
+            response = await client.get(f'{self.idp_api_url}/realms')
+            response.raise_for_status()
+        return {realm['realm']: realm.get('displayName', realm['realm']) for realm in response.json()}
+
+
+@lru_cache
+def get_realm_directory() -> RealmDirectory:
+    """Create the realm directory of the configured IdP API."""
+    return RealmDirectory(
+        idp_api_url=str(config.IDP_API_URL),
+        ttl=config.REALM_DIRECTORY_TTL,
+        retry_interval=config.REALM_DIRECTORY_RETRY_INTERVAL,
+        timeout=config.IDP_REQUEST_TIMEOUT,
+    )
@@ -0,0 +1,144 @@
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+import redis
+from starlette.concurrency import run_in_threadpool
+
+from core import config
+
+log = logging.getLogger('API.ResultCache')
+logging.basicConfig(level=logging.INFO)
+
+# Prefix of the keys of cached results in Redis
+REDIS_KEY_PREFIX = 'esid:result:'
+
+
+class LRUByteCache:
+    """
+    Thread-safe in-process LRU cache of byte strings, bounded by the total size of the cached values.
+    The least recently used values are evicted once the bound is exceeded.
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+class ResultCache:
+    """
+    Two tier cache of encoded results: an in-process LRU cache and an optional Redis shared by all API instances.
+    Keys have to identify the result including the version of the data, entries are never invalidated explicitly.
+    Redis failures are logged and treated as cache misses, so the API keeps working without Redis.
+    A `max_bytes` or `entry_max_bytes` of 0 disables both tiers.
+    """
+    def __init__(
+        self,
+        max_bytes: int,
+        entry_max_bytes: int,
+        redis_url: Optional[str] = None,
+        redis_ttl: Optional[int] = None,
+    ):
+        self.enabled = max_bytes > 0 and entry_max_bytes > 0
+        self.entry_max_bytes = entry_max_bytes
+        self._local = LRUByteCache(max_bytes)
+        self._redis = redis.Redis.from_url(redis_url, socket_timeout=1) if redis_url and self.enabled else None
+        self._redis_ttl = redis_ttl or None
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Look up a result, promoting results found in Redis into the in-process cache. Blocks on Redis."""
+        value = self._local.get(key)
+        if value is not None or self._redis is None:
+            return value
+        try:
+            value = self._redis.get(REDIS_KEY_PREFIX + key)
+        except redis.RedisError as ex:
+            log.warning(f'Result cache lookup in Redis failed: {ex}')
+            return None
+        if value is not None:
+            self._local.set(key, value)
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        """Store a result in both tiers, results larger than `entry_max_bytes` are skipped. Blocks on Redis."""
+        if not self.enabled or len(value) > self.entry_max_bytes:
+            return
+        self._local.set(key, value)
+        if self._redis is None:
+            return
+        try:
+            self._redis.set(REDIS_KEY_PREFIX + key, value, ex=self._redis_ttl)
+        except redis.RedisError as ex:
+            log.warning(f'Result cache update in Redis failed: {ex}')
+
+    async def get_async(self, key: str) -> Optional[bytes]:
+        """`get` without blocking the event loop (the Redis client is synchronous)."""
+        value = self._local.get(key)
+        if value is not None or self._redis is None:
+            return value
+        return await run_in_threadpool(self.get, key)
+
+    async def set_async(self, key: str, value: bytes) -> None:
+        """`set` without blocking the event loop (the Redis client is synchronous)."""
+        if self._redis is None:
+            self.set(key, value)
+        else:
+            await run_in_threadpool(self.set, key, value)
+
+    async def tee(
+        self,
+        key: str,
+        chunks: AsyncIterator[bytes],
+        still_valid: Optional[Callable[[], Awaitable[bool]]] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Pass the chunks of a streamed result through and cache the complete result afterwards.
+        Stops collecting once the result exceeds `entry_max_bytes`, so large streams are not held in memory.
+        If given, `still_valid` is awaited after the stream and the result is only cached if it returns True.
+        """
+        parts: Optional[List[bytes]] = [] if self.enabled else None
+        size = 0
+        async for chunk in chunks:
+            if parts is not None:
+                size += len(chunk)
+                if size > self.entry_max_bytes:
+                    parts = None
+                else:
+                    parts.append(chunk)
+            yield chunk
+        if parts is not None and (still_valid is None or await still_valid()):
+            await self.set_async(key, b''.join(parts))
+
+
+@lru_cache
+def get_result_cache() -> ResultCache:
+    """Create the result cache of the infection data endpoint as configured."""
+    return ResultCache(
+        max_bytes=config.RESULT_CACHE_MAX_BYTES,
+        entry_max_bytes=config.RESULT_CACHE_ENTRY_MAX_BYTES,
+        redis_url=config.RESULT_CACHE_REDIS_URL or None,
+        redis_ttl=config.RESULT_CACHE_REDIS_TTL,
+    )
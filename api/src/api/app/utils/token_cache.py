@@ -0,0 +1,58 @@
+import hashlib
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from app.models.user_detail import UserDetail
+from core import config
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU cache of the users of already verified bearer tokens, so repeated requests with the same token
+    skip the signature verification. Entries expire with the token (its `exp` claim) and are dropped with the
+    signing keys of their realm (see `invalidate_realm`).
+    Keys are hashes of realm and token, the tokens themselves are not kept in memory.
+    Only used from the event loop, so it needs no locking.
+    """
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        # user, expiry and realm by key
+        self._entries: OrderedDict[bytes, Tuple[UserDetail, float, str]] = OrderedDict()
+
+    @staticmethod
+    def _key(token: str, realm: str) -> bytes:
+        return hashlib.sha256(f'{realm}\0{token}'.encode('utf-8')).digest()
+
+    def get(self, token: str, realm: str) -> Optional[UserDetail]:
+        key = self._key(token, realm)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        user, expires_at, _ = entry
+        if time.time() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return user
+
+    def set(self, token: str, realm: str, user: UserDetail, expires_at: float) -> None:
+        if self.max_entries <= 0 or time.time() >= expires_at:
+            return
+        key = self._key(token, realm)
+        self._entries[key] = (user, expires_at, realm)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate_realm(self, realm: str) -> None:
+        """Drop the entries of a realm, e.g. when its signing keys were rotated or the realm was removed."""
+        for key in [key for key, (_, _, entry_realm) in self._entries.items() if entry_realm == realm]:
+            del self._entries[key]
+
+
+@lru_cache
+def get_token_cache() -> VerifiedTokenCache:
+    """Create the verified token cache of the authentication middleware as configured."""
+    return VerifiedTokenCache(config.AUTH_TOKEN_CACHE_SIZE)
@@ -1,3 +1,11 @@
 task_routes = {
-    "test_worker": {"queue": "hello_world"}
+    "test_worker": {"queue": "hello_world"},
+    "import_scenario_data": {"queue": "scenario_import"},
 }
+# report STARTED state of jobs
+task_track_started = True
+# a job is only acknowledged once it finished, so an import is redelivered if the worker dies
+task_acks_late = True
+worker_prefetch_multiplier = 1
+# store the arguments of jobs with their state, the import status is only reported for the job's own scenario
+result_extended = True
@@ -27,11 +27,56 @@ DATABASE_URL = config(
     default=f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}:{POSTGRES_PORT}/{POSTGRES_DB}",
 )
 
+# Database connection pool settings
+# persistent connections, additional connections under load and seconds to wait for a free connection
+DB_POOL_SIZE = config("DB_POOL_SIZE", cast=int, default=5)
+DB_MAX_OVERFLOW = config("DB_MAX_OVERFLOW", cast=int, default=10)
+DB_POOL_TIMEOUT = config("DB_POOL_TIMEOUT", cast=float, default=30)
+# seconds after which connections are replaced (-1 never) and liveness check of connections on checkout
+DB_POOL_RECYCLE = config("DB_POOL_RECYCLE", cast=int, default=1800)
+DB_POOL_PRE_PING = config("DB_POOL_PRE_PING", cast=bool, default=True)
+# server side limit of single statements in milliseconds (0 disables it), loading imported data is not limited
+DB_STATEMENT_TIMEOUT = config("DB_STATEMENT_TIMEOUT", cast=int, default=60000)
+# log all SQL statements
+DB_ECHO = config("DB_ECHO", cast=bool, default=False)
+
+# Scenario import settings
+# executor used to decode the h5 result files ('process' or 'thread') and its number of workers (default: CPU count)
+SCENARIO_IMPORT_EXECUTOR = config("SCENARIO_IMPORT_EXECUTOR", cast=str, default="process")
+SCENARIO_IMPORT_WORKERS = config("SCENARIO_IMPORT_WORKERS", cast=int, default=None)
+# storage layout of scenario results: 'rows' (one row per day) or 'series' (one array of daily values per series)
+SCENARIO_DATA_STORAGE = config("SCENARIO_DATA_STORAGE", cast=str, default="rows")
+# precompute the roll-up of county results to states and intermediate regions during import
+SCENARIO_REGION_ROLLUP = config("SCENARIO_REGION_ROLLUP", cast=bool, default=False)
+
+# Result cache of the infection data endpoint
+# total size of the in-process cache and largest cached response in bytes (0 disables caching, also in Redis)
+RESULT_CACHE_MAX_BYTES = config("RESULT_CACHE_MAX_BYTES", cast=int, default=256 * 1024 * 1024)
+RESULT_CACHE_ENTRY_MAX_BYTES = config("RESULT_CACHE_ENTRY_MAX_BYTES", cast=int, default=32 * 1024 * 1024)
+# optional Redis shared by all API instances (e.g. redis://redis:6379/1) and expiry of its entries in seconds
+RESULT_CACHE_REDIS_URL = config("RESULT_CACHE_REDIS_URL", cast=str, default="")
+RESULT_CACHE_REDIS_TTL = config("RESULT_CACHE_REDIS_TTL", cast=int, default=7 * 24 * 3600)
+
 # OAuth2 settings
 IDP_ROOT_URL = config("IDP_ROOT_URL", cast=URL)
 IDP_API_URL = config("IDP_API_URL", cast=URL)
+# seconds the signing keys (JWKS) of a realm are cached, minimum seconds between refetches for unknown key IDs
+JWKS_CACHE_TTL = config("JWKS_CACHE_TTL", cast=float, default=3600)
+JWKS_MIN_REFRESH_INTERVAL = config("JWKS_MIN_REFRESH_INTERVAL", cast=float, default=30)
+# number of verified bearer tokens cached by the authentication middleware until they expire or the signing keys
+# of their realm are dropped (0 disables caching)
+AUTH_TOKEN_CACHE_SIZE = config("AUTH_TOKEN_CACHE_SIZE", cast=int, default=10000)
+# seconds the realm list of the IdP API is used before it is refreshed, and before a failed fetch is retried
+REALM_DIRECTORY_TTL = config("REALM_DIRECTORY_TTL", cast=float, default=600)
+REALM_DIRECTORY_RETRY_INTERVAL = config("REALM_DIRECTORY_RETRY_INTERVAL", cast=float, default=30)
+# timeout of requests to the IdP in seconds
+IDP_REQUEST_TIMEOUT = config("IDP_REQUEST_TIMEOUT", cast=float, default=5)
 
 # Forward of uploaded case file settings
 UPLOAD_FORWARD_ENDPOINT = config("UPLOAD_FORWARD_ENDPOINT", cast=URL)
 UPLOAD_FORWARD_ACCESS_KEY = config("UPLOAD_FORWARD_ACCESS_KEY", cast=Secret)
 UPLOAD_FORWARD_SECRET_KEY = config("UPLOAD_FORWARD_SECRET_KEY", cast=Secret)
+# part size of multipart uploads in bytes (at least 5 MiB, 0 lets the client choose) and parts uploaded in parallel,
+# each upload buffers up to part size times parallel uploads in memory
+UPLOAD_FORWARD_PART_SIZE = config("UPLOAD_FORWARD_PART_SIZE", cast=int, default=5 * 1024 * 1024)
+UPLOAD_FORWARD_PARALLEL_UPLOADS = config("UPLOAD_FORWARD_PARALLEL_UPLOADS", cast=int, default=4)
@@ -2,17 +2,17 @@
 
 from fastapi import Header
 from fastapi import Depends  # noqa: F401
-from jwt import PyJWKClient
 import jwt  # noqa: F401
 
 from fastapi import Depends, HTTPException
 from fastapi.security.utils import get_authorization_scheme_param
 
 from app.models.user_detail import UserDetail
-from core.config import IDP_ROOT_URL
-from starlette.status import HTTP_401_UNAUTHORIZED, HTTP_403_FORBIDDEN
+from app.utils.jwks_cache import JWKSFetchError, UnknownRealmError, get_jwks_cache
+from starlette.status import HTTP_401_UNAUTHORIZED, HTTP_403_FORBIDDEN, HTTP_503_SERVICE_UNAVAILABLE
 
 from functools import partial
+from typing import Optional, Tuple
 
 
 class NotAuthorizedException(HTTPException):
@@ -64,16 +64,24 @@ async def get_user(
     https://fastapi.tiangolo.com/tutorial/dependencies/\n
     Use user_detail_extractor for validating and extracting the token via dependency injection\n
     """
+    user, _ = await verify_token(access_token, x_realm)
+    return user
 
-    # every lha has its own realm and users are associated with a specific realm (stored in X-Realm header)
-    # the signing key is different across realms, to decode we need to specify the certificate endpoint for PyJWKClient
-    # and PyJWKClient will fetch the signing key for us
-    url = f"{IDP_ROOT_URL}/realms/{x_realm}/protocol/openid-connect/certs"
-    jwks_client = PyJWKClient(url)
 
+async def verify_token(
+        access_token: str,
+        x_realm: str) -> Tuple[UserDetail, Optional[float]]:
+    """Verify the token and extract user information.\n
+    Returns the UserDetail object and the expiry of the token (`exp` claim as UNIX timestamp, None if not given),
+    raises HTTPException (401) like get_user\n
+    """
+
+    # every lha has its own realm and users are associated with a specific realm (stored in X-Realm header)
+    # the signing key is different across realms, the keys of each realm are fetched from its certificate endpoint
+    # once and cached, so verifying a token does not need a request to the IdP
     try:
         # decode bearer token
-        signing_key = jwks_client.get_signing_key_from_jwt(access_token)
+        signing_key = await get_jwks_cache().get_signing_key(x_realm, access_token)
         payload = jwt.decode(
             access_token,
             signing_key.key,
@@ -97,26 +105,32 @@ async def get_user(
         if userId is None:
             raise AuthenticationException("User Id not specified")
     
-        return UserDetail(userId, email, roles)
+        return UserDetail(userId, email, roles), payload.get("exp")
     except jwt.exceptions.InvalidTokenError:
         raise AuthenticationException("Invalid token")
+    except UnknownRealmError:
+        raise AuthenticationException("Unknown realm")
+    except JWKSFetchError:
+        raise HTTPException(
+            status_code=HTTP_503_SERVICE_UNAVAILABLE, detail="Signing keys of the realm are unavailable"
+        )
 
 
-async def realm_extractor(x_realm: str = Header("X-Realm")):
+async def realm_extractor(x_realm: str = Header("")):
     """
     Dependency injection way to extract realm information from X-Realm header\n
     Use it in your endpoints like this:\n
     def foo(x_realm: str = Depends(realm_extractor))
     """
-    return get_realm(x_realm)
+    return await get_realm(x_realm)
 
-async def bearer_extractor(authorization: str = Header("Authorization")):
+async def bearer_extractor(authorization: str = Header("")):
     """
     Dependency injection way to extract and validate bearer token from Authorization header\n
     Use it in your endpoints like this:\n
     def foo(authorization: str = Depends(bearer_extractor))
     """
-    return get_bearer(authorization)
+    return await get_bearer(authorization)
 
 async def user_detail_extractor(
         access_token: str = Depends(bearer_extractor),
@@ -127,7 +141,7 @@ async def user_detail_extractor(
     Use it in your endpoints like this:\n
     def foo(user: UserDetail = Depends(user_detail_extractor))
     """
-    return get_user(access_token, x_realm)
+    return await get_user(access_token, x_realm)
     
 
 
@@ -151,4 +165,6 @@ Similar dependencies can be created for other roles
 e.g. verify_lha_admin = partial(verify_user_with_role, "lha-admin")
 then in endpoints: def foo(user: UserDetail = Depends(verify_lha_admin))
 """
-lha_user_filter = partial(user_role_filter, "lha-user")
\ No newline at end of file
+lha_user_filter = partial(user_role_filter, "lha-user")
+# Operators of the API, e.g. for the state of the database connection pool
+admin_filter = partial(user_role_filter, "admin")
\ No newline at end of file
@@ -8,6 +8,8 @@
     The version of the OpenAPI document: 1
     Generated by: https://openapi-generator.tech
 """
+from contextlib import asynccontextmanager
+
 from core import config
 
 from fastapi import FastAPI
@@ -22,13 +24,23 @@ from app.apis.parameter_definitions_api import router as ParameterDefinitionsApi
 from app.apis.scenarios_api import router as ScenariosApiRouter
 from app.apis.utils_api import router as UtilsApiRouter
 from app.middlewares.authentication_middleware import AuthenticationMiddleware
+from app.utils.realm_directory import get_realm_directory
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Fetch the realm list in the background, so the first case data upload finds it
+    get_realm_directory().warm_up()
+    yield
+
 
 app = FastAPI(
     title=config.PROJECT_NAME,
     version=config.VERSION,
     docs_url="/",
     redoc_url="/docs",
-    root_path=config.API_PATH_PREFIX
+    root_path=config.API_PATH_PREFIX,
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -0,0 +1,15 @@
+import os
+
+# Settings without defaults, so modules reading the configuration on import can be loaded.
+# The tests do not connect to any of these services.
+for name, value in {
+    'POSTGRES_USER': 'test',
+    'POSTGRES_PASSWORD': 'test',
+    'POSTGRES_DB': 'test',
+    'IDP_ROOT_URL': 'http://idp.invalid',
+    'IDP_API_URL': 'http://idp.invalid/api',
+    'UPLOAD_FORWARD_ENDPOINT': 'minio.invalid:9000',
+    'UPLOAD_FORWARD_ACCESS_KEY': 'test',
+    'UPLOAD_FORWARD_SECRET_KEY': 'test',
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,85 @@
+import csv
+import io
+from datetime import date
+
+import numpy
+
+from app.db.bulk import _DATAPOINT_COPY_COLUMNS, _SERIES_COPY_COLUMNS, _datapoint_csv_chunks, _series_csv_chunks
+
+SCENARIO = '6f1c2f0e-3b8a-4c1e-9d2a-0a5b6c7d8e9f'
+NODES = ['0b6d1a84-6f3e-4d51-a9a7-6c4f1e2d3c4b', '1c7e2b95-7a4f-4e62-b0b8-7d5a2f3e4d5c']
+GROUP = '2d8f3ca6-8b5a-4f73-81c9-8e6b3a4f5e6d'
+COMPARTMENT = '3e9a4db7-9c6b-4a84-92da-9f7c4b5a6f7e'
+
+
+def _datapoints(day_offsets, nodes, values):
+    size = len(values)
+    return {
+        'dayOffset': numpy.array(day_offsets, dtype=numpy.int32),
+        'nodeId': numpy.array(nodes, dtype=object),
+        'groupId': numpy.full(size, GROUP, dtype=object),
+        'compartmentId': numpy.full(size, COMPARTMENT, dtype=object),
+        'percentile': numpy.full(size, 50, dtype=numpy.int16),
+        'value': numpy.array(values, dtype=numpy.float64),
+    }
+
+
+def _rows(chunks):
+    return [row for chunk in chunks for row in csv.reader(io.StringIO(chunk.decode('utf-8')))]
+
+
+def test_datapoint_rows_match_copy_columns():
+    datapoints = _datapoints([0, 1, 31], [NODES[0]] * 3, [1.5, 0.1, 12345678.25])
+    rows = _rows(_datapoint_csv_chunks(SCENARIO, date(2024, 1, 1), datapoints))
+    assert all(len(row) == len(_DATAPOINT_COPY_COLUMNS) for row in rows)
+    assert rows == [
+        [SCENARIO, NODES[0], GROUP, COMPARTMENT, '50', '2024-01-01', '1.5'],
+        [SCENARIO, NODES[0], GROUP, COMPARTMENT, '50', '2024-01-02', '0.1'],
+        [SCENARIO, NODES[0], GROUP, COMPARTMENT, '50', '2024-02-01', '12345678.25'],
+    ]
+
+
+def test_datapoint_values_round_trip():
+    values = [0.1, 1 / 3, 1e-30, 1e30, -0.0, 123456789.123]
+    datapoints = _datapoints(range(len(values)), [NODES[0]] * len(values), values)
+    rows = _rows(_datapoint_csv_chunks(SCENARIO, date(2024, 1, 1), datapoints))
+    assert [float(row[-1]) for row in rows] == values
+
+
+def test_datapoint_nan_is_not_null():
+    # an empty field would be NULL for COPY and violate the NOT NULL constraint of the value column
+    datapoints = _datapoints([0, 1], [NODES[0]] * 2, [numpy.nan, 2.0])
+    chunk = b''.join(_datapoint_csv_chunks(SCENARIO, date(2024, 1, 1), datapoints))
+    assert chunk.decode('utf-8').splitlines()[0].endswith(',NaN')
+
+
+def test_datapoint_chunks_split_rows():
+    datapoints = _datapoints(range(5), [NODES[0]] * 5, [1.0, 2.0, 3.0, 4.0, 5.0])
+    chunks = list(_datapoint_csv_chunks(SCENARIO, date(2024, 1, 1), datapoints, chunk_rows=2))
+    assert [chunk.count(b'\n') for chunk in chunks] == [2, 2, 1]
+    assert all(chunk.endswith(b'\n') for chunk in chunks)
+
+
+def test_no_chunks_without_datapoints():
+    datapoints = _datapoints([], [], [])
+    assert list(_datapoint_csv_chunks(SCENARIO, date(2024, 1, 1), datapoints)) == []
+    assert list(_series_csv_chunks(SCENARIO, datapoints)) == []
+
+
+def test_series_rows_hold_array_literals():
+    datapoints = _datapoints([0, 1, 2, 0, 2], [NODES[0]] * 3 + [NODES[1]] * 2, [1.5, 0.1, 3.0, 1e30, -2.0])
+    rows = _rows(_series_csv_chunks(SCENARIO, datapoints))
+    assert all(len(row) == len(_SERIES_COPY_COLUMNS) for row in rows)
+    # the array literal is quoted as one field, missing days are NaN
+    assert rows == [
+        [SCENARIO, NODES[0], GROUP, COMPARTMENT, '50', '{1.5,0.1,3.0}'],
+        [SCENARIO, NODES[1], GROUP, COMPARTMENT, '50', '{1e+30,NaN,-2.0}'],
+    ]
+
+
+def test_series_chunks_split_series():
+    datapoints = _datapoints([0, 1] * 3, [NODES[0]] * 2 + [NODES[1]] * 2 + [NODES[0]] * 2, [1.0] * 6)
+    datapoints['groupId'][4:] = COMPARTMENT
+    # two days per series, so chunks of four values hold two series
+    chunks = list(_series_csv_chunks(SCENARIO, datapoints, chunk_rows=4))
+    assert [chunk.count(b'\n') for chunk in chunks] == [2, 1]
@@ -0,0 +1,71 @@
+import re
+
+import pytest
+
+from app.utils import case_data_validation
+from app.utils.case_data_validation import CaseDataValidationError, CaseDataValidator
+
+HEADER = 'id;date;value\n'
+FIRST_ROW = '1;2024-03-01;0,5\n'
+
+
+def _validate(rows: str) -> None:
+    CaseDataValidator(columns=3).feed((HEADER + FIRST_ROW + rows).encode(), final=True)
+
+
+@pytest.mark.parametrize('value', ['nan', 'NaN', '-inf', '+Infinity', '1,5e3'])
+def test_number_literal_accepted_by_batch_check(value):
+    # all lines are valid, so the batch passes pyarrow's check
+    _validate(f'2;2024-03-02;{value}\n')
+
+
+@pytest.mark.parametrize('value', ['nan', 'NaN', '-inf', '+Infinity', '1,5e3'])
+def test_number_literal_accepted_by_line_check(value):
+    # the invalid last line fails the batch, so all lines of it are checked one by one
+    with pytest.raises(CaseDataValidationError, match='Line 4 has the wrong amount of columns'):
+        _validate(f'2;2024-03-02;{value}\n3;2024-03-03\n')
+
+
+@pytest.mark.parametrize('value', [' 1', '1 ', 'nan(1)', 'infinit', '1.5'])
+def test_number_literal_rejected(value):
+    with pytest.raises(CaseDataValidationError, match=re.escape(f"Line 3, column 'value': '{value}' is not a number")):
+        _validate(f'2;2024-03-02;{value}\n')
+
+
+INTEGER_ROW = '1;2024-03-01;5\n'
+
+
+def _validate_lines(lines: str, batch_size: int, monkeypatch) -> None:
+    # feeding line by line with a tiny batch size checks every line in a batch of its own
+    monkeypatch.setattr(case_data_validation, '_BATCH_SIZE', batch_size)
+    validator = CaseDataValidator(columns=3)
+    for line in lines.splitlines(keepends=True):
+        validator.feed(line.encode())
+    validator.feed(b'', final=True)
+
+
+@pytest.mark.parametrize('batch_size', [1, 1024])
+@pytest.mark.parametrize('decimals', ['0.5;1.25', '0,5;1,25'])
+def test_decimal_separator_decided_by_first_decimal_of_column(batch_size, decimals, monkeypatch):
+    # the first data row holds integers only, so both separators are accepted until the first decimal
+    first, second = decimals.split(';')
+    _validate_lines(
+        HEADER + INTEGER_ROW + f'2;2024-03-02;7\n3;2024-03-03;{first}\n4;2024-03-04;nan\n5;2024-03-05;{second}\n',
+        batch_size, monkeypatch
+    )
+
+
+@pytest.mark.parametrize('batch_size', [1, 1024])
+def test_decimal_separator_per_column(batch_size, monkeypatch):
+    _validate_lines('a;b;c\n1;2;3\n0.5;1,5;7\n2.5;3,5;8.0\n', batch_size, monkeypatch)
+
+
+@pytest.mark.parametrize('batch_size', [1, 1024])
+def test_decimal_separator_mixed_in_column_rejected(batch_size, monkeypatch):
+    with pytest.raises(
+        CaseDataValidationError,
+        match=re.escape("Line 5, column 'value': '1,5' is not a number with the decimal separator '.'"),
+    ):
+        _validate_lines(
+            HEADER + INTEGER_ROW + '2;2024-03-02;7\n3;2024-03-03;0.5\n4;2024-03-04;1,5\n', batch_size, monkeypatch
+        )
@@ -0,0 +1,211 @@
+import asyncio
+import json
+import time
+
+import httpx
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+import security_api
+from app.models.user_detail import UserDetail
+from app.utils.jwks_cache import JWKSCache, JWKSFetchError, UnknownRealmError
+from app.utils.token_cache import VerifiedTokenCache
+
+IDP = 'http://idp.test'
+REALM = 'lha-a'
+KEYS = {kid: rsa.generate_private_key(public_exponent=65537, key_size=2048) for kid in ['key-1', 'key-2']}
+
+
+def _jwk(kid: str) -> dict:
+    return {**json.loads(RSAAlgorithm.to_jwk(KEYS[kid].public_key())), 'kid': kid, 'use': 'sig', 'alg': 'RS256'}
+
+
+def _token(kid: str) -> str:
+    claims = {
+        'sub': 'user', 'azp': 'loki-front', 'email': 'user@test', 'aud': 'loki-back', 'exp': time.time() + 300,
+    }
+    return jwt.encode(claims, KEYS[kid], algorithm='RS256', headers={'kid': kid})
+
+
+class StubIdP:
+    """Answers the signing key requests of the JWKS cache and counts them per realm."""
+    def __init__(self, realms: dict):
+        # key IDs by realm, realms missing here are unknown (404), those mapped to None fail (500)
+        self.realms = realms
+        self.requests = {}
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        realm = request.url.path.split('/')[2]
+        self.requests[realm] = self.requests.get(realm, 0) + 1
+        if realm not in self.realms:
+            return httpx.Response(404, json={'error': 'Realm does not exist'})
+        if self.realms[realm] is None:
+            return httpx.Response(500)
+        return httpx.Response(200, json={'keys': [_jwk(kid) for kid in self.realms[realm]]})
+
+    def cache(self, ttl: float = 3600, min_refresh_interval: float = 30, on_keys_dropped=None) -> JWKSCache:
+        return JWKSCache(
+            IDP, ttl, min_refresh_interval, timeout=1, transport=httpx.MockTransport(self.handle),
+            on_keys_dropped=on_keys_dropped,
+        )
+
+
+def test_signing_key_is_fetched_once():
+    idp = StubIdP({REALM: ['key-1']})
+    cache = idp.cache()
+
+    async def verify():
+        for _ in range(3):
+            key = await cache.get_signing_key(REALM, _token('key-1'))
+            assert key.key_id == 'key-1'
+    asyncio.run(verify())
+    assert idp.requests == {REALM: 1}
+
+
+def test_unknown_realm_is_answered_with_401(monkeypatch):
+    idp = StubIdP({REALM: ['key-1']})
+    monkeypatch.setattr(security_api, 'get_jwks_cache', idp.cache)
+    with pytest.raises(security_api.AuthenticationException) as error:
+        asyncio.run(security_api.verify_token(_token('key-1'), 'made-up'))
+    assert error.value.status_code == 401
+
+
+def test_unavailable_idp_is_answered_with_503(monkeypatch):
+    idp = StubIdP({REALM: None})
+    monkeypatch.setattr(security_api, 'get_jwks_cache', idp.cache)
+    with pytest.raises(security_api.HTTPException) as error:
+        asyncio.run(security_api.verify_token(_token('key-1'), REALM))
+    assert error.value.status_code == 503
+
+
+def test_token_of_realm_verifies(monkeypatch):
+    idp = StubIdP({REALM: ['key-1']})
+    monkeypatch.setattr(security_api, 'get_jwks_cache', idp.cache)
+    user, expires_at = asyncio.run(security_api.verify_token(_token('key-1'), REALM))
+    assert user.userId == 'user' and expires_at > time.time()
+
+
+@pytest.mark.parametrize('realm, error', [('made-up', UnknownRealmError), (REALM, JWKSFetchError)])
+def test_failed_fetch_is_not_repeated_within_interval(realm, error):
+    idp = StubIdP({REALM: None})
+    cache = idp.cache(min_refresh_interval=0.2)
+
+    async def verify():
+        for _ in range(3):
+            with pytest.raises(error):
+                await cache.get_signing_key(realm, _token('key-1'))
+        assert idp.requests == {realm: 1}
+        # the next fetch is made once the interval has passed
+        await asyncio.sleep(0.3)
+        with pytest.raises(error):
+            await cache.get_signing_key(realm, _token('key-1'))
+        assert idp.requests == {realm: 2}
+    asyncio.run(verify())
+
+
+def test_concurrent_requests_of_unknown_realm_share_a_fetch():
+    idp = StubIdP({})
+    cache = idp.cache()
+
+    async def verify():
+        results = await asyncio.gather(
+            *(cache.get_signing_key('made-up', _token('key-1')) for _ in range(5)), return_exceptions=True
+        )
+        assert all(isinstance(result, UnknownRealmError) for result in results)
+    asyncio.run(verify())
+    assert idp.requests == {'made-up': 1}
+
+
+def test_key_rotation_triggers_one_refetch():
+    idp = StubIdP({REALM: ['key-1']})
+    cache = idp.cache(min_refresh_interval=0.1)
+
+    async def verify():
+        await cache.get_signing_key(REALM, _token('key-1'))
+        idp.realms[REALM] = ['key-2']
+        await asyncio.sleep(0.2)
+        # concurrent requests with the new key wait for a single refetch
+        keys = await asyncio.gather(*(cache.get_signing_key(REALM, _token('key-2')) for _ in range(5)))
+        assert all(key.key_id == 'key-2' for key in keys)
+        # the old key is gone with the refetch
+        with pytest.raises(jwt.InvalidTokenError):
+            await cache.get_signing_key(REALM, _token('key-1'))
+    asyncio.run(verify())
+    assert idp.requests == {REALM: 2}
+
+
+def test_unknown_key_is_not_refetched_within_interval():
+    idp = StubIdP({REALM: ['key-1']})
+    cache = idp.cache(min_refresh_interval=30)
+
+    async def verify():
+        await cache.get_signing_key(REALM, _token('key-1'))
+        for _ in range(3):
+            with pytest.raises(jwt.InvalidTokenError):
+                await cache.get_signing_key(REALM, _token('key-2'))
+    asyncio.run(verify())
+    assert idp.requests == {REALM: 1}
+
+
+def test_removed_realm_loses_its_keys():
+    idp = StubIdP({REALM: ['key-1']})
+    cache = idp.cache(ttl=0)
+
+    async def verify():
+        await cache.get_signing_key(REALM, _token('key-1'))
+        del idp.realms[REALM]
+        with pytest.raises(UnknownRealmError):
+            await cache.get_signing_key(REALM, _token('key-1'))
+    asyncio.run(verify())
+
+
+def test_rotated_keys_invalidate_verified_tokens_of_realm():
+    idp = StubIdP({REALM: ['key-1'], 'lha-b': ['key-1']})
+    tokens = VerifiedTokenCache(max_entries=10)
+    cache = idp.cache(ttl=0, on_keys_dropped=tokens.invalidate_realm)
+    token = _token('key-1')
+
+    async def verify():
+        for realm in [REALM, 'lha-b']:
+            await cache.get_signing_key(realm, token)
+            tokens.set(token, realm, UserDetail('user'), time.time() + 60)
+        idp.realms[REALM] = ['key-2']
+        await cache.get_signing_key(REALM, _token('key-2'))
+    asyncio.run(verify())
+    assert tokens.get(token, REALM) is None
+    assert tokens.get(token, 'lha-b') is not None
+
+
+@pytest.mark.parametrize('keys', [['key-1'], ['key-1', 'key-2'], None])
+def test_kept_keys_do_not_invalidate(keys):
+    # unchanged, added keys or a failed refresh (the previous keys stay in use)
+    idp = StubIdP({REALM: ['key-1']})
+    dropped = []
+    cache = idp.cache(ttl=0, on_keys_dropped=dropped.append)
+
+    async def verify():
+        await cache.get_signing_key(REALM, _token('key-1'))
+        idp.realms[REALM] = keys
+        await cache.get_signing_key(REALM, _token('key-1'))
+    asyncio.run(verify())
+    assert idp.requests == {REALM: 2}
+    assert dropped == []
+
+
+def test_removed_realm_invalidates():
+    idp = StubIdP({REALM: ['key-1']})
+    dropped = []
+    cache = idp.cache(ttl=0, on_keys_dropped=dropped.append)
+
+    async def verify():
+        await cache.get_signing_key(REALM, _token('key-1'))
+        del idp.realms[REALM]
+        with pytest.raises(UnknownRealmError):
+            await cache.get_signing_key(REALM, _token('key-1'))
+        # unknown realms without keys have nothing to drop
+        with pytest.raises(UnknownRealmError):
+            await cache.get_signing_key('made-up', _token('key-1'))
+    asyncio.run(verify())
+    assert dropped == [REALM]
@@ -0,0 +1,67 @@
+import asyncio
+
+import httpx
+
+from app.utils.realm_directory import RealmDirectory
+
+
+class StubIdPApi:
+    """Answers the realm list requests of the realm directory and counts them."""
+    def __init__(self, realms: list):
+        # realm representations as returned by the IdP API, None lets the requests fail (500)
+        self.realms = realms
+        self.requests = 0
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        assert request.url.path == '/api/realms'
+        self.requests += 1
+        if self.realms is None:
+            return httpx.Response(500)
+        return httpx.Response(200, json=self.realms)
+
+    def directory(self, ttl: float = 600, retry_interval: float = 30) -> RealmDirectory:
+        return RealmDirectory(
+            'http://idp.test/api', ttl, retry_interval, timeout=1, transport=httpx.MockTransport(self.handle)
+        )
+
+
+async def _settle(directory: RealmDirectory) -> None:
+    """Wait for the background refresh started by the last lookup."""
+    if directory._refresh_task:
+        await directory._refresh_task
+
+
+def test_lookup_answers_from_fetched_list():
+    idp = StubIdPApi([{'realm': 'lha-a', 'displayName': 'LHA A'}, {'realm': 'lha-b'}])
+    directory = idp.directory()
+
+    async def lookup():
+        # the first lookup does not wait for the IdP
+        assert directory.display_name('lha-a') is None
+        await _settle(directory)
+        assert directory.display_name('lha-a') == 'LHA A'
+        assert directory.display_name('lha-b') == 'lha-b'
+        assert directory.display_name('made-up') is None
+        await _settle(directory)
+    asyncio.run(lookup())
+    assert idp.requests == 1
+
+
+def test_failed_refresh_keeps_list_and_is_retried_after_interval():
+    idp = StubIdPApi([{'realm': 'lha-a', 'displayName': 'LHA A'}])
+    directory = idp.directory(ttl=0, retry_interval=0.2)
+
+    async def lookup():
+        await directory.refresh()
+        idp.realms = None
+        for _ in range(3):
+            assert directory.display_name('lha-a') == 'LHA A'
+            await _settle(directory)
+        assert idp.requests == 2
+        idp.realms = [{'realm': 'lha-a', 'displayName': 'LHA A (renamed)'}]
+        await asyncio.sleep(0.3)
+        directory.display_name('lha-a')
+        await _settle(directory)
+        assert directory.display_name('lha-a') == 'LHA A (renamed)'
+        await _settle(directory)
+    asyncio.run(lookup())
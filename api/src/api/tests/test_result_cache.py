@@ -0,0 +1,47 @@
+import asyncio
+
+from app.utils.result_cache import ResultCache
+
+CHUNKS = [b'date,value\n', b'2024-01-01,0.1\n']
+
+
+async def _stream():
+    for chunk in CHUNKS:
+        yield chunk
+
+
+def _tee(cache: ResultCache, **kwargs) -> bytes:
+    async def collect():
+        return b''.join([chunk async for chunk in cache.tee('key', _stream(), **kwargs)])
+    return asyncio.run(collect())
+
+
+def _still_valid(result: bool):
+    async def still_valid() -> bool:
+        return result
+    return still_valid
+
+
+def test_tee_caches_complete_stream():
+    cache = ResultCache(max_bytes=1024, entry_max_bytes=1024)
+    assert _tee(cache) == b''.join(CHUNKS)
+    assert cache.get('key') == b''.join(CHUNKS)
+
+
+def test_tee_skips_results_over_entry_limit():
+    cache = ResultCache(max_bytes=1024, entry_max_bytes=16)
+    assert _tee(cache) == b''.join(CHUNKS)
+    assert cache.get('key') is None
+
+
+def test_tee_caches_if_still_valid():
+    cache = ResultCache(max_bytes=1024, entry_max_bytes=1024)
+    _tee(cache, still_valid=_still_valid(True))
+    assert cache.get('key') == b''.join(CHUNKS)
+
+
+def test_tee_skips_outdated_result():
+    # e.g. an import of the scenario was committed while the result was streamed
+    cache = ResultCache(max_bytes=1024, entry_max_bytes=1024)
+    assert _tee(cache, still_valid=_still_valid(False)) == b''.join(CHUNKS)
+    assert cache.get('key') is None
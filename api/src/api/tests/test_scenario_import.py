@@ -0,0 +1,39 @@
+import zipfile
+
+import pytest
+
+from app.jobs.scenario_import import ScenarioImportError, extract_percentiles
+
+
+def _archive(tmp_path, members):
+    path = tmp_path / 'results.zip'
+    with zipfile.ZipFile(path, 'w') as archive:
+        for name in members:
+            if name.endswith('/'):
+                archive.writestr(zipfile.ZipInfo(name), b'')
+            else:
+                archive.writestr(name, b'data')
+    return str(path)
+
+
+def test_extracts_h5_files_of_each_percentile(tmp_path):
+    zip_path = _archive(tmp_path, ['p05/', 'p05/Results.h5', 'p50/Results.h5', 'p50/readme.txt'])
+    out_folder = tmp_path / 'extracted'
+    assert extract_percentiles(zip_path, str(out_folder)) == {5: str(out_folder / 'p05'), 50: str(out_folder / 'p50')}
+    assert sorted(path.name for path in out_folder.rglob('*') if path.is_file()) == ['Results.h5', 'Results.h5']
+
+
+@pytest.mark.parametrize('members, message', [
+    ([], 'does not contain any percentile folders'),
+    (['p50/'], 'p50 of the zip file contain no h5 files'),
+    (['p50/Results.h5', 'p95/readme.txt'], 'p95 of the zip file contain no h5 files'),
+    # only h5 files directly in a percentile folder are imported
+    (['p50/nested/Results.h5'], 'p50 of the zip file contain no h5 files'),
+    (['results/p50/Results.h5'], 'does not match expected format'),
+])
+def test_rejects_archives_without_results(tmp_path, members, message):
+    zip_path = _archive(tmp_path, members)
+    # the upload is checked without extracting, the import extracts
+    for out_folder in [None, str(tmp_path / 'extracted')]:
+        with pytest.raises(ScenarioImportError, match=message):
+            extract_percentiles(zip_path, out_folder)
@@ -0,0 +1,55 @@
+import time
+
+from app.models.user_detail import UserDetail
+from app.utils.token_cache import VerifiedTokenCache
+
+USER = UserDetail('user', 'user@test', ['admin'])
+
+
+def test_entry_is_returned_for_token_and_realm():
+    cache = VerifiedTokenCache(max_entries=10)
+    cache.set('token', 'lha-a', USER, time.time() + 60)
+    assert cache.get('token', 'lha-a') is USER
+    assert cache.get('token', 'lha-b') is None
+    assert cache.get('other', 'lha-a') is None
+
+
+def test_entry_expires_with_token():
+    cache = VerifiedTokenCache(max_entries=10)
+    cache.set('token', 'lha-a', USER, time.time() + 0.1)
+    # already expired tokens are not cached at all
+    cache.set('expired', 'lha-a', USER, time.time() - 1)
+    assert cache.get('token', 'lha-a') is USER
+    time.sleep(0.2)
+    assert cache.get('token', 'lha-a') is None
+    assert cache.get('expired', 'lha-a') is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = VerifiedTokenCache(max_entries=2)
+    expires_at = time.time() + 60
+    cache.set('token-1', 'lha-a', USER, expires_at)
+    cache.set('token-2', 'lha-a', USER, expires_at)
+    assert cache.get('token-1', 'lha-a') is USER
+    cache.set('token-3', 'lha-a', USER, expires_at)
+    assert cache.get('token-2', 'lha-a') is None
+    assert cache.get('token-1', 'lha-a') is USER
+    assert cache.get('token-3', 'lha-a') is USER
+
+
+def test_size_of_zero_disables_cache():
+    cache = VerifiedTokenCache(max_entries=0)
+    cache.set('token', 'lha-a', USER, time.time() + 60)
+    assert cache.get('token', 'lha-a') is None
+
+
+def test_invalidate_realm_drops_its_entries_only():
+    cache = VerifiedTokenCache(max_entries=10)
+    expires_at = time.time() + 60
+    cache.set('token-1', 'lha-a', USER, expires_at)
+    cache.set('token-2', 'lha-a', USER, expires_at)
+    cache.set('token-1', 'lha-b', USER, expires_at)
+    cache.invalidate_realm('lha-a')
+    assert cache.get('token-1', 'lha-a') is None
+    assert cache.get('token-2', 'lha-a') is None
+    assert cache.get('token-1', 'lha-b') is USER
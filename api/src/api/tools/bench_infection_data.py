@@ -0,0 +1,95 @@
+"""
+Benchmark of the infection data queries served by the datapoint index.
+
+Creates a synthetic dataset (see `tools.synthetic`), times typical filters of `scenario_get_data_by_filter`
+with and without index scans and removes the dataset again. Run from api/src/api with the database settings
+of the API in the environment, e.g.
+
+    python -m tools.bench_infection_data --scenarios 5 --nodes 400
+
+Without index scans the planner has to read the scenario's datapoints sequentially, as it did before the index.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import timedelta
+
+from sqlalchemy import text
+
+from app.db import create_session, engine
+from app.db.tasks import scenario_get_data_by_filter
+from tools.synthetic import START_DATE, Dataset, create_dataset, drop_dataset
+
+
+def _queries(dataset: Dataset):
+    """Filters of the benchmark by name, as keyword arguments of `scenario_get_data_by_filter`."""
+    node, group, compartment = str(dataset.nodes[0]), str(dataset.groups[0]), str(dataset.compartments[0])
+    percentile = dataset.percentiles[len(dataset.percentiles) // 2]
+    return {
+        'one node, one compartment, one percentile': dict(
+            nodes=[node], start_date=None, end_date=None, compartments=[compartment], groups=None,
+            percentiles=[percentile],
+        ),
+        'one node, all series, two weeks': dict(
+            nodes=[node], start_date=START_DATE + timedelta(days=7), end_date=START_DATE + timedelta(days=20),
+            compartments=None, groups=None, percentiles=None,
+        ),
+        'all nodes, one group/compartment/percentile, one day': dict(
+            nodes=None, start_date=START_DATE + timedelta(days=10), end_date=START_DATE + timedelta(days=10),
+            compartments=[compartment], groups=[group], percentiles=[percentile],
+        ),
+    }
+
+
+async def _time_query(scenarioId: str, filters: dict, index: bool, repeats: int) -> float:
+    """Median milliseconds of the query over the given number of runs (after one warm-up run)."""
+    timings = []
+    async with create_session() as session:
+        for run in range(repeats + 1):
+            if not index:
+                # SET LOCAL only lasts for the transaction, which ends with the rollback below
+                for setting in ['enable_indexscan', 'enable_indexonlyscan', 'enable_bitmapscan']:
+                    await session.exec(text(f'SET LOCAL {setting} = off'))
+            started = time.perf_counter()
+            await scenario_get_data_by_filter(session, scenarioId, aggregations=None, **filters)
+            if run:
+                timings.append((time.perf_counter() - started) * 1000)
+            await session.rollback()
+    return statistics.median(timings)
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with create_session() as session:
+        started = time.perf_counter()
+        dataset = await create_dataset(
+            session, args.scenarios, args.nodes, args.groups, args.compartments, args.percentiles, args.days
+        )
+        print(
+            f'Created {len(dataset.scenarios)} scenarios x {dataset.rows_per_scenario} datapoints '
+            f'in {time.perf_counter() - started:.1f}s'
+        )
+        try:
+            async with engine.connect() as connection:
+                await connection.execute(text('ANALYZE scenariodatapoint'))
+                await connection.commit()
+            # Query the scenario imported first, the later ones only add to the table
+            scenarioId = str(dataset.scenarios[0])
+            for name, filters in _queries(dataset).items():
+                without = await _time_query(scenarioId, filters, False, args.repeats)
+                with_index = await _time_query(scenarioId, filters, True, args.repeats)
+                print(f'{name}: {without:.0f} ms without index scans -> {with_index:.0f} ms')
+        finally:
+            await drop_dataset(session, dataset)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scenarios', type=int, default=5)
+    parser.add_argument('--nodes', type=int, default=400)
+    parser.add_argument('--groups', type=int, default=6)
+    parser.add_argument('--compartments', type=int, default=4)
+    parser.add_argument('--percentiles', type=int, nargs='+', default=[25, 50, 75])
+    parser.add_argument('--days', type=int, default=60)
+    parser.add_argument('--repeats', type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
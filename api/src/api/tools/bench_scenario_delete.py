@@ -0,0 +1,145 @@
+"""
+Benchmark of deleting a scenario with its datapoints, parameter values and interventions.
+
+Creates two identical synthetic scenarios (see `tools.synthetic`), deletes one with `scenario_delete` and one
+row by row as before the set-based delete, each in a process of its own to report its peak memory, and removes
+the dataset again. Run from api/src/api with the database settings of the API in the environment, e.g.
+
+    python -m tools.bench_scenario_delete --nodes 400 --days 100
+"""
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import time
+import uuid
+from typing import List, Tuple
+
+from sqlalchemy import delete
+from sqlmodel import select
+
+import app.db.models as db
+from app.db import create_session
+from app.db.tasks import scenario_delete
+from tools.synthetic import START_DATE, Dataset, create_dataset, drop_dataset
+
+MODES = ['set-based', 'row-by-row']
+
+
+async def _delete_row_by_row(scenarioId: str) -> None:
+    """Delete the scenario like `scenario_delete` did before: load all dependent rows and delete them one by one."""
+    async with create_session() as session:
+        for model, column in [
+            (db.InterventionImplementation, db.InterventionImplementation.scenarioId),
+            (db.ParameterValueEntry, db.ParameterValueEntry.parameterValueIdScenario),
+            (db.ParameterValue, db.ParameterValue.scenarioId),
+            (db.ScenarioDatapoint, db.ScenarioDatapoint.scenarioId),
+        ]:
+            for row in (await session.exec(select(model).where(column == scenarioId))).all():
+                await session.delete(row)
+        await session.delete((await session.exec(select(db.Scenario).where(db.Scenario.id == scenarioId))).one())
+        await session.commit()
+
+
+async def _delete(scenarioId: str, mode: str) -> None:
+    """Delete the scenario in the given mode and print the elapsed seconds and peak memory of this process as JSON."""
+    started = time.perf_counter()
+    if mode == 'set-based':
+        async with create_session() as session:
+            await scenario_delete(session, scenarioId)
+    else:
+        await _delete_row_by_row(scenarioId)
+    elapsed = time.perf_counter() - started
+    # ru_maxrss is in kilobytes on Linux
+    print(json.dumps({'seconds': elapsed, 'peakMB': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+
+
+async def _add_scenario_settings(
+    dataset: Dataset,
+    parameters: int,
+    interventions: int,
+) -> Tuple[List[uuid.UUID], List[uuid.UUID]]:
+    """
+    Add parameter values (one entry per group) and interventions to each scenario.
+    Returns the IDs of the parameter definitions and intervention templates.
+    """
+    async with create_session() as session:
+        definitions = [db.ParameterDefinition(name=f'benchmark-{index}') for index in range(parameters)]
+        templates = [db.InterventionTemplate(name=f'benchmark-{index}') for index in range(interventions)]
+        session.add_all([*definitions, *templates])
+        await session.flush()
+        for scenario in dataset.scenarios:
+            session.add_all([
+                db.ParameterValue(scenarioId=scenario, definitionId=definition.id) for definition in definitions
+            ])
+            session.add_all([
+                db.InterventionImplementation(
+                    scenarioId=scenario, interventionId=template.id,
+                    startDate=START_DATE, endDate=START_DATE, coefficient=0.5,
+                )
+                for template in templates
+            ])
+            await session.flush()
+            session.add_all([
+                db.ParameterValueEntry(
+                    parameterValueIdScenario=scenario, parameterValueIdDefinition=definition.id,
+                    groupId=group, valueMin=0.1, valueMax=0.2,
+                )
+                for definition in definitions for group in dataset.groups
+            ])
+        await session.commit()
+        return [definition.id for definition in definitions], [template.id for template in templates]
+
+
+async def _drop_scenario_settings(definitions: List[uuid.UUID], templates: List[uuid.UUID]) -> None:
+    async with create_session() as session:
+        await session.exec(delete(db.ParameterDefinition).where(db.ParameterDefinition.id.in_(definitions)))
+        await session.exec(delete(db.InterventionTemplate).where(db.InterventionTemplate.id.in_(templates)))
+        await session.commit()
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with create_session() as session:
+        started = time.perf_counter()
+        dataset = await create_dataset(
+            session, len(MODES), args.nodes, args.groups, args.compartments, args.percentiles, args.days
+        )
+    definitions, templates = await _add_scenario_settings(dataset, args.parameters, args.interventions)
+    print(
+        f'Created {len(dataset.scenarios)} scenarios x {dataset.rows_per_scenario} datapoints, '
+        f'{len(definitions)} parameter values, {len(definitions) * len(dataset.groups)} entries '
+        f'and {len(templates)} interventions in {time.perf_counter() - started:.1f}s'
+    )
+    try:
+        for scenario, mode in zip(dataset.scenarios, MODES):
+            result = json.loads(subprocess.run(
+                [sys.executable, '-m', 'tools.bench_scenario_delete', '--delete', str(scenario), '--mode', mode],
+                check=True, capture_output=True, text=True,
+            ).stdout.splitlines()[-1])
+            print(f'{mode}: {result["seconds"]:.2f}s, {result["peakMB"]:.0f} MB peak RSS')
+    finally:
+        async with create_session() as session:
+            # Scenarios of a failed delete are left over, remove all of them before the entities they refer to
+            for scenario in dataset.scenarios:
+                await session.exec(delete(db.Scenario).where(db.Scenario.id == scenario))
+            await session.commit()
+            await drop_dataset(session, dataset, scenarios=False)
+        await _drop_scenario_settings(definitions, templates)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=400)
+    parser.add_argument('--groups', type=int, default=6)
+    parser.add_argument('--compartments', type=int, default=4)
+    parser.add_argument('--percentiles', type=int, nargs='+', default=[25, 50, 75])
+    parser.add_argument('--days', type=int, default=100)
+    parser.add_argument('--parameters', type=int, default=200)
+    parser.add_argument('--interventions', type=int, default=50)
+    # Internal: delete a single scenario in the given mode (run in a subprocess by main)
+    parser.add_argument('--delete', help=argparse.SUPPRESS)
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    asyncio.run(_delete(args.delete, args.mode) if args.delete else main(args))
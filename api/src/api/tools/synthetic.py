@@ -0,0 +1,113 @@
+"""
+Synthetic scenarios for the benchmarks in this folder.
+The data is created with its own model, node list, nodes, groups and compartments next to existing data
+and removed again by `drop_dataset`, still better run the benchmarks against a database of their own.
+"""
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List
+
+import numpy
+from sqlalchemy import delete
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import app.db.models as db
+from app.db.tasks import datapoint_update_all_by_scenario, scenario_delete
+
+START_DATE = date(2024, 1, 1)
+
+
+@dataclass
+class Dataset:
+    """IDs of the entities of a synthetic dataset."""
+    model: uuid.UUID
+    node_list: uuid.UUID
+    nodes: List[uuid.UUID] = field(default_factory=list)
+    groups: List[uuid.UUID] = field(default_factory=list)
+    compartments: List[uuid.UUID] = field(default_factory=list)
+    scenarios: List[uuid.UUID] = field(default_factory=list)
+    percentiles: List[int] = field(default_factory=list)
+    days: int = 0
+
+    @property
+    def rows_per_scenario(self) -> int:
+        return len(self.nodes) * len(self.groups) * len(self.compartments) * len(self.percentiles) * self.days
+
+
+def synthetic_datapoints(dataset: Dataset) -> Dict[str, numpy.ndarray]:
+    """Columnar datapoints of one scenario (as passed to `datapoint_update_all_by_scenario`) with random values."""
+    shape = (len(dataset.nodes), len(dataset.groups), len(dataset.compartments), len(dataset.percentiles), dataset.days)
+    node, group, compartment, percentile, day = (index.ravel() for index in numpy.indices(shape))
+    return {
+        'dayOffset': day.astype(numpy.int32),
+        'nodeId': numpy.array([str(id) for id in dataset.nodes], dtype=object)[node],
+        'groupId': numpy.array([str(id) for id in dataset.groups], dtype=object)[group],
+        'compartmentId': numpy.array([str(id) for id in dataset.compartments], dtype=object)[compartment],
+        'percentile': numpy.array(dataset.percentiles, dtype=numpy.int16)[percentile],
+        'value': numpy.random.default_rng(0).random(day.size) * 1000,
+    }
+
+
+async def create_dataset(
+    session: AsyncSession,
+    scenarios: int,
+    nodes: int,
+    groups: int,
+    compartments: int,
+    percentiles: List[int],
+    days: int,
+) -> Dataset:
+    """Create the entities and scenarios of a synthetic dataset and import the same random datapoints into each."""
+    tag = uuid.uuid4().hex[:8]
+    model = db.Model(name=f'benchmark-{tag}')
+    node_list = db.NodeList(name=f'benchmark-{tag}')
+    node_rows = [db.Node(nuts=f'{index:05d}', name=f'benchmark-{tag}-{index}') for index in range(nodes)]
+    group_rows = [db.Group(name=f'benchmark-{tag}-{index}', category='age') for index in range(groups)]
+    compartment_rows = [db.Compartment(name=f'benchmark-{tag}-{index}') for index in range(compartments)]
+    session.add_all([model, node_list, *node_rows, *group_rows, *compartment_rows])
+    await session.flush()
+    session.add_all([
+        *(db.NodeListNodeLink(nodeId=node.id, listId=node_list.id) for node in node_rows),
+        *(db.ModelGroupLink(modelId=model.id, groupId=group.id) for group in group_rows),
+        *(db.ModelCompartmentLink(modelId=model.id, compartmentId=compartment.id) for compartment in compartment_rows),
+    ])
+    scenario_rows = [
+        db.Scenario(
+            name=f'benchmark-{tag}-{index}', startDate=START_DATE, endDate=START_DATE + timedelta(days=days - 1),
+            modelId=model.id, nodeListId=node_list.id, percentiles=','.join(map(str, percentiles)),
+        )
+        for index in range(scenarios)
+    ]
+    session.add_all(scenario_rows)
+    await session.commit()
+    dataset = Dataset(
+        model=model.id,
+        node_list=node_list.id,
+        nodes=[node.id for node in node_rows],
+        groups=[group.id for group in group_rows],
+        compartments=[compartment.id for compartment in compartment_rows],
+        scenarios=[scenario.id for scenario in scenario_rows],
+        percentiles=percentiles,
+        days=days,
+    )
+    datapoints = synthetic_datapoints(dataset)
+    for scenario in dataset.scenarios:
+        await datapoint_update_all_by_scenario(session, str(scenario), datapoints)
+    return dataset
+
+
+async def drop_dataset(session: AsyncSession, dataset: Dataset, scenarios: bool = True) -> None:
+    """Delete the scenarios (unless already deleted) and entities of a synthetic dataset."""
+    if scenarios:
+        for scenario in dataset.scenarios:
+            await scenario_delete(session, str(scenario))
+    await session.exec(delete(db.NodeListNodeLink).where(db.NodeListNodeLink.listId == dataset.node_list))
+    await session.exec(delete(db.ModelGroupLink).where(db.ModelGroupLink.modelId == dataset.model))
+    await session.exec(delete(db.ModelCompartmentLink).where(db.ModelCompartmentLink.modelId == dataset.model))
+    await session.exec(delete(db.Node).where(db.Node.id.in_(dataset.nodes)))
+    await session.exec(delete(db.Group).where(db.Group.id.in_(dataset.groups)))
+    await session.exec(delete(db.Compartment).where(db.Compartment.id.in_(dataset.compartments)))
+    await session.exec(delete(db.NodeList).where(db.NodeList.id == dataset.node_list))
+    await session.exec(delete(db.Model).where(db.Model.id == dataset.model))
+    await session.commit()
@@ -0,0 +1,17 @@
+import logging
+
+from celery import Celery
+from core import config
+
+# Celery app shared by the API (enqueueing jobs) and the import worker (executing them)
+celery_app = Celery(
+    broker=config.CELERY_BROKER_URL,
+    backend=config.CELERY_RESULT_BACKEND,
+    broker_connection_max_retries=30,
+    include=["app.jobs.scenario_import"],
+)
+celery_app.config_from_object("celery_app_config")
+
+c_logger = logging.getLogger("celery")
+
+c_logger.setLevel(logging.INFO)